@@ -14,6 +14,8 @@ PER_DOC_CSV    = ROOT / "outputs" / "analyze" / "per_doc.csv"
 FINDINGS_CSV   = ROOT / "outputs" / "report" / "findings.csv"
 KPIS_JSON      = ROOT / "outputs" / "analyze" / "corpus_kpis.json"
 REPORT_MD      = ROOT / "outputs" / "report" / "report.md"
+# Partial snapshots published by the extractor while a triage run is in progress
+PARTIAL_DIR    = ROOT / "outputs" / "partial"
 
 # Optional scripts
 INGEST_SCRIPT   = ROOT / "src" / "ingest_pdf_part1.py"
@@ -130,21 +132,42 @@ if do_report:
     show_result(ok, "Reporter", out, dt)
 
 # ------------- Data Loading -------------
+def partial_is_newer() -> bool:
+    """A partial snapshot left by a killed run must not hide the analyst/reporter outputs written after it."""
+    snap = PARTIAL_DIR / "per_doc.csv"
+    if not snap.exists():
+        return False
+    full = [p.stat().st_mtime for p in (PER_DOC_CSV, FINDINGS_CSV) if p.exists()]
+    return not full or snap.stat().st_mtime > max(full)
+
 @st.cache_data(show_spinner=False)
 def load_all():
-    df_docs = load_csv(PER_DOC_CSV)
-    df_find = load_csv(FINDINGS_CSV)
+    progress = load_json(PARTIAL_DIR / "progress.json")
+    # a run that stopped early leaves a final snapshot marked "interrupted": still partial numbers
+    if progress and (not progress.get("final") or progress.get("interrupted")) and partial_is_newer():
+        df_docs = load_csv(PARTIAL_DIR / "per_doc.csv")
+        df_find = load_csv(PARTIAL_DIR / "findings.csv")
+    else:
+        progress = None
+        df_docs = load_csv(PER_DOC_CSV)
+        df_find = load_csv(FINDINGS_CSV)
     kpis = load_json(KPIS_JSON) or {}
     report_md = load_text(REPORT_MD)
-    return df_docs, df_find, kpis, report_md
+    return df_docs, df_find, kpis, report_md, progress
 
 if do_refresh or any([do_ingest, do_extract, do_validate, do_analyst, do_report]):
     load_all.clear()
 
-df_docs, df_find, kpis, report_md = load_all()
+df_docs, df_find, kpis, report_md, progress = load_all()
 
 # ------------- Top KPIs -------------
 st.title("AI Document Intelligence – Interactive Dashboard")
+if progress and progress.get("interrupted"):
+    st.warning(f"Partial results: the extraction run stopped after {progress.get('done')}/{progress.get('total')} "
+               f"docs (riskiest first). Re-run the extractor to finish; finished docs are skipped.")
+elif progress:
+    st.info(f"Partial results: extraction in progress ({progress.get('done')}/{progress.get('total')} docs, "
+            f"riskiest first; snapshot {progress.get('snapshot')}). Press Reload Data for the latest snapshot.")
 m1, m2, m3, m4 = st.columns(4)
 m1.metric("Total docs", len(df_docs) if not df_docs.empty else 0)
 m2.metric("Avg risk score", f"{(pd.to_numeric(df_docs.get('risk_score', pd.Series([])), errors='coerce').mean() if not df_docs.empty else 0):.2f}")
@@ -232,7 +255,10 @@ if not df_find.empty:
     chosen = st.multiselect("Issue types to show", issue_types, default=issue_types)
     if chosen:
         sub = sub[sub["issue_type"].isin(chosen)]
-    st.dataframe(sub[["doc_id","issue_type","field","payment_net_days","payment_amount","quote","details"]], use_container_width=True)
+    cols = ["doc_id","issue_type","field","payment_net_days","payment_amount","quote","details"]
+    if "page" in sub.columns:
+        cols.insert(cols.index("quote") + 1, "page")
+    st.dataframe(sub[cols], use_container_width=True)
 else:
     st.info("No findings.csv found. Run reporter.")
 
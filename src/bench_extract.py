@@ -0,0 +1,108 @@
+"""
+Offline throughput benchmark of the whole extractor (run_extractor)
+- LLM answers come from the synthetic backend (no network, latency from a
+  distribution) or from a replayed recording (llm_backend=record once, then
+  --backend replay), so runs are repeatable on a laptop
+- Outputs go to a scratch directory and never touch outputs/extract; per-field
+  reuse is off so every run does the full work
+- Optional cache pass: a fresh LLM cache, run cold then warm
+- --executor process / --no-llm: the process-pool mode and the rules-only path
+  (docs/s against --workers processes shows how the CPU-bound path scales)
+- --baseline: compare docs/s with an earlier --out file and exit 1 when it
+  dropped by more than --tolerance (throughput regression)
+
+Usage:
+  python src/bench_extract.py [--limit 100] [--backend synthetic|replay] [--median-ms 800]
+                              [--workers 8] [--concurrency 8] [--cache]
+                              [--executor thread|process] [--no-llm]
+                              [--out bench.json] [--baseline bench.json] [--tolerance 0.1]
+"""
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, List
+
+import extractor as X
+from llm_engine import reset_engine
+
+def run(cfg: Dict[str, Any], label: str, limit: int) -> Dict[str, Any]:
+    reset_engine()
+    s = X.run_extractor(cfg, limit=limit, verbose=False)
+    llm = s["llm"] or {}
+    cache = llm.get("cache") or {}
+    return {"run": label, "docs": s["docs"], "secs": s["secs"], "docs_per_s": round(s["docs"] / s["secs"], 2),
+            "llm_calls": llm.get("calls", 0), "max_in_flight": llm.get("max_in_flight", 0),
+            "cache_hit_rate": cache.get("hit_rate")}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--limit", type=int, default=100, help="first N docs (0 = all)")
+    ap.add_argument("--backend", default="synthetic", choices=["synthetic", "replay"])
+    ap.add_argument("--median-ms", type=float, default=800, help="synthetic latency median")
+    ap.add_argument("--sigma", type=float, default=0.5, help="synthetic lognormal sigma")
+    ap.add_argument("--workers", type=int, default=0, help="max_workers (0 = config)")
+    ap.add_argument("--concurrency", type=int, default=0, help="llm_concurrency (0 = config)")
+    ap.add_argument("--executor", default="", choices=["", "thread", "process"], help="'' = config")
+    ap.add_argument("--no-llm", action="store_true", help="rules (and spaCy) only")
+    ap.add_argument("--spacy", action="store_true", help="keep spaCy on (needs the model installed)")
+    ap.add_argument("--cache", action="store_true", help="also run cold + warm with a fresh LLM cache")
+    ap.add_argument("--out", default="", help="optional JSON output path")
+    ap.add_argument("--baseline", default="", help="earlier --out file to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.1, help="allowed docs/s drop vs baseline")
+    args = ap.parse_args()
+
+    base = X.load_cfg()
+    base.update(llm_backend=args.backend, reuse_fields=False, llm_cache="", llm_metrics_file="", run_stats_file="",
+                triage_snapshot_dir="", pending_file="", use_spacy=args.spacy and base.get("use_spacy", True))
+    base["llm_synthetic"] = dict(base.get("llm_synthetic", {}), median_ms=args.median_ms, sigma=args.sigma)
+    if args.executor:
+        base["executor"] = args.executor
+    if args.no_llm:
+        base["use_llm"] = False
+    if args.workers:
+        base["max_workers"] = base["process_workers"] = args.workers
+    if args.concurrency:
+        base["llm_concurrency"] = args.concurrency
+
+    rows: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        base.update(out_dir=str(Path(tmp) / "extract"), dedup_index=str(Path(tmp) / "dedup_index.json"))
+        rows.append(run(base, "no cache", args.limit))
+        if args.cache:
+            cfg = dict(base, llm_cache=str(Path(tmp) / "llm_cache.db"))
+            rows.append(run(cfg, "cache cold", args.limit))
+            rows.append(run(cfg, "cache warm", args.limit))
+    reset_engine()
+
+    print(f"\nbackend={args.backend}, executor={base.get('executor', 'thread')}, workers={base.get('max_workers')}, "
+          f"llm_concurrency={base.get('llm_concurrency')}, median latency {args.median_ms:.0f}ms")
+    cols = list(rows[0])
+    print("\n|" + "|".join(cols) + "|")
+    print("|" + "|".join(["---"] * len(cols)) + "|")
+    for row in rows:
+        print("|" + "|".join(str(row[c]) for c in cols) + "|")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\n✓ Wrote {out}")
+
+    if args.baseline:
+        prev = {r["run"]: r for r in json.loads(Path(args.baseline).read_text(encoding="utf-8"))}
+        regressed = False
+        for row in rows:
+            old = prev.get(row["run"])
+            if not old:
+                continue
+            change = row["docs_per_s"] / old["docs_per_s"] - 1 if old["docs_per_s"] else 0.0
+            mark = "✗" if change < -args.tolerance else "✓"
+            regressed |= change < -args.tolerance
+            print(f"{mark} {row['run']}: {old['docs_per_s']} -> {row['docs_per_s']} docs/s ({change:+.1%})")
+        if regressed:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark PDF text backends (ingest_backends.py)
+- Converts every PDF under full_contract_pdf/Part_I with each installed backend
+- Reports throughput (docs/s, pages/s, MB/s) and text equivalence against the
+  reference pdfminer output (whitespace-normalized similarity + exact-match rate)
+
+Usage:
+  python src/bench_ingest.py [--limit N] [--backends pdfminer,pdfminer_fast,pymupdf]
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from rapidfuzz import fuzz
+
+from ingest_backends import available_backends, get_backend
+
+ROOT = Path(__file__).resolve().parents[1]
+PDF_DIR = ROOT / "full_contract_pdf" / "Part_I"
+REFERENCE = "pdfminer"
+
+def normalize_ws(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+def run_backend(name: str, pdfs: List[Path]) -> Dict[str, Any]:
+    backend = get_backend(name)
+    texts: Dict[str, str] = {}
+    pages = failed = 0
+    t0 = time.perf_counter()
+    for pdf in pdfs:
+        try:
+            page_texts = list(backend.iter_pages(str(pdf)))
+        except Exception:
+            failed += 1
+            continue
+        pages += len(page_texts)
+        texts[pdf.name] = "".join(page_texts)
+    secs = time.perf_counter() - t0
+    mb = sum(p.stat().st_size for p in pdfs) / 1e6
+    return {
+        "backend": name,
+        "docs": len(pdfs),
+        "failed": failed,
+        "pages": pages,
+        "seconds": round(secs, 2),
+        "docs_per_s": round(len(pdfs) / secs, 2) if secs else None,
+        "pages_per_s": round(pages / secs, 1) if secs else None,
+        "mb_per_s": round(mb / secs, 2) if secs else None,
+        "_texts": texts,
+    }
+
+def compare(ref: Dict[str, str], other: Dict[str, str]) -> Dict[str, Any]:
+    """Similarity of whitespace-normalized text vs the reference, per common doc."""
+    sims, exact = [], 0
+    for name, rtext in ref.items():
+        if name not in other:
+            continue
+        a, b = normalize_ws(rtext), normalize_ws(other[name])
+        if a == b:
+            exact += 1
+            sims.append(100.0)
+        else:
+            sims.append(fuzz.ratio(a, b))
+    if not sims:
+        return {"similarity_mean": None, "similarity_min": None, "exact_match_rate": None}
+    return {
+        "similarity_mean": round(sum(sims) / len(sims), 2),
+        "similarity_min": round(min(sims), 2),
+        "exact_match_rate": round(exact / len(sims), 3),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--limit", type=int, default=0, help="only the first N PDFs (0 = all)")
+    ap.add_argument("--backends", default="", help="comma-separated; default = all installed")
+    ap.add_argument("--out", default="", help="optional JSON output path")
+    args = ap.parse_args()
+
+    pdfs = sorted(PDF_DIR.rglob("*.pdf"))
+    if args.limit:
+        pdfs = pdfs[:args.limit]
+    if not pdfs:
+        raise SystemExit(f"No PDFs found under {PDF_DIR}")
+
+    names = [b for b in args.backends.split(",") if b] or available_backends()
+    if REFERENCE not in names:
+        names.insert(0, REFERENCE)
+    print(f"Benchmarking {len(pdfs)} PDFs from {PDF_DIR.relative_to(ROOT)} with: {', '.join(names)}")
+
+    results = []
+    for name in names:
+        r = run_backend(name, pdfs)
+        print(f"  {name:<14} {r['seconds']:>8.2f}s  {r['pages_per_s']:>8} pages/s  failed={r['failed']}")
+        results.append(r)
+
+    ref_texts = results[0]["_texts"]
+    rows = []
+    for r in results:
+        row = {k: v for k, v in r.items() if not k.startswith("_")}
+        row.update(compare(ref_texts, r["_texts"]))
+        row["speedup_vs_ref"] = round(results[0]["seconds"] / r["seconds"], 2) if r["seconds"] else None
+        rows.append(row)
+
+    cols = ["backend", "docs", "failed", "pages", "seconds", "docs_per_s", "pages_per_s", "mb_per_s",
+            "speedup_vs_ref", "similarity_mean", "similarity_min", "exact_match_rate"]
+    print("\n|" + "|".join(cols) + "|")
+    print("|" + "|".join(["---"] * len(cols)) + "|")
+    for row in rows:
+        print("|" + "|".join(str(row.get(c, "")) for c in cols) + "|")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\n✓ Wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark the LLM call path offline against the local stub (llm_stub.py)
+- "threads": the old path, a thread pool where each worker blocks on a
+  synchronous call behind a threading.Semaphore(llm_concurrency)
+- "engine": llm_engine.LLMEngine, all calls issued as coroutines on one loop
+  (pooled client, token bucket, retry/backoff)
+- Same per-field requests (excerpts from full_contract2_txt) for both; reports
+  wall time, calls/s, retries and the stub's observed max in-flight
+- --faults: the stub only takes --capacity requests at once (429 above),
+  slows down above 3/4 of it and stalls a share of requests past the client
+  timeout; compares fixed limits against the adaptive (AIMD) limit, and with
+  --tpm also a stub token quota with and without the engine's token budget
+
+Usage:
+  python src/bench_llm.py [--calls 200] [--latency-ms 300] [--rate-429 0.05]
+                          [--workers 8] [--concurrency 3] [--engine-concurrency 32]
+  python src/bench_llm.py --faults [--capacity 12] [--rate-stall 0.01] [--tpm 0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+from llm_stub import start_stub
+from llm_engine import LLMEngine
+from lc_extractor import field_chain, field_inputs, field_result, DEFINITIONS
+
+ROOT = Path(__file__).resolve().parents[1]
+TXT_DIR = ROOT / "full_contract2_txt"
+
+def requests_for(n: int) -> List[Tuple[str, str, int, str]]:
+    """n (doc_id, field, chunk_start, chunk_text) requests cycling over docs and fields."""
+    out: List[Tuple[str, str, int, str]] = []
+    fields = list(DEFINITIONS)
+    for p in sorted(TXT_DIR.glob("*.txt")):
+        text = p.read_text(encoding="utf-8", errors="ignore")[:2000]
+        for f in fields:
+            out.append((p.name, f, 0, text))
+            if len(out) == n:
+                return out
+    return out
+
+def run_threads(reqs, url: str, workers: int, concurrency: int, model: str) -> float:
+    sem = threading.Semaphore(concurrency)
+    chain = field_chain(model, url, 2, 60.0)
+
+    def one(req):
+        doc_id, field, start, text = req
+        with sem:
+            try:
+                return field_result(chain.invoke(field_inputs(field, start, text)), start)
+            except Exception:
+                return None
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(one, reqs))
+    return time.perf_counter() - t0
+
+def run_engine(reqs, engine: LLMEngine, model: str) -> float:
+    async def all_calls():
+        return await asyncio.gather(*(engine.extract_field(d, f, s, t, model) for d, f, s, t in reqs))
+    t0 = time.perf_counter()
+    engine.run(all_calls())
+    return time.perf_counter() - t0
+
+def engine_row(label: str, reqs, model: str, stub_kwargs: Dict[str, Any], **engine_kwargs) -> Dict[str, Any]:
+    server, url, state = start_stub(**stub_kwargs)
+    engine = LLMEngine(base_url=url, backoff_s=0.1, **engine_kwargs)
+    secs = run_engine(reqs, engine, model)
+    m = engine.metrics()
+    engine.close()
+    server.shutdown()
+    return {"path": label, "calls": len(reqs), "secs": round(secs, 2), "calls_per_s": round(len(reqs) / secs, 1),
+            "stub_429": state.stats["429"], "timeouts": m["timeouts"], "failed": m["failed"],
+            "final_limit": m["limit"], "max_in_flight": state.stats["max_in_flight"], "p95_ms": m["p95_ms"]}
+
+def fault_rows(args, reqs) -> List[Dict[str, Any]]:
+    stub = dict(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4, capacity=args.capacity,
+                overload_above=max(1, args.capacity * 3 // 4), rate_stall=args.rate_stall, stall_s=30)
+    common = dict(timeout_s=args.latency_ms * 10 / 1000, max_retries=6)
+    rows = [
+        engine_row(f"fixed {args.concurrency}", reqs, args.model, stub, concurrency=args.concurrency,
+                   adaptive=False, **common),
+        engine_row(f"fixed {args.engine_concurrency}", reqs, args.model, stub,
+                   concurrency=args.engine_concurrency, adaptive=False, **common),
+        engine_row(f"adaptive from {args.concurrency}", reqs, args.model, stub, concurrency=args.concurrency,
+                   p95_target_ms=args.latency_ms * 3, **common),
+    ]
+    if args.tpm:
+        stub_tpm = dict(stub, capacity=0, tpm=args.tpm)
+        rows.append(engine_row("adaptive, no token budget", reqs, args.model, stub_tpm,
+                               concurrency=args.concurrency, **common))
+        rows.append(engine_row(f"adaptive, budget {int(args.tpm * 0.9)}/min", reqs, args.model, stub_tpm,
+                               concurrency=args.concurrency, tokens_per_min=args.tpm * 0.9, **common))
+    return rows
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--latency-ms", type=float, default=300)
+    ap.add_argument("--rate-429", type=float, default=0.05)
+    ap.add_argument("--workers", type=int, default=8, help="thread pool size of the old path")
+    ap.add_argument("--concurrency", type=int, default=3, help="semaphore of the old path")
+    ap.add_argument("--engine-concurrency", type=int, default=32)
+    ap.add_argument("--model", default="gpt-4o-mini")
+    ap.add_argument("--faults", action="store_true", help="fixed vs adaptive limits against an overloadable stub")
+    ap.add_argument("--capacity", type=int, default=12, help="--faults: stub in-flight capacity")
+    ap.add_argument("--rate-stall", type=float, default=0.01, help="--faults: share of stalled requests")
+    ap.add_argument("--tpm", type=int, default=0, help="--faults: stub prompt-token quota per minute")
+    ap.add_argument("--out", default="", help="optional JSON output path")
+    args = ap.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    reqs = requests_for(args.calls)
+    rows: List[Dict[str, Any]] = []
+    if args.faults:
+        rows = fault_rows(args, reqs)
+        print(f"{len(reqs)} calls, stub capacity {args.capacity}, latency {args.latency_ms:.0f}ms, "
+              f"stall rate {args.rate_stall}, tpm {args.tpm or 'off'}")
+        print_rows(rows, args.out)
+        return
+
+    _, url, state = start_stub(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4, rate_429=args.rate_429)
+    secs = run_threads(reqs, url, args.workers, args.concurrency, args.model)
+    rows.append({"path": "threads", "calls": len(reqs), "secs": round(secs, 2),
+                 "calls_per_s": round(len(reqs) / secs, 1), "retries": state.stats["429"],
+                 "max_in_flight": state.stats["max_in_flight"]})
+
+    _, url, state = start_stub(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4, rate_429=args.rate_429)
+    engine = LLMEngine(concurrency=args.engine_concurrency, base_url=url, backoff_s=0.1)
+    secs = run_engine(reqs, engine, args.model)
+    rows.append({"path": "engine", "calls": len(reqs), "secs": round(secs, 2),
+                 "calls_per_s": round(len(reqs) / secs, 1), "retries": engine.stats["retries"],
+                 "max_in_flight": state.stats["max_in_flight"]})
+    engine.close()
+
+    print(f"{len(reqs)} single-field calls, stub latency {args.latency_ms:.0f}ms, 429 rate {args.rate_429}")
+    print_rows(rows, args.out)
+
+def print_rows(rows: List[Dict[str, Any]], out_path: str) -> None:
+    cols = list(rows[0])
+    print("\n|" + "|".join(cols) + "|")
+    print("|" + "|".join(["---"] * len(cols)) + "|")
+    for row in rows:
+        print("|" + "|".join(str(row[c]) for c in cols) + "|")
+
+    if out_path:
+        out = Path(out_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\n✓ Wrote {out}")
+
+if __name__ == "__main__":
+    main()
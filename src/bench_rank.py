@@ -0,0 +1,125 @@
+"""
+Benchmark chunk rankers: keyword + fuzzy (extractor_utils) vs BM25 (extractor_bm25)
+- Chunks every .txt in full_contract2_txt with the extractor's chunk settings
+- Silver labels: where the schema rules locate each field (section-first span
+  start for span fields, first regex match otherwise); docs where a field has
+  no rule match are skipped for that field
+- Reports hit@1 / hit@3 (the label falls inside a top-k chunk) and ranking
+  latency per doc for all fields together
+
+Note: the keyword hints and the rules share vocabulary, so these labels
+favour the keyword ranker somewhat; treat hit rates as a relative signal.
+
+Usage:
+  python src/bench_rank.py [--limit N] [--out results.json]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from extractor_utils import make_chunks, rank_chunks_for_field, KeywordIndex
+from extractor_bm25 import ChunkBM25
+from extractor_sections import find_sections
+from extractor_schema import compile_schema
+
+ROOT = Path(__file__).resolve().parents[1]
+TXT_DIR = ROOT / "full_contract2_txt"
+SCHEMA_FILE = ROOT / "config" / "schema.json"
+CFG_FILE = ROOT / "config" / "extractor.llm.json"
+
+def silver_labels(compiled, text: str, sections) -> Dict[str, int]:
+    rec, _ = compiled.engine.scan(text, sections)
+    labels: Dict[str, int] = {}
+    for name, spec in compiled.fields.items():
+        if not spec.hints:
+            continue
+        v = rec.get(name)
+        if isinstance(v, dict) and isinstance(v.get("start"), int):
+            labels[name] = v["start"]
+        elif v and spec.rule:
+            m = spec.rule.rx.search(text)
+            if m:
+                labels[name] = m.start()
+    return labels
+
+def hit(ranked: List[Any], pos: int, k: int) -> bool:
+    return any(c.start <= pos < c.end for c in ranked[:k])
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--limit", type=int, default=0, help="only the first N docs (0 = all)")
+    ap.add_argument("--out", default="", help="optional JSON output path")
+    args = ap.parse_args()
+
+    cfg = json.loads(CFG_FILE.read_text(encoding="utf-8")) if CFG_FILE.exists() else {}
+    compiled = compile_schema(json.loads(SCHEMA_FILE.read_text(encoding="utf-8")))
+    queries = {n: s.hints for n, s in compiled.fields.items() if s.hints}
+    size, overlap = int(cfg.get("chunk_size", 2000)), int(cfg.get("chunk_overlap", 150))
+    boundary = cfg.get("chunk_boundary", "none")
+
+    paths = sorted(TXT_DIR.glob("*.txt"))
+    if args.limit:
+        paths = paths[:args.limit]
+    if not paths:
+        raise SystemExit(f"No .txt files under {TXT_DIR}")
+
+    rankers = ["keyword", "keyword+index", "bm25"]
+    secs = {r: 0.0 for r in rankers}
+    hits = {r: {f: [0, 0, 0] for f in queries} for r in rankers}   # hit@1, hit@3, labelled
+    for p in paths:
+        text = p.read_text(encoding="utf-8", errors="ignore")
+        sections = find_sections(text)
+        chunks = make_chunks(text, size=size, overlap=overlap, boundary=boundary,
+                             section_starts=[s[0] for s in sections])
+        labels = silver_labels(compiled, text, sections)
+
+        ranked: Dict[str, Dict[str, List[Any]]] = {}
+        t0 = time.perf_counter()
+        ranked["keyword"] = {f: rank_chunks_for_field(f, chunks, h) for f, h in queries.items()}
+        secs["keyword"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        idx = KeywordIndex(text, compiled.hints)
+        ranked["keyword+index"] = {f: rank_chunks_for_field(f, chunks, h, idx) for f, h in queries.items()}
+        secs["keyword+index"] += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ranked["bm25"] = ChunkBM25(chunks, text).rank(queries)
+        secs["bm25"] += time.perf_counter() - t0
+
+        for r in rankers:
+            for f, pos in labels.items():
+                h = hits[r][f]
+                h[0] += hit(ranked[r][f], pos, 1)
+                h[1] += hit(ranked[r][f], pos, 3)
+                h[2] += 1
+
+    rows = []
+    for r in rankers:
+        n = sum(h[2] for h in hits[r].values())
+        rows.append({
+            "ranker": r,
+            "ms_per_doc": round(secs[r] * 1000 / len(paths), 3),
+            "hit@1": round(sum(h[0] for h in hits[r].values()) / n, 3) if n else None,
+            "hit@3": round(sum(h[1] for h in hits[r].values()) / n, 3) if n else None,
+            **{f"hit@1:{f}": round(h[0] / h[2], 3) if h[2] else None for f, h in hits[r].items()},
+        })
+
+    print(f"Ranked {len(paths)} docs, {len(queries)} fields, chunk_size={size}, boundary={boundary}")
+    cols = list(rows[0])
+    print("\n|" + "|".join(cols) + "|")
+    print("|" + "|".join(["---"] * len(cols)) + "|")
+    for row in rows:
+        print("|" + "|".join(str(row[c]) for c in cols) + "|")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\n✓ Wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark the spaCy NER fallback: per-call path vs batched nlp.pipe (extractor_nlp)
+- per-call: nlp_parties + nlp_governing_law per doc from a thread pool, as
+  prepare_doc does without "spacy_batch" (full pipeline, two passes per doc)
+- batched: ner_heads over all doc heads (one trimmed NER pass per doc), with
+  1 and --processes worker processes
+- Reports docs/s and how often the batched answers match the per-call ones
+
+Usage:
+  python src/bench_spacy.py [--limit 200] [--workers 8] [--batch-size 32] [--processes 4]
+                            [--model en_core_web_sm] [--out results.json]
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+import extractor_nlp as N
+
+ROOT = Path(__file__).resolve().parents[1]
+TXT_DIR = ROOT / "full_contract2_txt"
+
+Answer = Tuple[Any, Any]   # (parties, governing_law)
+
+def per_call(texts: List[str], workers: int) -> List[Answer]:
+    def one(text: str) -> Answer:
+        return N.nlp_parties(text), N.nlp_governing_law(text, use_regex=False)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(one, texts))
+
+def batched(texts: List[str], batch_size: int, n_process: int, model: str) -> List[Answer]:
+    return [(N.parties_from_doc(d), N.governing_law_from_doc(d))
+            for d in N.ner_heads(texts, batch_size=batch_size, n_process=n_process, model=model)]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--limit", type=int, default=200, help="first N docs (0 = all)")
+    ap.add_argument("--workers", type=int, default=8, help="threads for the per-call path")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--processes", type=int, default=4, help="n_process for the multi-process run")
+    ap.add_argument("--model", default=N.SPACY_MODEL, help="spaCy model name or path")
+    ap.add_argument("--out", default="", help="optional JSON output path")
+    args = ap.parse_args()
+
+    files = sorted(TXT_DIR.glob("*.txt"))
+    if args.limit:
+        files = files[:args.limit]
+    texts = [p.read_text(encoding="utf-8", errors="ignore") for p in files]
+    N.SPACY_MODEL = args.model
+    N.nlp(), N.nlp_ner(args.model)   # model load is not part of the timings
+
+    runs = [("per-call threads", lambda: per_call(texts, args.workers)),
+            ("nlp.pipe n_process=1", lambda: batched(texts, args.batch_size, 1, args.model))]
+    if args.processes > 1:
+        runs.append((f"nlp.pipe n_process={args.processes}",
+                     lambda: batched(texts, args.batch_size, args.processes, args.model)))
+
+    rows: List[Dict[str, Any]] = []
+    reference: List[Answer] = []
+    for label, fn in runs:
+        t0 = time.perf_counter()
+        answers = fn()
+        secs = time.perf_counter() - t0
+        reference = reference or answers
+        same = sum(a == b for a, b in zip(answers, reference))
+        rows.append({"run": label, "docs": len(texts), "secs": round(secs, 2),
+                     "docs_per_s": round(len(texts) / secs, 1), "same_as_per_call": f"{same / len(texts):.1%}"})
+
+    print(f"\nmodel={args.model}, batch_size={args.batch_size}")
+    cols = list(rows[0])
+    print("\n|" + "|".join(cols) + "|")
+    print("|" + "|".join(["---"] * len(cols)) + "|")
+    for row in rows:
+        print("|" + "|".join(str(row[c]) for c in cols) + "|")
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"\n✓ Wrote {out}")
+
+if __name__ == "__main__":
+    main()
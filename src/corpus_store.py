@@ -0,0 +1,169 @@
+"""
+Packed corpus store
+- One file holding every document blob (UTF-8, optionally zlib-compressed)
+  plus a JSON offset index, instead of hundreds of small .txt files
+- CorpusReader memory-maps the pack: get() returns one document and
+  slice() returns text[start:end] without reading the rest of the file
+
+Layout:
+  MAGIC | blob 0 | blob 1 | ... | index (JSON, UTF-8) | index_offset (u64) | index_len (u64) | MAGIC
+
+Index entry per doc_id:
+  {"off", "len", "chars", "codec": "raw"|"zlib", "ascii", "ckpt", "pages"?, "canon"?, "sections"?}
+  ckpt = byte offset of every CKPT_CHARS-th character, so a character slice of
+  a raw non-ASCII blob only decodes from the nearest checkpoint.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"AIDPACK1"
+FOOTER = struct.Struct("<QQ")
+CKPT_CHARS = 4096
+
+def _checkpoints(text: str) -> List[int]:
+    """Byte offset (in UTF-8) of characters 0, CKPT_CHARS, 2*CKPT_CHARS, ..."""
+    out, pos = [], 0
+    for i in range(0, len(text), CKPT_CHARS):
+        out.append(pos)
+        pos += len(text[i:i + CKPT_CHARS].encode("utf-8"))
+    return out
+
+def write_pack(path: Path, docs: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]], compress: bool = False) -> int:
+    """
+    Write (doc_id, text, meta|None) items to path (temp file + rename). meta holds
+    small per-doc sidecars stored in the index, e.g. {"pages": [...], "canon": {...}}.
+    Returns the number of documents written.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    index: Dict[str, Dict[str, Any]] = {}
+    with tmp.open("wb") as f:
+        f.write(MAGIC)
+        for doc_id, text, meta in docs:
+            raw = text.encode("utf-8")
+            is_ascii = len(raw) == len(text)
+            blob = zlib.compress(raw, 6) if compress else raw
+            entry: Dict[str, Any] = {
+                "off": f.tell(), "len": len(blob), "chars": len(text),
+                "codec": "zlib" if compress else "raw", "ascii": is_ascii,
+            }
+            if not compress and not is_ascii:
+                entry["ckpt"] = _checkpoints(text)
+            if meta:
+                entry.update({k: v for k, v in meta.items() if v is not None})
+            f.write(blob)
+            index[doc_id] = entry
+        idx = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        idx_off = f.tell()
+        f.write(idx)
+        f.write(FOOTER.pack(idx_off, len(idx)))
+        f.write(MAGIC)
+    os.replace(tmp, path)
+    return len(index)
+
+class CorpusReader:
+    """Memory-mapped random access to a pack written by write_pack()."""
+
+    def __init__(self, path: Path, cache_docs: int = 8):
+        self.path = Path(path)
+        self._f = self.path.open("rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(MAGIC) + FOOTER.size
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            self.close()
+            raise ValueError(f"Not a corpus pack: {self.path}")
+        idx_off, idx_len = FOOTER.unpack(self._mm[-tail:-len(MAGIC)])
+        self.index: Dict[str, Dict[str, Any]] = json.loads(self._mm[idx_off:idx_off + idx_len].decode("utf-8"))
+        # small LRU of decompressed docs (only used for zlib blobs)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_docs = cache_docs
+        self._lock = threading.Lock()
+
+    # ----- container API -----
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def doc_ids(self) -> List[str]:
+        return sorted(self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.doc_ids())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        if getattr(self, "_f", None) is not None:
+            self._f.close()
+            self._f = None
+
+    # ----- access -----
+    def raw(self, doc_id: str) -> memoryview:
+        """Zero-copy view of the stored blob (UTF-8 bytes, or zlib data)."""
+        e = self.index[doc_id]
+        return memoryview(self._mm)[e["off"]:e["off"] + e["len"]]
+
+    def chars(self, doc_id: str) -> int:
+        return self.index[doc_id]["chars"]
+
+    def pages(self, doc_id: str) -> Optional[List[int]]:
+        return self.index[doc_id].get("pages")
+
+    def meta(self, doc_id: str, key: str) -> Any:
+        return self.index[doc_id].get(key)
+
+    def get(self, doc_id: str) -> str:
+        e = self.index[doc_id]
+        if e["codec"] == "zlib":
+            return self._decompressed(doc_id)
+        return self._mm[e["off"]:e["off"] + e["len"]].decode("utf-8")
+
+    def slice(self, doc_id: str, start: int, end: int) -> str:
+        """text[start:end] in characters, decoding only the bytes needed."""
+        e = self.index[doc_id]
+        start, end = max(0, start), min(e["chars"], end)
+        if end <= start:
+            return ""
+        if e["codec"] == "zlib":
+            return self._decompressed(doc_id)[start:end]
+        base = e["off"]
+        if e["ascii"]:
+            return self._mm[base + start:base + end].decode("utf-8")
+        # non-ASCII raw blob: decode from the checkpoint at/before start
+        ckpt = e["ckpt"]
+        k = start // CKPT_CHARS
+        b0 = base + ckpt[k]
+        k_end = (end - 1) // CKPT_CHARS + 1
+        b1 = base + ckpt[k_end] if k_end < len(ckpt) else base + e["len"]
+        chunk = self._mm[b0:b1].decode("utf-8")
+        off = k * CKPT_CHARS
+        return chunk[start - off:end - off]
+
+    def _decompressed(self, doc_id: str) -> str:
+        with self._lock:
+            if doc_id in self._cache:
+                self._cache.move_to_end(doc_id)
+                return self._cache[doc_id]
+        e = self.index[doc_id]
+        text = zlib.decompress(self._mm[e["off"]:e["off"] + e["len"]]).decode("utf-8")
+        with self._lock:
+            self._cache[doc_id] = text
+            if len(self._cache) > self._cache_docs:
+                self._cache.popitem(last=False)
+        return text
@@ -1,31 +1,81 @@
 """
 Extractor Agent (Optimized)
 - Regex/heuristics → optional spaCy → optional LangChain LLM fallback
-- Faster chunking, keyword-prefiltered ranking
-- Threaded per-file processing + LLM concurrency throttle
-- Persistent LangChain cache to avoid repeat calls
+- Faster chunking, keyword-prefiltered ranking off one shared hint-position index per doc
+  (or BM25 over the doc's chunks: "chunk_ranker": "bm25", see extractor_bm25.py)
+- Optional batched spaCy ("spacy_batch"): docs needing NER are gathered and their heads run
+  through one trimmed nlp.pipe pass (optionally multi-process, extractor_nlp.ner_heads)
+- Optional process pool ("executor": "process") for CPU-bound runs: workers compile the rules
+  and load spaCy once and read texts from the mmap'd pack; LLM calls stay on the parent's engine
+- Threaded per-file CPU work (regex/spaCy/ranking); LLM calls run concurrently on an
+  asyncio engine with pooled clients, a token-bucket rate limit and retry/backoff (llm_engine.py)
+- Optional batched LLM mode ("llm_batch"): one multi-field structured call per doc, per-field
+  calls only for empties
+- Optional evidence windows (extractor_evidence.py): each excerpt cut to sentence-bounded
+  windows around its hint hits under a char/token cap; answers mapped back to global offsets
+- Per-field calls fan out across fields x top-k chunks at once; a field's outstanding calls are
+  cancelled once a confident answer has no higher-ranked call still out (about one round trip per doc)
+- Persistent content-addressed LLM cache (llm_cache.py): keyed on excerpt text, not offsets
+- Rules compiled once and run with bounded windows + a per-field time budget (extractor_rules.py)
+- Fields (rules, hints, LLM definitions) declared in config/schema.json; only fields
+  whose definition changed since the last output are re-extracted (extractor_schema.py)
+- Optional near-duplicate reuse ("dedup", extractor_dedup.py): MinHash/LSH groups exact and
+  near copies; an exact copy takes its representative's values, a near copy reuses the LLM
+  spans it contains verbatim and only sends the fields in differing text to the LLM
+- Optional document-type routing ("routing", extractor_routing.py): each doc is classified by
+  its ingest folder (Part_I__Franchise__...) or its title, and runs only its category's field
+  set, rules and LLM budget from config/routing.json; the run ends with a per-category table
+  (also written to "run_stats_file" for the reporter)
+- Optional deadlines ("doc_deadline_s" from the start of a doc's LLM stage, "run_deadline_s"
+  from the run's):
+  a doc whose LLM calls are not back in time is written with its rule/spaCy values, the
+  unanswered fields marked timed_out in _provenance and queued in "pending_file";
+  `python extractor.py --pending` (or any later run) re-extracts just those fields
+- Optional triage ("triage", extractor_triage.py): a cheap regex pre-pass scores each doc's
+  risk (no governing law, long net terms, ambiguity terms, size), docs run riskiest first, and
+  partial per_doc.csv / findings.csv snapshots are published every few docs during the run
+- Incremental runs: each output is stamped with a fingerprint of (text, schema, settings) and
+  the source file's size/mtime; unchanged docs are skipped without reading their text, outputs
+  are written atomically (temp + rename) so an interrupted run resumes where it stopped, and
+  the run summary counts recomputed / skipped / failed docs
+- config/extractor.llm.json ships with every optional mode off (the original extraction);
+  config/extractor.llm.example.json has them all on (batched spaCy and LLM, evidence windows,
+  sentence chunk boundaries, dedup, routing, triage, a 120s doc deadline) to copy from
 """
 
+import asyncio
+import hashlib
 import json
-import re
+import os
+import queue
+import sys
+import threading
 import time
+from dataclasses import dataclass, field as dc_field
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
 # Load OPENAI_API_KEY from .env
 from dotenv import load_dotenv
 load_dotenv()
 
-# LangChain cache (persists across runs)
-from langchain.globals import set_llm_cache
-from langchain.cache import SQLiteCache
-
 # Local helpers
-from extractor_utils import make_chunks, rank_chunks_for_field
-from extractor_nlp import nlp_parties, nlp_governing_law
-from lc_extractor import lc_llm_extract_field
+from extractor_utils import (Chunk, make_chunks, rank_chunks_for_field, union_excerpts, KeywordIndex,
+                             load_page_offsets, page_at, load_offset_map)
+from ingest_canon import OffsetMap
+from extractor_nlp import nlp, nlp_parties, nlp_governing_law, ner_heads, parties_from_doc, governing_law_from_doc
+from llm_engine import LLMEngine, get_engine
+from lc_extractor import rebase_field
+from extractor_evidence import Evidence, compress, evidence_cap
+from corpus_store import CorpusReader
+from extractor_sections import Section, find_sections, from_json, load_sections, section_chunks
+from extractor_schema import compile_schema, run_key
+from extractor_bm25 import ChunkBM25
+from extractor_dedup import DedupIndex
+from extractor_routing import HEAD_CHARS, load_routing, folder_category, title_category, routed
+from extractor_triage import Snapshots, prescore
+from validator import load_rules
 
 # -------- Paths --------
 ROOT_DIR     = Path(__file__).resolve().parents[1]
@@ -35,14 +85,6 @@ LLM_CFG_FILE = ROOT_DIR / "config" / "extractor.llm.json"
 OUT_DIR      = ROOT_DIR / "outputs" / "extract"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-# Enable LC cache
-set_llm_cache(SQLiteCache(str(ROOT_DIR / ".lc_cache.db")))
-
-# -------- Regex heuristics --------
-DATE_RX  = r"(?:effective|commencement)\s*date[:\s]*([A-Za-z]{3,9}\s+\d{1,2},\s+\d{4}|\d{1,2}/\d{1,2}/\d{2,4})"
-LAW_RX   = r"governed\s+by\s+the\s+laws?\s+of\s+([A-Za-z\s,]+?)(?:[,.\n]|$)"
-PARTY_RX = r"\bbetween\s+(.*?)\s+and\s+(.*?)(?:[,.\n]|$)"
-
 def load_schema() -> Dict[str, Any]:
     if not SCHEMA_FILE.exists():
         raise FileNotFoundError(f"Schema not found: {SCHEMA_FILE}")
@@ -62,32 +104,57 @@ def load_cfg() -> Dict[str, Any]:
         "max_workers": 8,
         "llm_concurrency": 3,
         "chunk_size": 2000,
-        "chunk_overlap": 150
+        "chunk_overlap": 150,
+        "corpus_pack": "",
+        "out_dir": "",
+        "rule_budget_ms": 50,
+        "reuse_fields": True,
+        "chunk_ranker": "keyword",
+        "chunk_boundary": "none",
+        "llm_batch": False,
+        "llm_batch_max_chars": 8000,
+        "llm_base_url": "",
+        "llm_rate_per_s": 0,
+        "llm_max_retries": 4,
+        "llm_timeout_s": 60,
+        "llm_adaptive": True,
+        "llm_concurrency_min": 1,
+        "llm_concurrency_max": 64,
+        "llm_p95_target_ms": 8000,
+        "llm_tokens_per_min": 0,
+        "llm_metrics_file": "",
+        "llm_metrics_interval_s": 5,
+        "llm_cache": ".llm_cache.db",
+        "llm_cache_ttl_days": 30,
+        "llm_cache_max_rows": 200000,
+        "llm_backend": "live",
+        "llm_record_file": "outputs/llm_record.jsonl",
+        "llm_replay_latency": True,
+        "llm_synthetic": {"latency": "lognormal", "median_ms": 800, "sigma": 0.5, "empty_rate": 0.2, "seed": 0},
+        "routing": False,
+        "routing_file": "config/routing.json",
+        "run_stats_file": "outputs/extract_stats.json",
+        "doc_deadline_s": 0,
+        "run_deadline_s": 0,
+        "pending_file": "outputs/extract_pending.json",
+        "triage": False,
+        "triage_snapshot_dir": "outputs/partial",
+        "triage_snapshot_every": 25,
+        "triage_snapshot_s": 60,
+        "dedup": False,
+        "dedup_threshold": 0.8,
+        "dedup_index": "outputs/dedup_index.json",
+        "executor": "thread",
+        "process_workers": 0,
+        "spacy_batch": False,
+        "spacy_batch_size": 32,
+        "spacy_n_process": 1,
+        "llm_evidence": False,
+        "llm_evidence_max_chars": 800,
+        "llm_evidence_max_tokens": 0,
+        "llm_evidence_radius": 250
     }
 
-def find_span(text: str, pattern: str, window: int = 600) -> Optional[Dict[str, Any]]:
-    m = re.search(pattern, text, re.IGNORECASE | re.DOTALL | re.MULTILINE)
-    if not m:
-        return None
-    s, e = m.span()
-    e = min(len(text), max(e, s + window))
-    return {"text": text[s:e].strip(), "start": s, "end": e, "confidence": 0.72, "source": "regex"}
-
-def extract_rules(text: str) -> Dict[str, Any]:
-    rec: Dict[str, Any] = {}
-    m = re.search(PARTY_RX, text, re.IGNORECASE | re.DOTALL)
-    if m:
-        rec["parties"] = [p.strip(" .,\n") for p in m.groups()]
-    m = re.search(DATE_RX, text, re.IGNORECASE)
-    if m:
-        rec["effective_date"] = m.group(1).strip()
-    m = re.search(LAW_RX, text, re.IGNORECASE)
-    if m:
-        rec["governing_law"] = m.group(1).strip(" .,\n")
-    rec["payment_terms"]      = find_span(text, r"\bpayment\s+terms?\b.{0,500}")
-    rec["termination_clause"] = find_span(text, r"\btermination\b.{0,800}")
-    return rec
-
 def confident(val: Any, min_conf: float, min_len: int) -> bool:
     if val is None:
         return False
@@ -97,101 +164,822 @@ def confident(val: Any, min_conf: float, min_len: int) -> bool:
         return (c >= min_conf) and (L >= min_len)
     return True
 
-# ----- LLM concurrency guard -----
-_cfg = load_cfg()
-_LLM_SEM = threading.Semaphore(int(_cfg.get("llm_concurrency", 3)))
+def source_stamp(txt_path: Path) -> Dict[str, int]:
+    st = txt_path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
 
-def guarded_llm_extract(doc_id: str, field: str, chunk_start: int, chunk_text: str, model_name: str):
-    with _LLM_SEM:
-        return lc_llm_extract_field(doc_id, field, chunk_start, chunk_text, model_name=model_name)
+def write_atomic(path: Path, data: str) -> None:
+    # temp file + rename: an interrupted run never leaves a half-written output
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
 
-# ----- Per-file processing -----
-def process_file(txt_path: Path, schema: Dict[str, Any], cfg: Dict[str, Any]) -> Tuple[str, str]:
-    t0 = time.perf_counter()
+def relocate_value(value: Any, text: str) -> Optional[Any]:
+    """A representative's value if this text contains it verbatim (spans get this doc's offsets)."""
+    if isinstance(value, dict) and value.get("text") and isinstance(value.get("start"), int):
+        at = text.find(value["text"], max(0, value["start"] - 5000))
+        if at == -1:
+            at = text.find(value["text"])
+        if at == -1:
+            return None
+        out = {k: v for k, v in value.items() if k not in ("page", "raw_start", "raw_end")}
+        out.update(start=at, end=at + len(value["text"]))
+        return out
+    if isinstance(value, str) and value and value in text:
+        return value
+    return None
+
+def out_dir(cfg: Dict[str, Any]) -> Path:
+    """Where per-doc outputs go: cfg["out_dir"] (relative to the repo) or outputs/extract."""
+    return ROOT_DIR / cfg["out_dir"] if cfg.get("out_dir") else OUT_DIR
+
+def load_previous(out_path: Path) -> Optional[Dict[str, Any]]:
+    if not out_path.exists():
+        return None
+    try:
+        return json.loads(out_path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+# ----- Per-file processing: prepare (CPU) -> LLM (async) -> finish (CPU) -----
+Excerpt = Tuple[int, str, Optional[Evidence]]
+
+def prompt_excerpts(text: str, chunks: List[Chunk], hints: List[str], cfg: Dict[str, Any]) -> List[Excerpt]:
+    """Chunks as sent to the LLM: whole, or cut to evidence windows ("llm_evidence")."""
+    if not cfg.get("llm_evidence", False):
+        return [(c.start, c.text, None) for c in chunks]
+    cap = evidence_cap(int(cfg.get("llm_evidence_max_chars", 800)), cfg.get("llm_evidence_max_tokens"))
+    radius = int(cfg.get("llm_evidence_radius", 250))
+    out: List[Excerpt] = []
+    for c in chunks:
+        ev = compress(text, c.start, c.end, hints, cap, radius)
+        # several windows joined with GAP: the LLM sees offset 0, answers are mapped back (from_evidence)
+        out.append((ev.segments[0][1], ev.text, None) if ev.contiguous else (0, ev.text, ev))
+    return out
+
+def from_evidence(cand: Optional[dict], ev: Optional[Evidence]) -> Optional[dict]:
+    """Offsets of an answer on compressed text -> GLOBAL offsets (None if nothing is left after clipping)."""
+    if cand and ev is not None:
+        cand = rebase_field(cand, 0, ev.text)   # re-locate the text if the model's offsets are off
+        s, e = ev.clip(cand["start"], cand["end"])
+        if e <= s and cand.get("text"):
+            return None
+        if (s, e) != (cand["start"], cand["end"]):   # ran across a GAP: keep the part in the first window
+            cand["text"] = ev.text[s:e]
+        cand["start"], cand["end"] = ev.span(s, e)
+    return cand
+
+@dataclass
+class DocJob:
+    txt_path: Path
+    schema: Dict[str, Any]
+    text: str
+    out_path: Path
+    text_sha1: str
+    fps: Dict[str, str]
+    todo: List[str]
+    record: Dict[str, Any]
+    provenance: Dict[str, Any]
+    new: Dict[str, Any] = dc_field(default_factory=dict)
+    definitions: Dict[str, str] = dc_field(default_factory=dict)        # LLM fields still missing
+    ranked_by_field: Dict[str, List[Chunk]] = dc_field(default_factory=dict)
+    # what the prompts get: (offset given to the LLM, excerpt text, Evidence if compressed)
+    excerpts: Dict[str, List[Excerpt]] = dc_field(default_factory=dict)
+    batch_excerpts: List[Excerpt] = dc_field(default_factory=list)
+    sections: List[Section] = dc_field(default_factory=list)
+    ner_fields: List[str] = dc_field(default_factory=list)              # waiting for ner_batch
+    dup_of: Optional[Dict[str, Any]] = None                               # {"doc", "similarity"}
+    rep: Dict[str, Any] = dc_field(default_factory=dict)                  # representative's reusable values
+    settled: List[str] = dc_field(default_factory=list)                   # taken as-is from an exact copy
+    fingerprint: str = ""                                                 # text + schema + settings
+    source: Optional[Dict[str, int]] = None                               # .txt size + mtime (None: pack)
+    char_count: int = 0
+    in_pack: bool = False
+    done: bool = False                                                   # nothing to do (all reused)
+    cfg: Dict[str, Any] = dc_field(default_factory=dict)                  # settings with routing overrides
+    category: str = ""                                                    # routing category ("" = not routed)
+    timed_out: List[str] = dc_field(default_factory=list)                 # LLM fields cut off by a deadline
+    llm_done: List[str] = dc_field(default_factory=list)                  # LLM fields whose calls are all back
+
+def read_doc(txt_path: Path, corpus: Optional[CorpusReader] = None) -> Tuple[str, bool]:
+    """(text, from the pack?)"""
+    if corpus is not None and txt_path.name in corpus:
+        return corpus.get(txt_path.name), True
+    return txt_path.read_text(encoding="utf-8", errors="ignore"), False
+
+def route_doc(txt_path: Path, schema: Dict[str, Any], cfg: Dict[str, Any],
+              corpus: Optional[CorpusReader] = None) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """(category, its schema, its settings): folder prefix first, else the title in the doc's head."""
+    routing = load_routing(str(ROOT_DIR / cfg.get("routing_file", "config/routing.json")))
+    category = folder_category(txt_path.name, routing)
+    if category is None:
+        if corpus is not None and txt_path.name in corpus:
+            head = corpus.get(txt_path.name)[:HEAD_CHARS]
+        else:
+            with open(txt_path, encoding="utf-8", errors="ignore") as fh:
+                head = fh.read(HEAD_CHARS)
+        category = title_category(head, routing)
+    return (category, *routed(schema, cfg, category, routing))
+
+def prepare_doc(txt_path: Path, schema: Dict[str, Any], cfg: Dict[str, Any],
+                corpus: Optional[CorpusReader] = None, defer_ner: bool = False,
+                dup_of: Optional[Tuple[str, float]] = None) -> DocJob:
+    """
+    Reuse check, rules, spaCy and chunk ranking: everything before the LLM calls.
+    defer_ner: fields needing spaCy are only listed (job.ner_fields); the caller
+    runs ner_batch and then plan_llm.
+    dup_of: (representative doc id, similarity) when the doc is a near-duplicate
+    of one already extracted (extractor_dedup.py).
+    With "routing", the doc's category picks its own fields and settings (route_doc);
+    job.cfg carries them to plan_llm and llm_stage.
+    """
+    category = ""
+    if cfg.get("routing", False):
+        category, schema, cfg = route_doc(txt_path, schema, cfg, corpus)
+    compiled = compile_schema(schema, float(cfg.get("rule_budget_ms", 50)))
+    specs = compiled.fields
 
-    text = txt_path.read_text(encoding="utf-8", errors="ignore")
-    # Respect config chunk size/overlap
-    chunks = make_chunks(text, size=int(cfg.get("chunk_size", 2000)), overlap=int(cfg.get("chunk_overlap", 150)))
-    record = extract_rules(text)
-    provenance: Dict[str, Any] = {}
+    out_path = out_dir(cfg) / f"{txt_path.stem}.json"
+    rkey = run_key(cfg)
+    prev = load_previous(out_path) if cfg.get("reuse_fields", True) else None
 
-    # spaCy (optional)
+    # Unchanged doc: same source file (size + mtime) and same fingerprint (text + schema +
+    # settings) as the stamped output -> skip without reading or hashing the text
+    in_pack = corpus is not None and txt_path.name in corpus
+    source = None if in_pack else source_stamp(txt_path)
+    if (prev and source is not None and prev.get("_source") == source
+            and prev.get("_fingerprint") == compiled.doc_fingerprint(prev.get("_text_sha1"), rkey)):
+        return DocJob(txt_path=txt_path, schema=schema, text="", out_path=out_path,
+                      text_sha1=prev["_text_sha1"], fps=prev.get("_fields", {}), todo=[], record={}, provenance={},
+                      fingerprint=prev["_fingerprint"], source=source, done=True, cfg=cfg, category=category)
+
+    text, in_pack = read_doc(txt_path, corpus)
+
+    # Per-field reuse: same text + same field fingerprint -> keep the previous value
+    text_sha1 = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    fps = compiled.fingerprints(rkey)
+    if prev and prev.get("_text_sha1") == text_sha1:
+        prev_fps = prev.get("_fields", {})
+        cached = [f for f in specs if prev_fps.get(f) == fps[f] and f in prev]
+    else:
+        prev, cached = None, []
+    todo = [f for f in specs if f not in cached]
+
+    job = DocJob(txt_path=txt_path, schema=schema, text=text, out_path=out_path, text_sha1=text_sha1, fps=fps,
+                 fingerprint=compiled.doc_fingerprint(text_sha1, rkey), source=source,
+                 char_count=len(text), todo=todo, record={f: prev[f] for f in cached}, in_pack=in_pack,
+                 cfg=cfg, category=category,
+                 provenance={f: v for f, v in (prev or {}).get("_provenance", {}).items() if f in cached})
+    if not todo and prev and prev.get("_fingerprint") == job.fingerprint and prev.get("_source") == source:
+        job.done = True
+        return job
+    if not todo:
+        return job
+    new, provenance = job.new, job.provenance
+
+    # Duplicate of an extracted doc: an exact copy takes the representative's values as
+    # they are; a near copy still runs rules/spaCy and plan_llm reuses only the LLM
+    # spans it contains verbatim, so just the fields in differing text go to the LLM
+    if dup_of:
+        job.dup_of = {"doc": dup_of[0], "similarity": dup_of[1]}
+        rep = load_previous(out_dir(cfg) / f"{Path(dup_of[0]).stem}.json") or {}
+        rep_fps = rep.get("_fields", {})
+        job.rep = {f: rep[f] for f in todo if f in rep and rep_fps.get(f) == fps[f]}
+        if rep.get("_text_sha1") == text_sha1:
+            for f, v in job.rep.items():
+                new[f] = v
+                provenance[f] = {"source": "duplicate", "of": dup_of[0]}
+            job.settled = list(job.rep)
+            if len(job.settled) == len(todo):
+                return job
+    open_fields = [f for f in todo if f not in job.settled]
+
+    # Section index: pack meta / sidecar from ingest, else built here
+    sections = corpus.meta(txt_path.name, "sections") if in_pack else None
+    sections = from_json(sections) if sections is not None else load_sections(txt_path)
+    if sections is None:
+        sections = find_sections(text)
+    scanned, rule_stats = compiled.engine.scan(text, sections, fields=open_fields)
+    new.update(scanned)
+    for f in rule_stats["fallback"]:
+        provenance[f] = {"source": "regex", "normalized": True}
+    for f in rule_stats["timed_out"]:
+        provenance[f] = {"source": "regex", "timed_out": True}
+
+    # spaCy (optional): inline here, or left to the batched NER stage (ner_batch)
     if cfg.get("use_spacy", True):
-        if not record.get("parties"):
-            parties = nlp_parties(text)
-            if parties:
-                record["parties"] = parties
-                provenance["parties"] = {"source": "spacy"}
-        if not record.get("governing_law"):
-            gl = nlp_governing_law(text)
-            if gl:
-                record["governing_law"] = gl
-                provenance["governing_law"] = {"source": "spacy"}
-
-    # LLM fallback (optional and throttled)
+        job.ner_fields = [f for f in ("parties", "governing_law") if f in open_fields and not new.get(f)]
+        if job.ner_fields and not defer_ner:
+            if "parties" in job.ner_fields:
+                parties = nlp_parties(text)
+                if parties:
+                    new["parties"] = parties
+                    provenance["parties"] = {"source": "spacy"}
+            if "governing_law" in job.ner_fields:
+                gl = nlp_governing_law(text, use_regex=False)   # the rule engine already ran the regex
+                if gl:
+                    new["governing_law"] = gl
+                    provenance["governing_law"] = {"source": "spacy"}
+            job.ner_fields = []
+    job.sections = sections
+    if job.ner_fields:
+        return job   # plan_llm runs after ner_batch
+    return plan_llm(job, cfg)
+
+def ner_batch(jobs: List[DocJob], cfg: Dict[str, Any]) -> None:
+    """spaCy for many docs at once: one NER pass over each doc head (nlp.pipe), both fields read from it."""
+    docs = ner_heads([job.text for job in jobs], batch_size=int(cfg.get("spacy_batch_size", 32)),
+                     n_process=int(cfg.get("spacy_n_process", 1)))
+    for job, doc in zip(jobs, docs):
+        for field, value in (("parties", parties_from_doc(doc)), ("governing_law", governing_law_from_doc(doc))):
+            if field in job.ner_fields and value:
+                job.new[field] = value
+                job.provenance[field] = {"source": "spacy"}
+        job.ner_fields = []
+
+def plan_llm(job: DocJob, cfg: Dict[str, Any]) -> DocJob:
+    """Chunk ranking and prompt excerpts for the fields still missing (job.definitions)."""
+    compiled = compile_schema(job.schema, float(cfg.get("rule_budget_ms", 50)))
+    specs = compiled.fields
+    text, sections, todo, new = job.text, job.sections, job.todo, job.new
+
+    # LLM fallback (optional): pick the excerpts here, the calls run on the engine
     if cfg.get("use_llm", True):
         topk     = int(cfg.get("llm_top_k_chunks", 1))
         min_conf = float(cfg.get("regex_confidence", 0.6))
         min_len  = int(cfg.get("min_span_len", 20))
-        model    = cfg.get("llm_model", "gpt-4o-mini")
+        chunk_size = int(cfg.get("chunk_size", 2000))
+        ranker   = cfg.get("chunk_ranker", "keyword")   # keyword | bm25
+        chunks = kw_index = bm25_ranked = None
+
+        fields_to_try = [f for f in todo if specs[f].llm and f not in job.settled]
+        missing = [f for f in fields_to_try if not confident(new.get(f), min_conf, min_len)]
+        for f in [f for f in missing if f in job.rep]:
+            reused = relocate_value(job.rep[f], text)
+            if reused is not None:
+                new[f] = reused
+                job.provenance[f] = {"source": "duplicate", "of": job.dup_of["doc"]}
+                missing.remove(f)
 
-        fields_to_try = [
-            f for f in schema.keys()
-            if f in ("parties", "effective_date", "governing_law", "payment_terms", "termination_clause")
-        ]
+        for field in missing:
+            spec = specs[field]
+            # a matching section heading beats keyword ranking over the whole doc
+            ranked = section_chunks(text, sections, field, chunk_size, spec.sections)[:topk]
+            if not ranked:
+                if chunks is None:
+                    # Respect config chunk size/overlap
+                    chunks = make_chunks(text, size=chunk_size, overlap=int(cfg.get("chunk_overlap", 150)),
+                                         boundary=cfg.get("chunk_boundary", "none"),
+                                         section_starts=[sec[0] for sec in sections])
+                    if ranker == "bm25":
+                        # every LLM field scored in one batch
+                        bm25_ranked = ChunkBM25(chunks, text).rank(
+                            {f: specs[f].hints for f in missing if specs[f].hints})
+                    else:
+                        kw_index = KeywordIndex(text, compiled.hints)
+                if bm25_ranked is not None and field in bm25_ranked:
+                    ranked = bm25_ranked[field][:topk]
+                else:
+                    ranked = rank_chunks_for_field(field, chunks, spec.hints, kw_index)[:topk]
+            job.ranked_by_field[field] = ranked
+            job.definitions[field] = spec.llm
+            job.excerpts[field] = prompt_excerpts(text, ranked, spec.hints, cfg)
+        if cfg.get("llm_batch", False) and len(missing) > 1:
+            union = union_excerpts(job.ranked_by_field.values(), int(cfg.get("llm_batch_max_chars", 8000)))
+            job.batch_excerpts = prompt_excerpts(text, union, sorted({h for f in missing for h in specs[f].hints}),
+                                                 cfg)
+    return job
 
-        for field in fields_to_try:
-            v = record.get(field)
-            if confident(v, min_conf, min_len):
+async def llm_stage(job: DocJob, cfg: Dict[str, Any], engine: LLMEngine) -> DocJob:
+    """All LLM calls for one doc, issued concurrently on the engine's loop."""
+    doc_id, model = job.txt_path.name, cfg.get("llm_model", "gpt-4o-mini")
+    missing = list(job.definitions)
+
+    # Batched: one structured call for all missing fields over the union of their excerpts;
+    # per-field calls below only for fields that come back empty
+    if job.batch_excerpts:
+        answers = await engine.extract_fields(doc_id, job.definitions,
+                                              [(s, t) for s, t, _ in job.batch_excerpts], model) or {}
+        answered = set()
+        for field, cand in answers.items():
+            cand = from_evidence(cand, job.batch_excerpts[cand.pop("excerpt") - 1][2])
+            if cand is None:   # nothing left once clipped (e.g. the model echoed a GAP): per-field calls below
                 continue
-            ranked = rank_chunks_for_field(field, chunks)[:topk]
-            best = None
-            for ch in ranked:
-                t_llm0 = time.perf_counter()
-                cand = guarded_llm_extract(txt_path.name, field, ch.start, ch.text, model_name=model)
-                t_llm1 = time.perf_counter()
-                # print(f"[LLM] {field} {txt_path.name} took {t_llm1 - t_llm0:.2f}s")  # optional log
-                if not cand:
-                    continue
-                if cand.get("text"):
-                    if (not best) or (cand.get("confidence", 0) > best.get("confidence", 0)):
-                        best = cand
-            if best:
-                best["source"] = "llm"
-                record[field] = best
-                provenance[field] = {"source": "llm", "confidence": best.get("confidence", 0)}
+            cand["source"] = "llm"
+            job.new[field] = cand
+            job.provenance[field] = {"source": "llm", "confidence": cand.get("confidence", 0), "batched": True}
+            answered.add(field)
+        missing = [f for f in missing if f not in answered]
+        job.llm_done.extend(answered)
+
+    # Per-field fan-out: every (field, chunk) call at once; a field's other calls are
+    # cancelled once a confident answer has every higher-ranked chunk's answer back
+    min_conf = float(cfg.get("regex_confidence", 0.6))
+    min_len = int(cfg.get("min_span_len", 20))
+
+    async def ask(field: str) -> None:
+        # each field lands in job as soon as it is settled, so a deadline cut keeps it
+        best, cancelled = await first_confident(engine, doc_id, field, job.excerpts[field], model,
+                                                job.definitions[field], min_conf, min_len)
+        if best:
+            best["source"] = "llm"
+            job.new[field] = best
+            job.provenance[field] = {"source": "llm", "confidence": best.get("confidence", 0)}
+            if cancelled:
+                job.provenance[field]["cancelled_calls"] = cancelled
+        job.llm_done.append(field)
+
+    await asyncio.gather(*(ask(field) for field in missing))
+    return job
+
+async def llm_stage_until(job: DocJob, cfg: Dict[str, Any], engine: LLMEngine,
+                          run_deadline: Optional[float] = None) -> DocJob:
+    """
+    llm_stage cut off "doc_deadline_s" after it starts on the engine loop (so time queued in
+    the worker pool doesn't count) or at run_deadline (time.perf_counter() value), whichever
+    comes first; neither = no limit. The doc keeps what rules/spaCy produced plus every field
+    whose LLM calls were already back; the fields with calls still out are marked timed_out
+    for a later pass.
+    """
+    deadline = deadline_for(cfg, time.perf_counter(), run_deadline)
+    left = None if deadline is None else deadline - time.perf_counter()
+    if left is None:
+        return await llm_stage(job, cfg, engine)
+    try:
+        if left <= 0:
+            raise asyncio.TimeoutError
+        await asyncio.wait_for(llm_stage(job, cfg, engine), left)   # cancels the doc's calls on expiry
+    except asyncio.TimeoutError:
+        job.timed_out = [f for f in job.definitions if f not in job.llm_done]
+        for f in job.timed_out:
+            job.provenance[f] = {**job.provenance.get(f, {}), "timed_out": True}
+    return job
+
+_PENDING_LOCK = threading.Lock()   # read-modify-write of pending_file (process_file from several threads)
+
+def update_pending(cfg: Dict[str, Any], timed_out: Dict[str, List[str]], done: List[str]) -> Dict[str, List[str]]:
+    """pending_file: {doc id: timed-out fields}; docs in `done` leave the queue, `timed_out` ones join it."""
+    if not cfg.get("pending_file"):
+        return {}
+    path = ROOT_DIR / cfg["pending_file"]
+    with _PENDING_LOCK:
+        pending = load_previous(path) or {}
+        for doc_id in done:
+            pending.pop(doc_id, None)
+        pending.update({d: f for d, f in timed_out.items() if f})
+        if pending or path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, json.dumps(pending, ensure_ascii=False, indent=2))
+    return pending
+
+def run_deadline_at(cfg: Dict[str, Any], run_start: float) -> Optional[float]:
+    """perf_counter time the run's LLM work must end by, None without "run_deadline_s"."""
+    return run_start + float(cfg["run_deadline_s"]) if cfg.get("run_deadline_s") else None
+
+def deadline_for(cfg: Dict[str, Any], stage_start: float, run_deadline: Optional[float] = None) -> Optional[float]:
+    """The earlier of the doc's deadline (from its LLM stage start) and run_deadline, None if neither is set."""
+    ends = [stage_start + float(cfg["doc_deadline_s"])] if cfg.get("doc_deadline_s") else []
+    if run_deadline is not None:
+        ends.append(run_deadline)
+    return min(ends) if ends else None
+
+async def first_confident(engine: LLMEngine, doc_id: str, field: str, excerpts: List[Excerpt], model: str,
+                          definition: Optional[str], min_conf: float, min_len: int) -> Tuple[Optional[dict], int]:
+    """
+    (best answer, calls cancelled). excerpts are in rank order; a confident answer
+    wins once every higher-ranked call is back (the highest-ranked confident one),
+    and the remaining calls are cancelled. Otherwise the highest-confidence
+    non-empty answer once all calls are back (ties to the higher rank).
+    """
+    async def ask(start: int, text: str, ev: Optional[Evidence]) -> Optional[dict]:
+        return from_evidence(await engine.extract_field(doc_id, field, start, text, model, definition), ev)
+
+    def usable(t: "asyncio.Future") -> bool:
+        cand = t.result()
+        return bool(cand and cand.get("text"))
+
+    tasks = [asyncio.ensure_future(ask(*ex)) for ex in excerpts]
+    pending = set(tasks)
+    try:
+        while pending:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in tasks:   # rank order, up to the first call still out
+                if not t.done():
+                    break
+                if usable(t) and confident(t.result(), min_conf, min_len):
+                    return t.result(), sum(p.cancel() for p in pending)
+        cands = [t.result() for t in tasks if usable(t)]
+        return (max(cands, key=lambda c: c.get("confidence", 0)) if cands else None), 0
+    finally:
+        for t in tasks:   # also when this coroutine itself is cancelled
+            t.cancel()
+
+def finish_doc(job: DocJob, corpus: Optional[CorpusReader] = None) -> Tuple[str, str, int, str]:
+    """Page/raw offsets for new values, then the output JSON."""
+    txt_path, new = job.txt_path, job.new
+    if job.done:
+        return txt_path.name, job.out_path.name, 0, job.category
+    if job.todo:
+        # Page numbers (page map) and raw-text offsets (canonical text) for span fields
+        if job.in_pack:
+            page_offsets = corpus.pages(txt_path.name)
+            canon = corpus.meta(txt_path.name, "canon")
+            omap = OffsetMap.from_json(canon) if canon else None
+        else:
+            page_offsets = load_page_offsets(txt_path)
+            omap = load_offset_map(txt_path)
+        for v in new.values():
+            if isinstance(v, dict) and isinstance(v.get("start"), int) and isinstance(v.get("end"), int):
+                if page_offsets:
+                    v["page"] = page_at(page_offsets, v["start"])
+                if omap:
+                    v["raw_start"] = omap.to_raw(v["start"])
+                    v["raw_end"] = omap.to_raw(v["end"])
+        job.record.update(new)
 
     # Output
-    out: Dict[str, Any] = {k: record.get(k) for k in schema.keys()}
+    out: Dict[str, Any] = {k: job.record.get(k) for k in job.schema.keys()}
     out["_doc_id"] = txt_path.name
-    out["_char_count"] = len(text)
-    out["_provenance"] = provenance
+    out["_char_count"] = job.char_count
+    out["_provenance"] = job.provenance
+    out["_text_sha1"] = job.text_sha1
+    # timed-out fields keep no fingerprint (and the doc no stamp), so the next run redoes just them
+    out["_fields"] = {f: fp for f, fp in job.fps.items() if f not in job.timed_out}
+    out["_fingerprint"] = None if job.timed_out else job.fingerprint
+    out["_source"] = job.source
+    out["_duplicate_of"] = job.dup_of
+    out["_category"] = job.category or None
+
+    write_atomic(job.out_path, json.dumps(out, ensure_ascii=False, indent=2))
+    return txt_path.name, job.out_path.name, len(job.todo), job.category
+
+def process_file(txt_path: Path, schema: Dict[str, Any], cfg: Dict[str, Any],
+                 corpus: Optional[CorpusReader] = None) -> Tuple[str, str, int, str]:
+    """
+    One doc end to end, for library callers (run_extractor pipelines the same stages).
+    Returns (doc_id, output name, number of fields extracted (0 = all reused), routing category).
+    With "doc_deadline_s" the LLM stage is cut off that long after it started.
+    """
+    job = prepare_doc(txt_path, schema, cfg, corpus)
+    if job.definitions:
+        get_engine(cfg).run(llm_stage_until(job, job.cfg, get_engine(cfg)))
+    result = finish_doc(job, corpus)
+    update_pending(cfg, {txt_path.name: job.timed_out}, [txt_path.name])
+    return result
+
+# ----- Process-pool workers ("executor": "process") -----
+# Each worker process compiles the rules and loads spaCy once (initializer) and reads
+# texts itself from the memory-mapped pack (or the .txt files): tasks carry only a
+# path, and jobs handed back for the LLM carry their excerpts but not the doc text.
+# All LLM calls stay on the parent's single engine, so its in-flight limit, token
+# budget and rate limit hold for the whole run.
+_W: Dict[str, Any] = {}
+
+def _init_worker(cfg: Dict[str, Any], schema: Dict[str, Any], pack: Optional[str]) -> None:
+    compile_schema(schema, float(cfg.get("rule_budget_ms", 50)))
+    if cfg.get("use_spacy", True):
+        nlp()
+    _W.update(cfg=cfg, schema=schema, corpus=CorpusReader(Path(pack)) if pack else None)
 
-    out_path = OUT_DIR / f"{txt_path.stem}.json"
-    out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+def _worker_prepare(txt_path: Path, dup_of: Optional[Tuple[str, float]] = None) -> Tuple[str, Any]:
+    """("llm", slimmed job) when LLM calls are needed, else ("done", finish_doc result)."""
+    job = prepare_doc(txt_path, _W["schema"], _W["cfg"], _W["corpus"], dup_of=dup_of)
+    if job.definitions:
+        job.text, job.ranked_by_field, job.sections = "", {}, []   # chunks reference the text
+        return "llm", job
+    return "done", finish_doc(job, _W["corpus"])
 
-    t1 = time.perf_counter()
-    # print(f"[DONE] {txt_path.name} in {t1 - t0:.2f}s")  # optional log
-    return txt_path.name, out_path.name
+def _worker_finish(job: DocJob) -> Tuple[str, str, int, str]:
+    return finish_doc(job, _W["corpus"])
 
-# ----- Runner with thread pool -----
-def run_extractor() -> None:
+# ----- Near-duplicates (extractor_dedup.py) -----
+def find_duplicates(txt_files: List[Path], corpus: Optional[CorpusReader], cfg: Dict[str, Any],
+                    workers: int = 8) -> Dict[str, Tuple[str, float]]:
+    """{doc id: (representative, similarity)}; only new or changed docs are (re-)signed."""
+    index = DedupIndex(ROOT_DIR / cfg.get("dedup_index", "outputs/dedup_index.json"),
+                       float(cfg.get("dedup_threshold", 0.8)))
+    stale: List[Tuple[Path, Dict[str, Any]]] = []
+    for p in txt_files:
+        if corpus is not None and p.name in corpus:   # no file stamp: the pack text's hash instead
+            stamp = {"sha1": hashlib.sha1(corpus.get(p.name).encode("utf-8")).hexdigest()}
+        else:
+            try:
+                stamp = source_stamp(p)
+            except OSError:
+                continue   # reported as failed by the run itself
+        if not index.fresh(p.name, stamp):
+            stale.append((p, stamp))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for p, entry in zip([p for p, _ in stale],
+                            ex.map(lambda t: DedupIndex.sign(read_doc(t[0], corpus)[0], t[1]), stale)):
+            index.add(p.name, entry)
+    if index.signed:
+        index.save()
+    dups = index.groups([p.name for p in txt_files])
+    exact = sum(1 for _, sim in dups.values() if sim >= 1.0)
+    print(f"Dedup: {len(dups)} duplicates ({exact} exact) of {len({r for r, _ in dups.values()})} docs; "
+          f"{index.signed} docs (re-)signed")
+    return dups
+
+# ----- Risk triage (extractor_triage.py) -----
+def triage_order(txt_files: List[Path], corpus: Optional[CorpusReader],
+                 workers: int = 8) -> Tuple[List[Path], Dict[str, float]]:
+    """(docs by descending pre-score, {doc id: pre-score}); ties keep file-name order."""
+    t = time.perf_counter()
+    rules = load_rules()
+
+    def score(p: Path) -> float:
+        try:
+            return prescore(read_doc(p, corpus)[0], rules)[0]
+        except OSError:
+            return 0.0   # reported as failed by the run itself
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        scores = dict(zip([p.name for p in txt_files], ex.map(score, txt_files)))
+    ordered = sorted(txt_files, key=lambda p: -scores[p.name])
+    top = ", ".join(f"{p.name} ({scores[p.name]})" for p in ordered[:3])
+    print(f"Triage: scored {len(txt_files)} docs in {time.perf_counter() - t:.1f}s; riskiest first: {top}")
+    return ordered, scores
+
+# ----- Per-category run stats ("routing") -----
+def category_stats(rows: List[Dict[str, Any]], secs: float) -> Dict[str, Dict[str, Any]]:
+    """
+    rows: one {"category", "status", "ms", "llm_fields"} per doc. ms runs from the doc's
+    prepare submit to its output write (queueing included), so it is the latency a doc of
+    that category sees under the run's concurrency.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    for cat in sorted({r["category"] for r in rows}):
+        sub = [r for r in rows if r["category"] == cat]
+        ms = sorted(r["ms"] for r in sub)
+        out[cat] = {
+            "docs": len(sub),
+            **{k: sum(1 for r in sub if r["status"] == k) for k in ("recomputed", "skipped", "failed")},
+            "docs_per_s": round(len(sub) / secs, 2) if secs else None,
+            "mean_ms": round(sum(ms) / len(ms), 1),
+            "p95_ms": round(ms[min(len(ms) - 1, int(0.95 * len(ms)))], 1),
+            "llm_fields": sum(r["llm_fields"] for r in sub),
+        }
+    return out
+
+def print_category_stats(stats: Dict[str, Dict[str, Any]]) -> None:
+    print("| category | docs | recomputed | skipped | failed | docs/s | mean ms | p95 ms | LLM fields |")
+    print("|---|---|---|---|---|---|---|---|---|")
+    for cat, s in stats.items():
+        print(f"| {cat} | {s['docs']} | {s['recomputed']} | {s['skipped']} | {s['failed']} | {s['docs_per_s']} | "
+              f"{s['mean_ms']} | {s['p95_ms']} | {s['llm_fields']} |")
+
+def _resolved(value: Any) -> Future:
+    fut: Future = Future()
+    fut.set_result(value)
+    return fut
+
+# ----- Runner: CPU thread (or process) pool + asyncio LLM engine -----
+def run_extractor(cfg: Optional[Dict[str, Any]] = None, limit: int = 0, verbose: bool = True,
+                  only: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Extract every doc (the first `limit` if set, only the `only` doc ids if given); returns a run summary."""
+    t0 = time.perf_counter()
     schema = load_schema()
-    cfg = load_cfg()
+    cfg = cfg or load_cfg()
+    out_dir(cfg).mkdir(parents=True, exist_ok=True)
 
-    txt_files = sorted(TXT_DIR.glob("*.txt"))
+    # Packed corpus (written by ingest.py with pack_corpus=true): one mmap'd file
+    # instead of opening hundreds of small .txt files
+    corpus: Optional[CorpusReader] = None
+    pack = cfg.get("corpus_pack") or ""
+    if pack and (ROOT_DIR / pack).exists():
+        corpus = CorpusReader(ROOT_DIR / pack)
+        txt_files = [TXT_DIR / doc_id for doc_id in corpus.doc_ids()]
+        print(f"Reading {len(txt_files)} docs from pack {pack}")
+    else:
+        txt_files = sorted(TXT_DIR.glob("*.txt"))
+    if only is not None:
+        wanted = set(only)
+        txt_files = [p for p in txt_files if p.name in wanted]
+    if limit:
+        txt_files = txt_files[:limit]
     if not txt_files:
         raise SystemExit(f"No .txt files found in {TXT_DIR}")
 
-    max_workers = int(cfg.get("max_workers", 8))
-    print(f"Processing {len(txt_files)} docs with {max_workers} workers; LLM concurrency {int(cfg.get('llm_concurrency', 3))}")
+    dup_of = find_duplicates(txt_files, corpus, cfg) if cfg.get("dedup", False) else {}
 
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = [ex.submit(process_file, p, schema, cfg) for p in txt_files]
-        for fut in as_completed(futures):
-            src, dst = fut.result()
-            print(f"✓ Extracted {src} -> {dst}")
+    # Triage: riskiest docs first, partial reports published while the run continues
+    snaps: Optional[Snapshots] = None
+    if cfg.get("triage", False):
+        txt_files, scores = triage_order(txt_files, corpus)
+        if cfg.get("triage_snapshot_dir"):
+            snaps = Snapshots(ROOT_DIR / cfg["triage_snapshot_dir"], out_dir(cfg), len(txt_files), scores,
+                              int(cfg.get("triage_snapshot_every", 25)), float(cfg.get("triage_snapshot_s", 60)))
 
-if __name__ == "__main__":
-    run_extractor()
+    # "executor": "thread" (default; LLM-heavy runs) or "process" (CPU-bound rules/spaCy, e.g. use_llm=false)
+    use_procs = cfg.get("executor", "thread") == "process"
+    if use_procs:
+        max_workers = int(cfg.get("process_workers", 0)) or os.cpu_count() or 1
+    else:
+        max_workers = int(cfg.get("max_workers", 8))
+    backend = cfg.get("llm_backend", "live")
+    print(f"Processing {len(txt_files)} docs with {max_workers} {'processes' if use_procs else 'workers'}; "
+          f"LLM concurrency {int(cfg.get('llm_concurrency', 3))}"
+          + (f"; LLM backend {backend}" if backend != "live" else ""))
 
+    # Workers only do regex/spaCy/ranking and file writes; a doc needing the LLM is
+    # handed to the engine and finished by a worker once its calls come back, so
+    # LLM waits never hold a worker thread.
+    engine: Optional[LLMEngine] = None
+    counts = {"recomputed": 0, "skipped": 0, "failed": 0}
+    started: Dict[str, float] = {}      # doc id -> prepare submit time (for the per-doc ms)
+    run_end = run_deadline_at(cfg, t0)
+    category_of: Dict[str, str] = {}
+    llm_fields: Dict[str, int] = {}
+    timed_out: Dict[str, List[str]] = {}
+    doc_rows: List[Dict[str, Any]] = []
+    try:
+        if use_procs:
+            ex: Any = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                          initargs=(cfg, schema, str(corpus.path) if corpus is not None else None))
+        else:
+            ex = ThreadPoolExecutor(max_workers=max_workers)
+        with ex:
+            # (stage, doc_id, future): "prepared" once prepare_doc is back, "finished" once the
+            # doc is written (or failed); the loop below reacts to both
+            events: "queue.Queue[Tuple[str, str, Future]]" = queue.Queue()
+
+            def finished(doc_id: str, fut: Future) -> None:
+                events.put(("finished", doc_id, fut))
+
+            def fail(doc_id: str, e: BaseException) -> None:   # surface the error in the collecting loop
+                err: Future = Future()
+                err.set_exception(e)
+                finished(doc_id, err)
+
+            def finish(job: DocJob) -> None:
+                fut = ex.submit(_worker_finish, job) if use_procs else ex.submit(finish_doc, job, corpus)
+                fut.add_done_callback(lambda f, doc_id=job.txt_path.name: finished(doc_id, f))
+
+            def after_llm(fut: Future, doc_id: str) -> None:
+                try:
+                    job = fut.result()
+                    timed_out[doc_id] = job.timed_out
+                    finish(job)
+                except BaseException as e:
+                    fail(doc_id, e)
+
+            def dispatch(job: DocJob) -> None:
+                category_of[job.txt_path.name] = job.category
+                llm_fields[job.txt_path.name] = len(job.definitions)
+                if job.definitions and engine is not None:
+                    engine.submit(llm_stage_until(job, job.cfg or cfg, engine, run_end)).add_done_callback(
+                        lambda fut, doc_id=job.txt_path.name: after_llm(fut, doc_id))
+                else:
+                    finish(job)
+
+            def after_plan(fut: Future, doc_id: str) -> None:
+                try:
+                    dispatch(fut.result())
+                except BaseException as e:
+                    fail(doc_id, e)
+
+            def after_ner(fut: Future, jobs: List[DocJob]) -> None:
+                if fut.exception() is not None:
+                    for job in jobs:
+                        fail(job.txt_path.name, fut.exception())
+                    return
+                for job in jobs:
+                    ex.submit(plan_llm, job, job.cfg or cfg).add_done_callback(
+                        lambda f, doc_id=job.txt_path.name: after_plan(f, doc_id))
+
+            def flush_ner(jobs: List[DocJob]) -> None:
+                # on a pool thread, so the collecting loop keeps reacting to events meanwhile
+                batch = list(jobs)
+                jobs.clear()
+                ex.submit(ner_batch, batch, cfg).add_done_callback(lambda fut: after_ner(fut, batch))
+
+            # Batched spaCy: docs needing NER wait here until a batch is full, then one nlp.pipe pass
+            # (process workers run spaCy themselves)
+            batch_ner = bool(cfg.get("use_spacy", True) and cfg.get("spacy_batch", False)) and not use_procs
+            ner_size = int(cfg.get("spacy_batch_size", 32))
+            ner_wait: List[DocJob] = []
+            outstanding = 0   # prepare_doc calls not back yet
+
+            def prepare(p: Path) -> None:
+                nonlocal outstanding
+                dup = dup_of.get(p.name)
+                if use_procs:
+                    fut = ex.submit(_worker_prepare, p, dup)
+                else:
+                    fut = ex.submit(prepare_doc, p, schema, cfg, corpus, batch_ner, dup)
+                outstanding += 1
+                started[p.name] = time.perf_counter()
+                fut.add_done_callback(lambda f, doc_id=p.name: events.put(("prepared", doc_id, f)))
+
+            # Duplicates start once their representative is written, so they can reuse its values
+            in_run = {p.name for p in txt_files}
+            waiting: Dict[str, List[Path]] = {}
+            for p in txt_files:
+                rep = dup_of.get(p.name)
+                if rep and rep[0] in in_run:
+                    waiting.setdefault(rep[0], []).append(p)
+                else:
+                    prepare(p)
+            # after the first submit: forked workers must not inherit the engine's loop thread
+            engine = get_engine(cfg) if cfg.get("use_llm", True) else None
+
+            # A failed doc keeps its previous output (if any); it is recomputed on the next run
+            written = 0
+            while written < len(txt_files):
+                stage, doc_id, fut = events.get()
+                if stage == "prepared":
+                    outstanding -= 1
+                    if fut.exception() is not None:
+                        finished(doc_id, fut)
+                    elif use_procs:
+                        kind, res = fut.result()
+                        if kind == "llm":
+                            dispatch(res)
+                        else:
+                            finished(doc_id, _resolved(res))
+                    else:
+                        job = fut.result()
+                        if job.ner_fields:
+                            ner_wait.append(job)
+                        else:
+                            dispatch(job)
+                    if ner_wait and (len(ner_wait) >= ner_size or outstanding == 0):
+                        flush_ner(ner_wait)
+                    continue
+                written += 1
+                for p in waiting.pop(doc_id, []):
+                    prepare(p)
+                row = {"doc_id": doc_id, "category": category_of.get(doc_id) or "-",
+                       "llm_fields": llm_fields.get(doc_id, 0),
+                       "ms": round((time.perf_counter() - started[doc_id]) * 1000, 1)}
+                doc_rows.append(row)
+                try:
+                    src, dst, n_fields, category = fut.result()
+                except Exception as e:
+                    counts["failed"] += 1
+                    row["status"] = "failed"
+                    print(f"✗ {doc_id}: {type(e).__name__}: {e}")
+                    continue
+                row["category"] = category or "-"
+                row["status"] = "recomputed" if n_fields else "skipped"
+                counts[row["status"]] += 1
+                if n_fields and verbose:
+                    print(f"✓ Extracted {src} -> {dst} ({n_fields} fields" + (f", {category})" if category else ")"))
+                if snaps is not None:
+                    snaps.add(doc_id)
+                    if snaps.due():
+                        snaps.publish()
+            print(f"Run summary: {counts['recomputed']} recomputed, {counts['skipped']} skipped (up to date), "
+                  f"{counts['failed']} failed")
+            late = {d: f for d, f in timed_out.items() if f}
+            pending = update_pending(cfg, late, [r["doc_id"] for r in doc_rows if r["status"] != "failed"])
+            if late:
+                msg = f"⚠️ Deadline hit on {len(late)} docs ({sum(map(len, late.values()))} fields timed out)"
+                if cfg.get("pending_file"):
+                    msg += f"; {len(pending)} docs queued in {cfg['pending_file']} (python extractor.py --pending)"
+                print(msg)
+            if snaps is not None:
+                snaps.publish(final=True)
+                print(f"✓ Triage snapshots ({snaps.count}) -> {cfg['triage_snapshot_dir']}")
+            by_category = category_stats(doc_rows, time.perf_counter() - t0)
+            if cfg.get("routing", False):
+                print_category_stats(by_category)
+            if cfg.get("run_stats_file"):
+                write_atomic(ROOT_DIR / cfg["run_stats_file"], json.dumps(
+                    {"docs": len(txt_files), **counts, "secs": round(time.perf_counter() - t0, 3),
+                     "categories": by_category}, indent=2))
+            if engine is not None and engine.stats["calls"]:
+                m = engine.metrics()
+                print(f"LLM calls: {m['calls']} ({m['retries']} retries, {m['rate_limited']} rate-limited, "
+                      f"{m['timeouts']} timeouts, {m['failed']} failed); in-flight limit {m['limit']}, "
+                      f"max in flight {m['max_in_flight']}, p95 {m['p95_ms']}ms")
+            if engine is not None and engine.cache is not None:
+                c = engine.cache.stats()
+                print(f"LLM cache: {c['hits']} hits, {c['misses']} misses (hit rate {c['hit_rate']}), "
+                      f"{c['rows']} rows, {c['evicted']} evicted")
+    finally:
+        if snaps is not None:   # an interrupted run still ends with a final snapshot
+            snaps.close()
+        if corpus is not None:
+            corpus.close()
+    return {"docs": len(txt_files), **counts, "secs": round(time.perf_counter() - t0, 3),
+            "timed_out": sum(1 for f in timed_out.values() if f),
+            "categories": category_stats(doc_rows, time.perf_counter() - t0),
+            "llm": engine.metrics() if engine is not None else None}
+
+def run_pending(cfg: Optional[Dict[str, Any]] = None, verbose: bool = True) -> Optional[Dict[str, Any]]:
+    """Background pass over pending_file: the queued docs again, without deadlines."""
+    cfg = dict(cfg or load_cfg(), doc_deadline_s=0, run_deadline_s=0)
+    pending = load_previous(ROOT_DIR / cfg.get("pending_file", "outputs/extract_pending.json")) or {}
+    if not pending:
+        print("↷ No pending fields")
+        return None
+    print(f"Pending: {sum(map(len, pending.values()))} fields in {len(pending)} docs")
+    return run_extractor(cfg, verbose=verbose, only=list(pending))
+
+if __name__ == "__main__":
+    if "--pending" in sys.argv[1:]:
+        run_pending()
+    else:
+        run_extractor()
@@ -0,0 +1,110 @@
+"""
+BM25 chunk ranker (alternative to the keyword + fuzzy ranker in extractor_utils)
+- Tokenizes a document's chunks once (stemmed, stopwords dropped) into a
+  sparse term matrix (postings as NumPy arrays: term -> chunk ids + BM25
+  weights), with the chunks themselves as the collection for IDF
+- Multi-word hints also score their adjacent word pairs, counted straight
+  from the token-id stream, so "effective date" outranks a chunk that merely
+  says "effective" a lot
+- Scores every field in one batch: the union of all fields' hint terms is
+  gathered into a small dense (chunks x terms) block and multiplied by a
+  (terms x fields) query matrix
+- Selected with "chunk_ranker": "bm25" in config/extractor.llm.json
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from extractor_utils import Chunk
+
+STOPWORDS = ["a", "an", "and", "as", "at", "be", "by", "for", "in", "is", "it", "of", "on", "or",
+             "the", "this", "to", "with"]
+STEM_CHARS = 6   # crude prefix stemming: terminate / termination / terminated -> "termin"
+# stopwords skipped and words cut to STEM_CHARS inside the regex engine (group 1)
+TOKEN_RX = re.compile(r"\b(?!(?:%s)\b)([a-z0-9]{1,%d})[a-z0-9]*" % ("|".join(STOPWORDS), STEM_CHARS))
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RX.findall(text.lower())
+
+class ChunkBM25:
+    def __init__(self, chunks: Sequence[Chunk], text: str, k1: float = 1.2, b: float = 0.75):
+        self.chunks = list(chunks)
+        self.k1, self.b = k1, b
+        n = self.n = len(self.chunks)
+        self.vocab: Dict[str, int] = {}
+        low = text.lower()
+        if len(low) != len(text):   # keep chunk offsets valid for odd non-ASCII lowercasing
+            low = None
+        rows: List[int] = []
+        cols: List[int] = []
+        vocab = self.vocab
+        for i, c in enumerate(self.chunks):
+            toks = tokenize(c.text) if low is None else TOKEN_RX.findall(low, c.start, c.end)
+            cols.extend([vocab.setdefault(t, len(vocab)) for t in toks])
+            rows.extend([i] * len(toks))
+        # token stream (chunk id, term id) in reading order: bigram counts come from it
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+        V = len(vocab)
+        self.lengths = np.bincount(self.rows, minlength=n).astype(np.float64)
+        self.avgdl = (self.lengths.mean() if n else 0.0) or 1.0
+
+        # unigram term matrix as postings: unique (term, chunk) pairs sorted by term then chunk
+        pairs, tf = np.unique(self.cols * max(n, 1) + self.rows, return_counts=True)
+        term, chunk = pairs // max(n, 1), pairs % max(n, 1)
+        df = np.bincount(term, minlength=V)
+        self.post_w = self._weights(tf, df[term], chunk)
+        self.post_chunk = chunk
+        self.term_ptr = np.concatenate([[0], np.cumsum(df)])
+
+    def _weights(self, tf: np.ndarray, df: np.ndarray, chunk: np.ndarray) -> np.ndarray:
+        idf = np.log1p((self.n - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk] / self.avgdl)
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def _column(self, term: Tuple[str, ...]) -> np.ndarray:
+        """BM25 weight of one query term (unigram or adjacent pair) in every chunk."""
+        out = np.zeros(self.n)
+        if len(term) == 1:
+            tid = self.vocab[term[0]]
+            lo, hi = self.term_ptr[tid], self.term_ptr[tid + 1]
+            out[self.post_chunk[lo:hi]] = self.post_w[lo:hi]
+            return out
+        a, b = self.vocab[term[0]], self.vocab[term[1]]
+        hit = (self.cols[:-1] == a) & (self.cols[1:] == b) & (self.rows[:-1] == self.rows[1:])
+        tf = np.bincount(self.rows[:-1][hit], minlength=self.n)
+        chunk = np.flatnonzero(tf)
+        if chunk.size:
+            out[chunk] = self._weights(tf[chunk].astype(np.float64), np.full(chunk.size, chunk.size), chunk)
+        return out
+
+    def scores(self, queries: Dict[str, List[str]]) -> Dict[str, np.ndarray]:
+        """
+        field -> BM25 score per chunk, for all fields at once. Each hint adds its
+        words and, for multi-word hints, its adjacent word pairs (phrase boost).
+        """
+        fields = list(queries)
+        q_terms: List[List[Tuple[str, ...]]] = []
+        for f in fields:
+            ts: List[Tuple[str, ...]] = []
+            for h in queries[f]:
+                words = tokenize(h)
+                ts += [(w,) for w in words] + list(zip(words, words[1:]))
+            q_terms.append([t for t in ts if all(w in self.vocab for w in t)])
+        terms = sorted({t for ts in q_terms for t in ts})
+        if not terms or not self.n:
+            return {f: np.zeros(self.n) for f in fields}
+        col = {t: j for j, t in enumerate(terms)}
+        M = np.stack([self._column(t) for t in terms], axis=1)    # chunks x terms
+        Q = np.zeros((len(terms), len(fields)))                    # terms x fields
+        for k, ts in enumerate(q_terms):
+            for t in ts:
+                Q[col[t], k] += 1.0
+        S = M @ Q
+        return {f: S[:, k] for k, f in enumerate(fields)}
+
+    def rank(self, queries: Dict[str, List[str]]) -> Dict[str, List[Chunk]]:
+        """field -> chunks best first (ties keep document order)."""
+        return {f: [self.chunks[i] for i in np.argsort(-s, kind="stable")] for f, s in self.scores(queries).items()}
@@ -0,0 +1,143 @@
+"""
+Near-duplicate contracts: MinHash signatures + LSH banding
+- Shingles: word 5-grams of the lowercased text, hashed to 32 bits
+- MinHash: NUM_PERM multiply-shift hash functions ((a*x + b) >> 32 in 64-bit
+  arithmetic), vectorized in numpy
+- LSH: BANDS bands of ROWS rows; docs sharing a band bucket are candidates,
+  kept when the estimated Jaccard similarity >= threshold. Each doc is compared
+  with at most MAX_COMPARE members per bucket, so building the groups costs
+  O(docs x bands), not O(docs^2) (boilerplate-heavy buckets stay bounded)
+- Exact duplicates (same normalized-text hash) are grouped without MinHash
+- Groups via union-find; the representative is the first doc id in sort order
+- The index persists each doc's signature with its .txt size/mtime stamp
+  ("dedup_index"), so a rerun only re-signs new or changed docs
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+NUM_PERM = 128
+BANDS, ROWS = 16, 8          # BANDS * ROWS == NUM_PERM; ~0.7 similarity is a 50% candidate
+SHINGLE = 5                  # words per shingle
+MAX_COMPARE = 32             # bucket members a new doc is checked against
+INDEX_VERSION = 1
+
+_rng = np.random.RandomState(20240607)
+_A = _rng.randint(0, 1 << 62, NUM_PERM, dtype=np.int64).astype(np.uint64) * np.uint64(2) + np.uint64(1)   # odd
+_B = _rng.randint(0, 1 << 62, NUM_PERM, dtype=np.int64).astype(np.uint64)
+WORD_RX = re.compile(r"\w+")
+
+def shingles(text: str, k: int = SHINGLE) -> np.ndarray:
+    """Distinct 32-bit hashes of the doc's word k-grams."""
+    words = np.array([zlib.crc32(w.encode("utf-8")) for w in WORD_RX.findall(text.lower())], dtype=np.uint64)
+    if len(words) < k:
+        return np.unique(words)
+    h = np.zeros(len(words) - k + 1, dtype=np.uint64)
+    for i in range(k):   # polynomial rolling combine, kept in 32 bits
+        h = (h * np.uint64(1000003) + words[i:len(words) - k + 1 + i]) & np.uint64(0xFFFFFFFF)
+    return np.unique(h)
+
+def minhash(text: str) -> np.ndarray:
+    sh = shingles(text)
+    sig = np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint64)
+    for i in range(0, len(sh), 4096):   # bounded memory on long docs
+        block = sh[i:i + 4096]
+        sig = np.minimum(sig, ((_A[:, None] * block[None, :] + _B[:, None]) >> np.uint64(32)).min(axis=1))
+    return sig.astype(np.uint32)
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return float(np.mean(a == b))
+
+def normalized_sha1(text: str) -> str:
+    return hashlib.sha1(" ".join(text.lower().split()).encode("utf-8")).hexdigest()
+
+class DedupIndex:
+    def __init__(self, path: Optional[Path] = None, threshold: float = 0.8):
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.signed = 0
+        if self.path and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if data.get("version") == INDEX_VERSION and data.get("num_perm") == NUM_PERM:
+                    self.docs = data["docs"]
+            except Exception:
+                print(f"⚠️ Unreadable dedup index, rebuilding: {self.path}")
+
+    def fresh(self, doc_id: str, stamp: Optional[Dict[str, Any]]) -> bool:
+        entry = self.docs.get(doc_id)
+        return entry is not None and stamp is not None and entry.get("stamp") == stamp
+
+    @staticmethod
+    def sign(text: str, stamp: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Index entry for one doc (thread-safe: numpy does the heavy part)."""
+        return {"stamp": stamp, "sha1": normalized_sha1(text),
+                "sig": base64.b64encode(minhash(text).tobytes()).decode("ascii")}
+
+    def add(self, doc_id: str, entry: Dict[str, Any]) -> None:
+        self.docs[doc_id] = entry
+        self.signed += 1
+
+    def _sig(self, doc_id: str) -> np.ndarray:
+        return np.frombuffer(base64.b64decode(self.docs[doc_id]["sig"]), dtype=np.uint32)
+
+    def groups(self, doc_ids: List[str]) -> Dict[str, Tuple[str, float]]:
+        """
+        {duplicate doc id: (representative, similarity)} over doc_ids (representatives left out).
+        A doc joins a group only if it clears the threshold against the group's representative
+        (the smallest id), so chains A~B~C never put C under an A it doesn't resemble.
+        """
+        rep_of: Dict[str, str] = {}   # member -> its group's representative
+
+        ids = sorted(d for d in doc_ids if d in self.docs)
+        by_sha: Dict[str, str] = {}
+        buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        sigs: Dict[str, np.ndarray] = {}
+        for doc_id in ids:
+            sha = self.docs[doc_id]["sha1"]
+            if sha in by_sha:   # exact duplicate: no MinHash needed, same group as its first copy
+                rep_of[doc_id] = rep_of.get(by_sha[sha], by_sha[sha])
+                continue
+            by_sha[sha] = doc_id
+            sig = sigs[doc_id] = self._sig(doc_id)
+            tried = set()
+            for b in range(BANDS):
+                members = buckets.setdefault((b, sig[b * ROWS:(b + 1) * ROWS].tobytes()), [])
+                if doc_id not in rep_of:
+                    for other in members[-MAX_COMPARE:]:
+                        rep = rep_of.get(other, other)
+                        if rep in tried:
+                            continue
+                        tried.add(rep)
+                        if similarity(sig, sigs[rep]) >= self.threshold:
+                            rep_of[doc_id] = rep
+                            break
+                members.append(doc_id)
+
+        out: Dict[str, Tuple[str, float]] = {}
+        for doc_id in ids:
+            rep = rep_of.get(doc_id, doc_id)
+            if rep != doc_id:
+                exact = self.docs[doc_id]["sha1"] == self.docs[rep]["sha1"]
+                sim = 1.0 if exact else similarity(self._sig(doc_id), self._sig(rep))
+                out[doc_id] = (rep, round(sim, 3))
+        return out
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "num_perm": NUM_PERM, "docs": self.docs}),
+                       encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,121 @@
+"""
+Evidence windows: prompt compression before the LLM call
+- Cuts an excerpt down to windows around its hint hits, each widened to the
+  nearest sentence boundaries within `radius` chars, merged when they overlap
+- Total size capped ("llm_evidence_max_chars", or "llm_evidence_max_tokens"
+  x 4 chars): windows with the most hint hits are kept first
+- An excerpt already under the cap is sent whole; one without any hint hit
+  keeps its head
+- Kept windows are joined with GAP; Evidence remembers where each window came
+  from, so a span found in the compressed text maps back to GLOBAL offsets
+  (cut at the end of its window rather than running across a GAP)
+"""
+
+from bisect import bisect_right
+from typing import List, Optional, Sequence, Tuple
+
+from extractor_utils import SENTENCE_END_RX, _cut_point, _word_start
+
+GAP = "\n[...]\n"
+CHARS_PER_TOKEN = 4
+
+class Evidence:
+    """Compressed excerpt: text plus (evidence offset, global offset, length) per window."""
+    __slots__ = ("text", "segments")
+
+    def __init__(self, text: str, segments: List[Tuple[int, int, int]]):
+        self.text = text
+        self.segments = segments
+
+    def to_global(self, pos: int) -> int:
+        """Global offset of evidence offset pos (a position inside GAP snaps to the window before)."""
+        k = max(0, bisect_right([s[0] for s in self.segments], pos) - 1)
+        ev, g, n = self.segments[k]
+        return g + min(max(0, pos - ev), n)
+
+    def clip(self, start: int, end: int) -> Tuple[int, int]:
+        """Evidence (start, end) cut to the window holding start (the next one if start is in a GAP),
+        so a span never runs across a GAP into text that was left out."""
+        k = max(0, bisect_right([s[0] for s in self.segments], start) - 1)
+        ev, _, n = self.segments[k]
+        if start >= ev + n and k + 1 < len(self.segments):
+            ev, _, n = self.segments[k + 1]
+        s = min(max(start, ev), ev + n)
+        return s, min(max(end, s), ev + n)
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        """Global (start, end) of an evidence span, clipped like clip()."""
+        s, e = self.clip(start, end)
+        g = self.to_global(s)
+        return g, g + (e - s)
+
+    @property
+    def contiguous(self) -> bool:
+        """One window: plain text at global offset segments[0][1], no mapping needed."""
+        return len(self.segments) == 1
+
+def _window(text: str, lo: int, hi: int, p: int, q: int, radius: int) -> Tuple[int, int]:
+    """[p, q) widened to sentence boundaries (else word boundaries) within radius, inside [lo, hi)."""
+    a = max(lo, p - radius)
+    last = None
+    for m in SENTENCE_END_RX.finditer(text, a, p):
+        last = m
+    s = last.end() if last is not None else _word_start(text, a, p)
+    e = _cut_point(text, q, min(hi, q + radius), "sentence", []) if q < hi else hi
+    return s, max(e, q)
+
+def windows(text: str, lo: int, hi: int, hints: Sequence[str], radius: int = 250) -> List[Tuple[int, int, int]]:
+    """Merged (start, end, hint hits) windows around every hint occurrence in text[lo:hi]."""
+    low = text[lo:hi].lower()
+    hits: List[Tuple[int, int]] = []
+    for h in {h.lower() for h in hints if h}:
+        i = low.find(h)
+        while i != -1:
+            hits.append((lo + i, lo + i + len(h)))
+            i = low.find(h, i + 1)
+    out: List[List[int]] = []
+    for p, q in sorted(hits):
+        s, e = _window(text, lo, hi, p, q, radius)
+        if out and s <= out[-1][1]:
+            out[-1][1] = max(out[-1][1], e)
+            out[-1][2] += 1
+        else:
+            out.append([s, e, 1])
+    return [tuple(w) for w in out]
+
+def compress(text: str, lo: int, hi: int, hints: Sequence[str], max_chars: int = 800,
+             radius: int = 250) -> Evidence:
+    """Evidence for the excerpt text[lo:hi] under max_chars (GAP separators included)."""
+    if hi - lo <= max_chars:
+        return Evidence(text[lo:hi], [(0, lo, hi - lo)])
+    wins = windows(text, lo, hi, hints, radius)
+    if not wins:
+        e = _cut_point(text, lo + max_chars // 2, lo + max_chars, "sentence", [])
+        return Evidence(text[lo:e], [(0, lo, e - lo)])
+    kept: List[Tuple[int, int]] = []
+    total = 0
+    for s, e, _ in sorted(wins, key=lambda w: (-w[2], w[0])):   # most hint hits first
+        room = max_chars - total - (len(GAP) if kept else 0)
+        if room <= 0:
+            break
+        if e - s > room:
+            if kept and room < radius:   # too little left for a useful window
+                continue
+            e = s + room
+        kept.append((s, e))
+        total += e - s + (len(GAP) if len(kept) > 1 else 0)
+    kept.sort()
+    parts: List[str] = []
+    segments: List[Tuple[int, int, int]] = []
+    pos = 0
+    for s, e in kept:
+        if parts:
+            parts.append(GAP)
+            pos += len(GAP)
+        segments.append((pos, s, e - s))
+        parts.append(text[s:e])
+        pos += e - s
+    return Evidence("".join(parts), segments)
+
+def evidence_cap(max_chars: int, max_tokens: Optional[int] = None) -> int:
+    return min(max_chars, max_tokens * CHARS_PER_TOKEN) if max_tokens else max_chars
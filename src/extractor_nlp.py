@@ -1,20 +1,46 @@
-from typing import List, Optional
+"""
+spaCy fallbacks for parties (ORG/PERSON) and governing law (GPE/LOC)
+- Per-call path: nlp_parties / nlp_governing_law run the full pipeline on one doc
+- Batch path: ner_heads() runs NER once per doc head (the first NER_HEAD chars,
+  enough for both fields) over many docs with nlp.pipe, on a trimmed pipeline
+  (tagger/parser/lemmatizer excluded) and optionally several processes;
+  parties_from_doc / governing_law_from_doc read the same Doc
+"""
+
+from typing import List, Optional, Sequence
 import re, spacy
 
+SPACY_MODEL = "en_core_web_sm"
+PARTIES_HEAD = 3000   # parties usually up front
+NER_HEAD = 4000       # one head serves both fields
+NER_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter", "morphologizer"]
+
 _nlp = None
 def nlp():
     global _nlp
     if _nlp is None:
-        _nlp = spacy.load("en_core_web_sm")
+        _nlp = spacy.load(SPACY_MODEL)
     return _nlp
 
+_ner = {}
+def nlp_ner(model: Optional[str] = None):
+    """NER-only pipeline: tok2vec is kept only if the ner component listens to it."""
+    model = model or SPACY_MODEL
+    if model not in _ner:
+        ner = spacy.load(model, exclude=NER_EXCLUDE)
+        if "tok2vec" in ner.pipe_names and "ner" not in ner.get_pipe("tok2vec").listening_components:
+            ner.remove_pipe("tok2vec")
+        _ner[model] = ner
+    return _ner[model]
+
 US_STATES = {"Delaware","California","New York","Texas","Florida","Washington","Massachusetts","Illinois","Georgia","Virginia"}
 COUNTRIES = {"United States","Singapore","India","United Kingdom","Canada","Germany","France"}
 
-def nlp_parties(text: str) -> Optional[List[str]]:
-    # Limit to the first 3000 chars (faster; parties usually up front)
-    doc = nlp()(text[:3000])
-    orgs = [ent.text.strip() for ent in doc.ents if ent.label_ in ("ORG","PERSON")]
+def parties_from_doc(doc, head: int = PARTIES_HEAD) -> Optional[List[str]]:
+    # On a NER_HEAD Doc (batch path) entities ending past `head` are dropped, while NER on a
+    # PARTIES_HEAD-char text (per-call path) keeps a cut-off one; predictions near the cut may
+    # also shift with the longer context
+    orgs = [ent.text.strip() for ent in doc.ents if ent.label_ in ("ORG","PERSON") and ent.end_char <= head]
     uniq = []
     for x in orgs:
         if len(x) < 3:
@@ -23,8 +49,18 @@ def nlp_parties(text: str) -> Optional[List[str]]:
             uniq.append(x)
     return uniq[:4] or None
 
-def nlp_governing_law(text: str) -> Optional[str]:
-    M = re.search(r"governed\s+by\s+the\s+laws?\s+of\s+([A-Za-z ,]+)", text, re.IGNORECASE)
+def governing_law_from_doc(doc) -> Optional[str]:
+    for ent in doc.ents:
+        if ent.label_ in ("GPE","LOC") and ent.text in (US_STATES | COUNTRIES):
+            return ent.text
+    return None
+
+def nlp_parties(text: str) -> Optional[List[str]]:
+    # Limit to the first 3000 chars (faster; parties usually up front)
+    return parties_from_doc(nlp()(text[:PARTIES_HEAD]))
+
+def nlp_governing_law(text: str, use_regex: bool = True) -> Optional[str]:
+    M = re.search(r"governed\s+by\s+the\s+laws?\s+of\s+([A-Za-z ,]+)", text, re.IGNORECASE) if use_regex else None
     if M:
         cand = M.group(1).strip(" .,\n")
         for s in sorted(US_STATES | COUNTRIES, key=len, reverse=True):
@@ -32,8 +68,9 @@ def nlp_governing_law(text: str) -> Optional[str]:
                 return s
         return cand
     # fallback: NER (scan is cheap; small model)
-    doc = nlp()(text[:4000])
-    for ent in doc.ents:
-        if ent.label_ in ("GPE","LOC") and ent.text in (US_STATES | COUNTRIES):
-            return ent.text
-    return None
+    return governing_law_from_doc(nlp()(text[:NER_HEAD]))
+
+def ner_heads(texts: Sequence[str], batch_size: int = 32, n_process: int = 1,
+              model: Optional[str] = None) -> list:
+    """One NER Doc per text head, in order (nlp.pipe; n_process > 1 forks worker processes)."""
+    return list(nlp_ner(model).pipe((t[:NER_HEAD] for t in texts), batch_size=batch_size, n_process=n_process))
@@ -0,0 +1,73 @@
+"""
+Document-type routing (config/routing.json)
+- Category from the ingest file name: flat_name() keeps the folders, so
+  Part_I__Franchise__x.txt -> "franchise" and License_Agreements__x.txt ->
+  "license" (folder names matched after lowercasing, "_agreement(s)" dropped)
+- Otherwise a cheap title classifier: the category phrase found earliest in
+  the doc's first HEAD_CHARS ("franchise agreement", "hosting agreement", ...)
+- Otherwise "default"
+- Each category maps to a field set (schema.json fields plus category-only
+  "extra_fields"), the fields allowed to fall back to the LLM ("llm_fields",
+  default all) and settings overrides such as llm_top_k_chunks ("settings")
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+HEAD_CHARS = 1500
+PART_RX = re.compile(r"^Part_[IVX]+$")
+
+@lru_cache(maxsize=4)
+def load_routing(path: str) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+def _norm(folder: str) -> str:
+    key = re.sub(r"[^a-z0-9]+", "_", folder.lower()).strip("_")
+    return re.sub(r"_agreements?$", "", key)
+
+def folder_key(doc_id: str) -> Optional[str]:
+    """Normalized category folder of an ingest file name, if it has one."""
+    parts = doc_id.split("__")
+    while parts and PART_RX.match(parts[0]):
+        parts = parts[1:]
+    return _norm(parts[0]) if len(parts) > 1 else None
+
+def folder_category(doc_id: str, routing: Dict[str, Any]) -> Optional[str]:
+    key = folder_key(doc_id)
+    if key:
+        for name, cat in routing.get("categories", {}).items():
+            if key in cat.get("folders", []):
+                return name
+    return None
+
+def title_category(head: str, routing: Dict[str, Any]) -> str:
+    """The category whose title phrase appears earliest in the head ("default" if none)."""
+    low = head[:HEAD_CHARS].lower()
+    best: Optional[Tuple[int, str]] = None
+    for name, cat in routing.get("categories", {}).items():
+        for phrase in cat.get("titles", []):
+            at = low.find(phrase)
+            if at != -1 and (best is None or at < best[0]):
+                best = (at, name)
+    return best[1] if best else "default"
+
+def routed(schema: Dict[str, Any], cfg: Dict[str, Any], category: str,
+           routing: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(schema, cfg) for one category: its fields, LLM fallback only where allowed, overrides applied."""
+    cat = routing.get("categories", {}).get(category) or routing.get("default", {})
+    extra = routing.get("extra_fields", {})
+    names = cat.get("fields") or list(schema)
+    llm_fields = cat.get("llm_fields")
+    out: Dict[str, Any] = {}
+    for name in names:
+        decl = schema.get(name, extra.get(name))
+        if decl is None:
+            raise KeyError(f"Routing category '{category}' lists unknown field '{name}'")
+        decl = dict(decl) if isinstance(decl, dict) else {"type": decl}
+        if llm_fields is not None and name not in llm_fields:
+            decl["llm"] = None   # rules/spaCy only for this category
+        out[name] = decl
+    return out, dict(cfg, **cat.get("settings", {}))
@@ -0,0 +1,200 @@
+"""
+Compiled rule engine for the extractor's rule pass
+- Every field pattern is compiled once, at import
+- Candidates come from literal anchor keywords ("between", "governed", ...)
+  located with str.find on one lowercased copy of the text (no regex engine
+  walking every position); the full field pattern is then matched *at* the
+  anchor inside a bounded window, so a lazy .*? can never wander to the end
+  of a 100-page contract
+- Per-pattern time budget: a field's anchored attempts are timed and a field
+  that spends its budget on one document is abandoned (reported in stats)
+- Section-bounded lookups (extractor_sections.py) run before the full scan; a
+  section matched by heading alone is only a low-confidence candidate
+- A looser fallback pattern can be tried at the same anchor (used for the
+  governing-law state/country normalization extractor_nlp used to redo)
+"""
+
+import re
+import time
+from dataclasses import dataclass, field as dc_field
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from extractor_sections import Section, SECTION_KEYWORDS, sections_for
+from extractor_nlp import US_STATES, COUNTRIES
+
+FLAGS = re.IGNORECASE | re.DOTALL | re.MULTILINE
+SPAN_CONFIDENCE = 0.72
+# a section picked by heading alone (pattern not found in it) stays a candidate but sits
+# below the default regex_confidence (0.6), so the LLM still runs for that field
+SECTION_CONFIDENCE = 0.5
+
+def span_value(text: str, s: int, e: int, confidence: float, source: str) -> Dict[str, Any]:
+    """Span dict over text[s:e] with surrounding whitespace trimmed from the offsets, so text == doc[start:end]."""
+    while s < e and text[s].isspace():
+        s += 1
+    while e > s and text[e - 1].isspace():
+        e -= 1
+    return {"text": text[s:e], "start": s, "end": e, "confidence": confidence, "source": source}
+
+@dataclass
+class FieldRule:
+    field: str
+    keywords: List[str]                # lowercase literal anchors; the pattern starts at one
+    pattern: str                       # full pattern, matched at the anchor
+    kind: str = "text"                 # text (group 1) | list (all groups) | span
+    window: int = 400                  # max chars the pattern may consume from the anchor
+    span_window: int = 600             # span kind: min chars returned from the anchor
+    fallback: Optional[str] = None     # looser pattern tried at the same anchor
+    normalize: List[str] = dc_field(default_factory=list)  # fallback value -> first vocabulary hit
+    section_keywords: List[str] = dc_field(default_factory=list)
+
+    def __post_init__(self):
+        self.keywords = [k.lower() for k in self.keywords]
+        # only used when lowercasing changes the text length (rare non-ASCII)
+        self.trigger_rx = re.compile("|".join(re.escape(k) for k in self.keywords), FLAGS)
+        self.rx = re.compile(self.pattern, FLAGS)
+        self.fallback_rx = re.compile(self.fallback, FLAGS) if self.fallback else None
+        self.vocab = sorted(self.normalize, key=len, reverse=True)
+
+US_PLACES = sorted(US_STATES | COUNTRIES)
+
+DEFAULT_RULES: List[FieldRule] = [
+    FieldRule("parties", ["between"], r"\bbetween\s+(.*?)\s+and\s+(.*?)(?:[,.\n]|$)",
+              kind="list", window=1200),
+    FieldRule("effective_date", ["effective", "commencement"],
+              r"(?:effective|commencement)\s*date[:\s]*([A-Za-z]{3,9}\s+\d{1,2},\s+\d{4}|\d{1,2}/\d{1,2}/\d{2,4})",
+              window=120),
+    FieldRule("governing_law", ["governed"],
+              r"governed\s+by\s+the\s+laws?\s+of\s+([A-Za-z\s,]+?)(?:[,.\n]|$)", window=300,
+              fallback=r"governed\s+by\s+the\s+laws?\s+of\s+([A-Za-z ,]+)", normalize=US_PLACES,
+              section_keywords=SECTION_KEYWORDS["governing_law"]),
+    FieldRule("payment_terms", ["payment"], r"\bpayment\s+terms?\b.{0,500}",
+              kind="span", window=600, section_keywords=SECTION_KEYWORDS["payment_terms"]),
+    FieldRule("termination_clause", ["termination"], r"\btermination\b.{0,800}",
+              kind="span", window=900, section_keywords=SECTION_KEYWORDS["termination_clause"]),
+]
+
+class RuleEngine:
+    def __init__(self, rules: List[FieldRule], budget_ms: float = 50.0):
+        self.rules = rules
+        self.budget = budget_ms / 1000.0
+
+    # ----- anchors -----
+    @staticmethod
+    def _anchors(rule: FieldRule, text: str, low: Optional[str], start: int, end: int) -> Iterator[int]:
+        """Positions of the rule's keywords in [start, end), ascending."""
+        if low is None:
+            for m in rule.trigger_rx.finditer(text, start, end):
+                yield m.start()
+            return
+        nxt = {k: low.find(k, start, end) for k in rule.keywords}
+        while True:
+            live = [(i, k) for k, i in nxt.items() if i != -1]
+            if not live:
+                return
+            i, k = min(live)
+            yield i
+            nxt[k] = low.find(k, i + 1, end)
+
+    # ----- one anchored attempt -----
+    def _value(self, rule: FieldRule, text: str, m: "re.Match") -> Any:
+        if rule.kind == "list":
+            return [g.strip(" .,\n") for g in m.groups()]
+        if rule.kind == "span":
+            s = m.start()
+            e = min(len(text), max(m.end(), s + rule.span_window))
+            return span_value(text, s, e, SPAN_CONFIDENCE, "regex")
+        return m.group(1).strip(" .,\n")
+
+    def _normalized(self, rule: FieldRule, m: "re.Match") -> str:
+        cand = m.group(1).strip(" .,\n")
+        low = cand.lower()
+        return next((v for v in rule.vocab if v.lower() in low), cand)
+
+    def _try(self, rule: FieldRule, text: str, pos: int, limit: int,
+             spent: Dict[str, float]) -> Tuple[Optional[Any], Optional[Any]]:
+        """(value, fallback_value) for an anchor at pos; the pattern may not run past limit."""
+        endpos = min(limit, pos + rule.window)
+        t0 = time.perf_counter()
+        m = rule.rx.match(text, pos, endpos)
+        # a match pinned to the window edge would have been cut short: not a match
+        if m and m.end() == endpos < len(text):
+            m = None
+        fb = None
+        if not m and rule.fallback_rx:
+            f = rule.fallback_rx.match(text, pos, endpos)
+            if f:
+                fb = self._normalized(rule, f)
+        spent[rule.field] = spent.get(rule.field, 0.0) + time.perf_counter() - t0
+        return (self._value(rule, text, m) if m else None), fb
+
+    # ----- scanning -----
+    def _scan_range(self, rule: FieldRule, text: str, low: Optional[str], start: int, end: int,
+                    spent: Dict[str, float]) -> Tuple[Optional[Any], Optional[Any]]:
+        """First value in [start, end) (+ the first fallback value seen before it)."""
+        fallback = None
+        for pos in self._anchors(rule, text, low, start, end):
+            if spent.get(rule.field, 0.0) > self.budget:
+                break
+            val, fb = self._try(rule, text, pos, end, spent)
+            if val is not None:
+                return val, fallback
+            fallback = fallback or fb
+        return None, fallback
+
+    def scan(self, text: str, sections: Optional[List[Section]] = None,
+             fields: Optional[List[str]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Returns (record, stats). stats = {"timed_out": [fields over budget],
+        "fallback": [fields filled by a fallback pattern], "ms": {field: ms}}.
+        """
+        rules = [r for r in self.rules if fields is None or r.field in fields]
+        rec: Dict[str, Any] = {}
+        fallbacks: Dict[str, Any] = {}
+        spent: Dict[str, float] = {}
+        low = text.lower()
+        if len(low) != len(text):
+            low = None
+
+        # 1) sections whose heading names the field
+        by_heading: Dict[str, Any] = {}
+        for rule in rules:
+            for s, e, _, num, title in sections_for(sections or [], rule.section_keywords):
+                val, fb = self._scan_range(rule, text, low, s, e, spent)
+                if val is None and rule.kind == "span" and rule.field not in by_heading:
+                    # the pattern isn't in there: the section itself may be the clause
+                    by_heading[rule.field] = dict(span_value(text, s, min(e, s + rule.span_window),
+                                                             SECTION_CONFIDENCE, "section"),
+                                                  section=f"{num} {title}")
+                if val is not None:
+                    if isinstance(val, dict):
+                        val["section"] = f"{num} {title}"
+                    rec[rule.field] = val
+                    break
+                if fb is not None:
+                    fallbacks.setdefault(rule.field, fb)
+
+        # 2) full text for everything still missing; a pattern match anywhere beats a heading-only section
+        for rule in rules:
+            if rule.field in rec:
+                continue
+            val, fb = self._scan_range(rule, text, low, 0, len(text), spent)
+            if val is not None:
+                rec[rule.field] = val
+            elif rule.field in by_heading:
+                rec[rule.field] = by_heading[rule.field]
+            elif fb is not None:
+                fallbacks.setdefault(rule.field, fb)
+
+        used_fb = []
+        for f, v in fallbacks.items():
+            if f not in rec:
+                rec[f] = v
+                used_fb.append(f)
+        for r in rules:
+            if r.kind == "span":
+                rec.setdefault(r.field, None)
+        timed_out = [f for f, sec in spent.items() if sec > self.budget and rec.get(f) is None]
+        stats = {"timed_out": timed_out, "fallback": used_fb,
+                 "ms": {f: round(s * 1000, 3) for f, s in spent.items()}}
+        return rec, stats
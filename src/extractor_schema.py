@@ -0,0 +1,109 @@
+"""
+Schema-driven field extractors
+- config/schema.json declares, per field:
+    "rule":     one extractor_rules.FieldRule (keywords, pattern, kind, window, ...)
+    "sections": heading keywords for the section index (extractor_sections.py)
+    "hints":    keywords for chunk ranking before the LLM call
+    "llm":      the field definition put into the LLM prompt
+- Fields without these keys fall back to the built-in defaults, so the old
+  {"type", "required"}-only schema still works
+- compile_schema() builds one RuleEngine + per-field specs and caches them,
+  and gives every field a fingerprint of its definition: the extractor
+  re-runs only fields whose fingerprint changed since the last output
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, asdict, field as dc_field
+from typing import Dict, Any, List, Optional
+
+from extractor_rules import FieldRule, RuleEngine, DEFAULT_RULES
+from extractor_sections import SECTION_KEYWORDS
+from extractor_utils import FIELD_HINTS
+from lc_extractor import DEFINITIONS
+
+RULE_DEFAULTS: Dict[str, FieldRule] = {r.field: r for r in DEFAULT_RULES}
+
+def _sha1(obj: Any) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+@dataclass
+class FieldSpec:
+    name: str
+    type: str = "text"
+    required: bool = False
+    rule: Optional[FieldRule] = None
+    sections: List[str] = dc_field(default_factory=list)
+    hints: List[str] = dc_field(default_factory=list)
+    llm: Optional[str] = None          # definition; None = no LLM fallback for this field
+    fingerprint: str = ""
+
+    def describe(self) -> Dict[str, Any]:
+        """Everything that can change this field's value (hashed into the fingerprint)."""
+        rule = asdict(self.rule) if self.rule else None
+        if rule:
+            rule.pop("section_keywords", None)   # same as self.sections
+        return {"type": self.type, "rule": rule, "sections": self.sections,
+                "hints": self.hints, "llm": self.llm}
+
+def _field_spec(name: str, decl: Dict[str, Any]) -> FieldSpec:
+    sections = decl.get("sections", SECTION_KEYWORDS.get(name, []))
+    if "rule" in decl:
+        rule = FieldRule(name, section_keywords=sections, **decl["rule"]) if decl["rule"] else None
+    elif name in RULE_DEFAULTS:
+        d = asdict(RULE_DEFAULTS[name])
+        d.update(section_keywords=sections)
+        rule = FieldRule(**d)
+    else:
+        rule = None
+    spec = FieldSpec(
+        name=name,
+        type=decl.get("type", "text"),
+        required=bool(decl.get("required", False)),
+        rule=rule,
+        sections=sections,
+        hints=decl.get("hints", FIELD_HINTS.get(name, [])),
+        llm=decl.get("llm", DEFINITIONS.get(name)),
+    )
+    spec.fingerprint = _sha1(spec.describe())
+    return spec
+
+class CompiledSchema:
+    def __init__(self, schema: Dict[str, Any], budget_ms: float = 50.0):
+        self.fields: Dict[str, FieldSpec] = {
+            name: _field_spec(name, decl if isinstance(decl, dict) else {"type": decl})
+            for name, decl in schema.items()
+        }
+        self.engine = RuleEngine([s.rule for s in self.fields.values() if s.rule], budget_ms=budget_ms)
+        # every field's ranking hints, for one shared KeywordIndex per document
+        self.hints: List[str] = sorted({h.lower() for s in self.fields.values() for h in s.hints})
+        self.schema_sha1 = _sha1(schema)
+
+    def fingerprints(self, run_key: str = "") -> Dict[str, str]:
+        """Per-field fingerprint; run_key folds in extractor settings (model, thresholds, ...)."""
+        return {n: _sha1([s.fingerprint, run_key]) for n, s in self.fields.items()}
+
+    def doc_fingerprint(self, text_sha1: Optional[str], run_key: str = "") -> str:
+        """Whole-output stamp: source text + config/schema.json + the RUN_KEYS settings."""
+        return _sha1([text_sha1, self.schema_sha1, run_key])
+
+_CACHE: Dict[str, CompiledSchema] = {}
+
+def compile_schema(schema: Dict[str, Any], budget_ms: float = 50.0) -> CompiledSchema:
+    """Compile once per distinct schema (prepare_doc calls this per document)."""
+    key = _sha1([schema, budget_ms])
+    if key not in _CACHE:
+        _CACHE[key] = CompiledSchema(schema, budget_ms)
+    return _CACHE[key]
+
+# extractor.llm.json keys that change extracted values
+RUN_KEYS = ["use_spacy", "use_llm", "llm_model", "llm_top_k_chunks", "regex_confidence",
+            "min_span_len", "chunk_size", "chunk_overlap", "chunk_ranker",
+            "chunk_boundary", "llm_batch", "llm_batch_max_chars", "llm_base_url",
+            "llm_backend", "llm_evidence", "llm_evidence_max_chars", "llm_evidence_max_tokens",
+            "llm_evidence_radius", "dedup", "dedup_threshold",
+            # batched NER reads parties / governing law from a trimmed head, not two full passes
+            "spacy_batch", "spacy_batch_size", "spacy_n_process"]
+
+def run_key(cfg: Dict[str, Any]) -> str:
+    return _sha1({k: cfg.get(k) for k in RUN_KEYS})
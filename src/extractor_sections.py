@@ -0,0 +1,132 @@
+"""
+Section / heading index
+- One pass over a document finds numbered headings:
+    "12. Governing Law", "18.0 TERM AND TERMINATION", "ARTICLE X TERMINATION",
+    "SECTION 5 PAYMENT"
+- Each heading becomes a section [start, end) running to the next heading of
+  the same or higher level
+- Field extractors look up the sections whose title matches the field and
+  scan only those, falling back to a full-document scan when none match
+
+Index format (JSON sidecar <stem>.sections.json, also stored in the pack):
+  [[start, end, level, number, title], ...]
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from extractor_utils import Chunk
+
+Section = Tuple[int, int, int, str, str]   # start, end, level, number, title
+
+# ARTICLE IV TERMINATION / SECTION 12: GOVERNING LAW / Article 3. Term and Termination
+KEYWORD_RX = re.compile(
+    r"(?:^|(?<=[\n.:;\]\)]))[ \t]*"
+    r"(?P<kw>ARTICLE|Article|SECTION|Section)\s+(?P<num>\d{1,3}(?:\.\d{1,3})*|[IVXLC]{1,6})\b[.:]?[ \t]*[-–—]?[ \t]*"
+    r"(?P<title>[A-Z][A-Za-z,&/' ()-]{2,80}?)"
+    r"(?=[.:\n]|\s{2,}|\d|$)"
+)
+# 12. Governing Law. / 18.0 TERM AND TERMINATION. / 7.4 Communication of Termination
+NUMBERED_RX = re.compile(
+    r"(?:^|(?<=[\n.:;\]\)]))[ \t]*"
+    r"(?P<num>\d{1,2}(?:\.\d{1,2}){0,2})\.?[ \t]*"
+    r"(?P<title>[A-Z][A-Za-z,&/' -]{2,60}?)"
+    r"(?=[.:\n]|\s{2,}|$)"
+)
+
+SMALL_WORDS = {"and", "or", "of", "the", "to", "for", "in", "on", "a", "an", "by", "with", "as", "upon"}
+MAX_TITLE_WORDS = 8
+
+def _looks_like_title(title: str) -> bool:
+    words = title.split()
+    if not words or len(words) > MAX_TITLE_WORDS:
+        return False
+    # Title Case or UPPER CASE: every non-small word starts with a capital
+    return all(w[0].isupper() or w.lower() in SMALL_WORDS or not w[0].isalpha() for w in words)
+
+def _roman_level(num: str) -> bool:
+    return bool(re.fullmatch(r"[IVXLC]+", num))
+
+def find_sections(text: str) -> List[Section]:
+    """Detect headings and return sections sorted by start offset."""
+    heads: Dict[int, Tuple[int, str, str]] = {}
+    for m in KEYWORD_RX.finditer(text):
+        title = m.group("title").strip(" -–—")
+        if _looks_like_title(title):
+            # ARTICLE-level headings sit above numbered clauses
+            heads[m.start("kw")] = (0 if m.group("kw").upper() == "ARTICLE" else 1, m.group("num"), title)
+    for m in NUMBERED_RX.finditer(text):
+        start = m.start("num")
+        if start in heads or any(abs(start - h) < 12 for h in heads):
+            continue
+        num = m.group("num")
+        title = m.group("title").strip(" -")
+        if not _looks_like_title(title):
+            continue
+        parts = [p for p in num.split(".") if p]
+        if int(parts[0]) == 0:
+            continue
+        # "18.0" is a top-level clause, "18.2" a sub-clause
+        level = 1 + len([p for p in parts[1:] if p != "0"])
+        heads[start] = (level, num, title)
+
+    starts = sorted(heads)
+    sections: List[Section] = []
+    for i, s in enumerate(starts):
+        level, num, title = heads[s]
+        end = len(text)
+        for t in starts[i + 1:]:
+            if heads[t][0] <= level:
+                end = t
+                break
+        sections.append((s, end, level, num, title))
+    return sections
+
+def sections_for(sections: List[Section], keywords: List[str]) -> List[Section]:
+    """Sections whose title contains any keyword, outermost first (ties: document order)."""
+    if not keywords:
+        return []
+    kws = [k.lower() for k in keywords]
+    hits = [s for s in sections if any(k in s[4].lower() for k in kws)]
+    return sorted(hits, key=lambda s: (s[2], s[0]))
+
+def to_json(sections: List[Section]) -> List[list]:
+    return [list(s) for s in sections]
+
+def from_json(data: Optional[List[list]]) -> Optional[List[Section]]:
+    if data is None:
+        return None
+    return [tuple(s) for s in data]
+
+# field -> heading keywords
+SECTION_KEYWORDS: Dict[str, List[str]] = {
+    "governing_law": ["governing law", "applicable law", "choice of law", "governing laws", "jurisdiction"],
+    "payment_terms": ["payment", "fees", "compensation", "invoic", "price"],
+    "termination_clause": ["termination", "term and termination"],
+}
+
+SECTIONS_SUFFIX = ".sections.json"   # foo.txt -> foo.sections.json (heading index; written by ingest.py)
+
+def load_sections(txt_path: Path) -> Optional[List[Section]]:
+    """Section index from <stem>.sections.json, or None if ingest didn't write one."""
+    p = txt_path.with_suffix(SECTIONS_SUFFIX)
+    if not p.exists():
+        return None
+    try:
+        return from_json(json.loads(p.read_text(encoding="utf-8")))
+    except Exception:
+        return None
+
+def section_chunks(text: str, sections: List[Section], field: str, size: int = 2000,
+                   keywords: Optional[List[str]] = None) -> List[Chunk]:
+    """Excerpts of the field's sections (capped at chunk size) to send to the LLM instead of ranked chunks."""
+    out: List[Chunk] = []
+    kws = SECTION_KEYWORDS.get(field, []) if keywords is None else keywords
+    for s, e, *_ in sections_for(sections, kws):
+        e = min(e, s + size)
+        if any(c.start <= s < c.end for c in out):
+            continue  # nested inside an excerpt already taken
+        out.append(Chunk(s, e, text))
+    return out
@@ -0,0 +1,173 @@
+"""
+Risk triage for large drops ("triage")
+- prescore(): a cheap regex pre-pass over the raw text, weighted like the analyst's
+  risk score: no governing-law clause, long net terms (over the standard / over the
+  max), ambiguity terms (config/validationrules.json) and size
+- run_extractor processes docs in descending pre-score order, so likely-risky
+  contracts are extracted (and reviewable) first
+- Snapshots: every N docs / S seconds the docs finished so far go through the
+  validator (first pass + cross-reference over the partial set), the analyst's
+  per-doc scoring and the reporter's findings rows, and are published as
+  per_doc.csv / findings.csv / progress.json in the snapshot dir (written
+  atomically, so the dashboard can read them while the run continues)
+- Snapshots are built on one background thread: the collector only hands over the
+  docs finished so far, and an interval that comes due while a snapshot is still
+  being built is folded into the next one. close() always ends with a final
+  snapshot; one written for a run that stopped early is marked "interrupted", so
+  the dashboard still presents it as partial
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import pandas as pd
+
+from validator import load_rules, validate_doc_first_pass, collect_corpus_rows, apply_cross_reference
+
+# Weights mirror analyst.py's (MISSING 3.0, AMBIGUOUS 2.0, NET_DAYS_OVER_MAX 3.5, numeric drift <= 3.0)
+W_NO_GOVERNING_LAW = 3.0
+W_NET_OVER_MAX = 3.5
+W_AMBIGUITY_TERM = 0.5      # per distinct term
+MAX_AMBIGUITY = 4.0         # ~ two AMBIGUOUS issues
+MAX_NET_DRIFT = 3.0
+MAX_SIZE = 2.0              # +1 per SIZE_UNIT chars, capped
+SIZE_UNIT = 100_000
+
+GOVERNING_RX = re.compile(r"govern(?:ed|ing)\s+(?:by\s+(?:and\s+construed\s+in\s+accordance\s+with\s+)?(?:the\s+)?)?laws?\b",
+                          re.IGNORECASE)
+NET_DAYS_RX = re.compile(r"\bnet\s*(\d{1,3})\b|\b(\d{1,3})\s+days\s+(?:after|from|of)\s+(?:the\s+)?(?:receipt|date)\s+"
+                         r"of\s+(?:an?\s+|the\s+|such\s+)?invoice", re.IGNORECASE)
+
+_AMBIGUITY: Dict[Tuple[str, ...], "re.Pattern[str]"] = {}
+
+def _ambiguity_rx(terms: List[str]) -> "re.Pattern[str]":
+    key = tuple(t.lower() for t in terms)
+    if key not in _AMBIGUITY:
+        _AMBIGUITY[key] = re.compile("|".join(re.escape(t) for t in sorted(key, key=len, reverse=True)),
+                                     re.IGNORECASE)
+    return _AMBIGUITY[key]
+
+def prescore(text: str, rules: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+    """(score, breakdown) from the raw text alone."""
+    parts: Dict[str, float] = {}
+    if not GOVERNING_RX.search(text):
+        parts["NO_GOVERNING_LAW"] = W_NO_GOVERNING_LAW
+
+    std = rules.get("standards", {}).get("net_days_standard", 30)
+    max_nd = rules.get("standards", {}).get("max_net_days", 120)
+    days = [int(a or b) for a, b in NET_DAYS_RX.findall(text)]
+    if days:
+        nd = max(days)
+        if nd > max_nd:
+            parts["NET_DAYS_OVER_MAX"] = W_NET_OVER_MAX
+        if nd > std:
+            parts["NET_DAYS_DRIFT"] = round(min(MAX_NET_DRIFT, (nd - std) / 30.0), 3)
+
+    terms = rules.get("ambiguity_terms", [])
+    if terms:
+        hits = {m.lower() for m in _ambiguity_rx(terms).findall(text)}
+        if hits:
+            parts["AMBIGUITY"] = min(MAX_AMBIGUITY, W_AMBIGUITY_TERM * len(hits))
+
+    if text:
+        parts["SIZE"] = round(min(MAX_SIZE, len(text) / SIZE_UNIT), 3)
+    return round(sum(parts.values()), 3), parts
+
+def _write_atomic(path: Path, write) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+class Snapshots:
+    """Partial per_doc.csv / findings.csv over the docs extracted so far."""
+
+    def __init__(self, out_dir: Path, extract_dir: Path, total: int, scores: Dict[str, float],
+                 every_docs: int = 25, every_s: float = 60.0):
+        # analyst (scikit-learn) and reporter are only imported once snapshots are on
+        import analyst
+        import reporter
+        self.analyst, self.reporter = analyst, reporter
+        self.out_dir, self.extract_dir = out_dir, extract_dir
+        self.total, self.scores = total, scores
+        self.every_docs, self.every_s = max(1, every_docs), every_s
+        self.rules = load_rules()
+        self.an_cfg, self.an_rules = analyst.load_cfg(), analyst.load_validator_rules()
+        self.max_quote = int(reporter.load_cfg()["report"]["max_quote_chars"])
+        self.docs: Dict[str, Dict[str, Any]] = {}    # doc id -> first-pass validated output
+        self.published_at, self.published_docs = time.perf_counter(), 0
+        self.t0 = time.perf_counter()
+        self.count = 0
+        self.final = False
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="triage-snap")
+        self._building: Optional[Future] = None
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    def add(self, doc_id: str) -> None:
+        path = self.extract_dir / f"{Path(doc_id).stem}.json"
+        try:
+            doc = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self.docs[doc_id] = validate_doc_first_pass(doc, self.rules)
+
+    def due(self) -> bool:
+        if self._building is not None and not self._building.done():
+            return False
+        fresh = len(self.docs) - self.published_docs
+        return fresh >= self.every_docs or (fresh > 0 and time.perf_counter() - self.published_at >= self.every_s)
+
+    def publish(self, final: bool = False, interrupted: bool = False) -> None:
+        """Hand the docs finished so far to the snapshot thread (the final one is built before returning)."""
+        docs = list(self.docs.values())
+        # a failed snapshot also waits for the next interval
+        self.published_at, self.published_docs = time.perf_counter(), len(docs)
+        if final:
+            self._wait()
+            self._build(docs, True, interrupted)
+            self.final = True
+        else:
+            self._building = self._pool.submit(self._build, docs, False, False)
+
+    def close(self) -> None:
+        """Final snapshot if the run did not publish one (interrupted), then stop the thread."""
+        try:
+            if not self.final:
+                self.publish(final=True, interrupted=True)
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def _wait(self) -> None:
+        if self._building is not None:
+            self._building.result()
+            self._building = None
+
+    def _build(self, docs: List[Dict[str, Any]], final: bool, interrupted: bool) -> None:
+        try:
+            self._publish(docs, final, interrupted)
+        except Exception as e:   # a partial report must never stop the extraction
+            print(f"⚠️ Snapshot failed: {type(e).__name__}: {e}")
+
+    def _publish(self, first_pass: List[Dict[str, Any]], final: bool, interrupted: bool) -> None:
+        # cross-reference over the partial set (medians, per-party checks); copies keep the first pass intact
+        docs = [dict(d, _issues=list(d.get("_issues") or [])) for d in first_pass]
+        docs, _ = apply_cross_reference(docs, collect_corpus_rows(docs), self.rules)
+        per_doc = self.analyst.build_per_doc_table(docs, self.an_cfg, self.an_rules)
+        if not per_doc.empty:
+            per_doc["triage_score"] = per_doc["doc_id"].map(self.scores)
+            per_doc = per_doc.sort_values("risk_score", ascending=False)
+        findings = pd.DataFrame(self.reporter.build_issue_rows(docs, self.max_quote),
+                                columns=self.reporter.ISSUE_COLUMNS)
+        _write_atomic(self.out_dir / "per_doc.csv", lambda p: per_doc.to_csv(p, index=False, encoding="utf-8"))
+        _write_atomic(self.out_dir / "findings.csv", lambda p: findings.to_csv(p, index=False, encoding="utf-8"))
+        self.count += 1
+        progress = {"done": len(docs), "total": self.total, "final": final, "interrupted": interrupted,
+                    "snapshot": self.count,
+                    "secs": round(time.perf_counter() - self.t0, 1),
+                    "high_risk": int((per_doc["risk_bucket"] == "high").sum()) if not per_doc.empty else 0}
+        _write_atomic(self.out_dir / "progress.json",
+                      lambda p: p.write_text(json.dumps(progress, indent=2), encoding="utf-8"))
@@ -1,21 +1,119 @@
-from dataclasses import dataclass
-from typing import List
+import json
+import re
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 from rapidfuzz import fuzz
 
-@dataclass
+from ingest_canon import OffsetMap
+
 class Chunk:
-    start: int
-    end: int
-    text: str
+    """
+    Offset-only view of a document: [start, end) into the shared parent text.
+    .text slices the parent on access, so only chunks that are actually sent
+    somewhere (the LLM, fuzzy scoring) are ever materialized.
+    """
+    __slots__ = ("start", "end", "src")
+
+    def __init__(self, start: int, end: int, src: str):
+        self.start = start
+        self.end = end
+        self.src = src
+
+    @property
+    def text(self) -> str:
+        return self.src[self.start:self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Chunk) and (self.start, self.end) == (other.start, other.end) and self.src is other.src
+
+    def __hash__(self) -> int:
+        return hash((self.start, self.end))
+
+    def __repr__(self) -> str:
+        return f"Chunk({self.start}, {self.end})"
+
+def union_excerpts(ranked: Iterable[List[Chunk]], max_chars: int) -> List[Chunk]:
+    """
+    Union of several fields' ranked chunks for one batched LLM call: every
+    field's best chunk first, then second-best, ... until max_chars; overlapping
+    chunks are merged. Returned in document order.
+    """
+    lists = [list(r) for r in ranked]
+    picked: List[Chunk] = []
+    total = 0
+    for depth in range(max((len(r) for r in lists), default=0)):
+        for r in lists:
+            if depth >= len(r) or any(c.start == r[depth].start for c in picked):
+                continue
+            if picked and total + len(r[depth]) > max_chars:
+                continue
+            picked.append(r[depth])
+            total += len(r[depth])
+    picked.sort(key=lambda c: c.start)
+    merged: List[Chunk] = []
+    for c in picked:
+        if merged and c.start <= merged[-1].end:
+            last = merged[-1]
+            merged[-1] = Chunk(last.start, max(last.end, c.end), last.src)
+        else:
+            merged.append(c)
+    return merged
+
+# ----- Boundary-aware cut points -----
+SENTENCE_END_RX = re.compile(r"[.!?;:][\"')\]]?\s+|\n\s*\n")
+BOUNDARY_SLACK = 0.2   # a cut may move back by up to 20% of the chunk size
+
+def _cut_point(text: str, lo: int, j: int, boundary: str, section_starts: List[int]) -> int:
+    """Best cut in [lo, j]: section start > sentence/paragraph end > whitespace > j."""
+    if boundary == "section" and section_starts:
+        k = bisect_right(section_starts, j) - 1
+        if k >= 0 and section_starts[k] > lo:
+            return section_starts[k]
+    last = None
+    for m in SENTENCE_END_RX.finditer(text, lo, j):
+        last = m
+    if last is not None:
+        return last.end()
+    for k in range(j - 1, lo, -1):   # last whitespace (any kind: the corpus is full of NBSP)
+        if text[k].isspace():
+            return k + 1
+    return j
+
+def _word_start(text: str, i: int, limit: int) -> int:
+    """Move i forward to the start of the next word (at most to limit)."""
+    if i <= 0 or not text[i - 1].isalnum():
+        return i
+    while i < limit and text[i].isalnum():
+        i += 1
+    while i < limit and text[i].isspace():
+        i += 1
+    return i
 
-def make_chunks(text: str, size: int = 2000, overlap: int = 150) -> List[Chunk]:
-    """Split text into overlapping chunks with global offsets."""
+def make_chunks(text: str, size: int = 2000, overlap: int = 150, boundary: str = "none",
+                section_starts: Optional[List[int]] = None) -> List[Chunk]:
+    """
+    Split text into overlapping chunks with global offsets.
+    boundary="sentence" ends chunks at a sentence/paragraph end (else whitespace)
+    and starts them on a word; "section" also prefers the next heading.
+    "none" cuts at exact character counts.
+    """
     chunks = []
     i, n = 0, len(text)
+    slack = int(size * BOUNDARY_SLACK)
+    starts = sorted(section_starts or [])
     while i < n:
         j = min(n, i + size)
-        chunks.append(Chunk(i, j, text[i:j]))
-        i = j - overlap if j - overlap > i else j
+        if boundary != "none" and j < n:
+            j = _cut_point(text, max(i + 1, j - slack), j, boundary, starts)
+        chunks.append(Chunk(i, j, text))
+        nxt = j - overlap if j - overlap > i else j
+        if boundary != "none" and nxt < j:
+            nxt = _word_start(text, nxt, j)
+        i = nxt
     return chunks
 
 FIELD_HINTS = {
@@ -30,17 +128,107 @@ def _keyword_score(txt: str, hints: List[str]) -> int:
     t = txt.lower()
     return sum(1 for h in hints if h in t)
 
-def rank_chunks_for_field(field: str, chunks: List[Chunk]) -> List[Chunk]:
+# ----- Keyword position index (shared by every field of a document) -----
+
+def _automaton(hints: List[str]):
+    """Aho-Corasick automaton over the hints, or None when pyahocorasick isn't installed."""
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    A = ahocorasick.Automaton()
+    for h in hints:
+        A.add_word(h, h)
+    A.make_automaton()
+    return A
+
+class KeywordIndex:
+    """
+    hint -> sorted start offsets, built in one pass over the lowercased document
+    (Aho-Corasick when available, else one str.find sweep per hint). Chunk scores
+    for any field then come from bisecting these lists, so ranking cost doesn't
+    grow with the number of fields.
+    """
+
+    def __init__(self, text: str, hints: Iterable[str]):
+        self.hints = sorted({h.lower() for h in hints if h})
+        low = text.lower()
+        # lowercasing can change the length of some non-ASCII text; offsets must stay aligned
+        self.aligned = len(low) == len(text)
+        self.pos: Dict[str, List[int]] = {h: [] for h in self.hints}
+        A = _automaton(self.hints) if self.hints else None
+        if A is not None:
+            for end, h in A.iter(low):
+                self.pos[h].append(end - len(h) + 1)
+        else:
+            for h in self.hints:
+                i = low.find(h)
+                while i != -1:
+                    self.pos[h].append(i)
+                    i = low.find(h, i + 1)
+
+    def has(self, hint: str, start: int, end: int) -> bool:
+        """True if hint occurs entirely inside [start, end)."""
+        p = self.pos.get(hint)
+        if not p:
+            return False
+        i = bisect_left(p, start)
+        return i < len(p) and p[i] + len(hint) <= end
+
+    def score(self, hints: List[str], start: int, end: int) -> int:
+        return sum(1 for h in hints if self.has(h, start, end))
+
+def rank_chunks_for_field(field: str, chunks: List[Chunk], hints: Optional[List[str]] = None,
+                          index: Optional[KeywordIndex] = None) -> List[Chunk]:
     """
     Cheap keyword prefilter to top ~5 chunks, then fuzzy-rank those.
-    This avoids fuzzy-scoring every chunk.
+    This avoids fuzzy-scoring every chunk. hints default to FIELD_HINTS[field].
+    With a KeywordIndex, hint counts come from the index and a chunk that
+    contains a hint scores 100 without a fuzzy call (partial_ratio of a
+    substring is 100); fuzzy matching only runs on chunks with no exact hit.
     """
-    hints = FIELD_HINTS.get(field, [])
+    hints = FIELD_HINTS.get(field, []) if hints is None else hints
     if not hints:
         return chunks
-    prelim = sorted(
-        chunks, key=lambda c: _keyword_score(c.text, hints), reverse=True
-    )[:5]  # keep only the most promising few
-    def score(c: Chunk) -> int:
-        return max(fuzz.partial_ratio(h, c.text.lower()) for h in hints)
-    return sorted(prelim, key=score, reverse=True)
+    if index is None or not index.aligned:
+        prelim = sorted(
+            chunks, key=lambda c: _keyword_score(c.text, hints), reverse=True
+        )[:5]  # keep only the most promising few
+        def score(c: Chunk) -> int:
+            return max(fuzz.partial_ratio(h, c.text.lower()) for h in hints)
+        return sorted(prelim, key=score, reverse=True)
+
+    hints = [h.lower() for h in hints]
+    prelim = sorted(chunks, key=lambda c: index.score(hints, c.start, c.end), reverse=True)[:5]
+    def indexed_score(c: Chunk) -> float:
+        if any(index.has(h, c.start, c.end) for h in hints):
+            return 100
+        t = c.text.lower()
+        return max(fuzz.partial_ratio(h, t) for h in hints)
+    return sorted(prelim, key=indexed_score, reverse=True)
+
+# ----- Page map (written by ingest.py next to each .txt) -----
+
+def load_page_offsets(txt_path: Path) -> Optional[List[int]]:
+    """Page-start char offsets from <stem>.pages.json, or None if ingest didn't write one."""
+    p = txt_path.with_suffix(".pages.json")
+    if not p.exists():
+        return None
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+def page_at(offsets: List[int], pos: int) -> int:
+    """1-based PDF page containing char offset pos."""
+    return max(1, bisect_right(offsets, pos))
+
+def load_offset_map(txt_path: Path) -> Optional[OffsetMap]:
+    """Canonical -> raw offset map from <stem>.canon.json (written when ingest canonicalizes)."""
+    p = txt_path.with_suffix(".canon.json")
+    if not p.exists():
+        return None
+    try:
+        return OffsetMap.from_json(json.loads(p.read_text(encoding="utf-8")))
+    except Exception:
+        return None
@@ -1,11 +1,73 @@
+"""
+Ingest PDFs -> TXT
+- Walks full_contract_pdf/<Part>/... and writes flat-named .txt files
+- Optional process pool (one PDF per task) to use every core
+- Persistent manifest keyed by PDF content hash:
+    * changed PDFs are re-extracted, unchanged ones are skipped
+    * byte-identical duplicates are converted once and copied
+    * per-file timings and failures are recorded for the next run
+- Page-aware: PDFs are converted one page at a time and a compact
+  page-start offset table is written next to each .txt (<stem>.pages.json)
+- Pluggable text backends (see ingest_backends.py), big PDFs split into
+  page ranges across workers, per-PDF timeout (hung workers are killed),
+  recycled pool workers
+- Optional packed corpus: every .txt (+ page map) in one memory-mappable file
+- Canonicalization (see ingest_canon.py): the .txt holds dehyphenated,
+  header/footer-free, whitespace-collapsed text; the raw text and a
+  canonical -> raw offset map are kept next to it
+- Section index (see extractor_sections.py): numbered headings and their
+  spans in <stem>.sections.json, so the extractor can jump to a clause
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import time
 from pathlib import Path
-from pdfminer.high_level import extract_text
+from typing import Dict, Any, List, Iterator, Optional, Container, Tuple
+
+from ingest_backends import PdfBackend, get_backend
+from corpus_store import CorpusReader, write_pack
+from ingest_canon import canonicalize
+from extractor_sections import SECTIONS_SUFFIX, find_sections, to_json as sections_json
 
 PDF_ROOT = Path("full_contract_pdf")
 PARTS = ["Part_I", "Part_II"]   # process all three
 TXT_OUT = Path("full_contract2_txt")
 TXT_OUT.mkdir(parents=True, exist_ok=True)
 
+CFG_FILE      = Path("config") / "ingest.json"
+MANIFEST_FILE = TXT_OUT / "_ingest_manifest.json"
+MANIFEST_VERSION = 2   # v2: adds <stem>.pages.json page maps
+PAGES_SUFFIX = ".pages.json"   # foo.txt -> foo.pages.json
+RAW_SUFFIX   = ".raw"          # foo.txt -> foo.raw        (pre-canonicalization text)
+CANON_SUFFIX = ".canon.json"   # foo.txt -> foo.canon.json (canonical -> raw offset map)
+
+def load_cfg() -> Dict[str, Any]:
+    if CFG_FILE.exists():
+        cfg = json.loads(CFG_FILE.read_text(encoding="utf-8"))
+    else:
+        cfg = {}
+    # sensible defaults
+    cfg.setdefault("parallel", True)
+    cfg.setdefault("max_workers", 0)          # 0 -> os.cpu_count()
+    cfg.setdefault("retry_failed", False)     # re-attempt PDFs that failed on a previous run
+    cfg.setdefault("manifest_flush_every", 25)
+    cfg.setdefault("backend", "auto")           # auto | pdfminer | pdfminer_fast | pymupdf | pdfium
+    cfg.setdefault("timeout_seconds", 300)      # per PDF (per page-range task when split); 0 = none
+    cfg.setdefault("max_tasks_per_child", 20)   # recycle pool workers; 0 = never
+    cfg.setdefault("pages_per_task", 25)        # split big PDFs into page ranges; 0 = never
+    cfg.setdefault("split_min_kb", 512)         # only count pages / split PDFs at least this big
+    cfg.setdefault("canonicalize", True)        # dehyphenate, drop headers/footers, collapse whitespace
+    cfg.setdefault("pack_corpus", False)        # also write one packed corpus file (corpus_store.py)
+    cfg.setdefault("pack_file", str(TXT_OUT / "_corpus.pack"))
+    cfg.setdefault("pack_compress", False)      # zlib blobs: smaller file, slices decode whole doc
+    return cfg
+
 def flat_name(rel_path: Path) -> str:
     """
     Convert nested path like 'Part_I/Transportation/file.pdf' into:
@@ -14,7 +76,274 @@ def flat_name(rel_path: Path) -> str:
     *folders, filename = rel_path.parts
     return "__".join(folders + [Path(filename).stem]) + ".txt"
 
-def main():
+# -------- Manifest --------
+
+def file_sha256(path: Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for buf in iter(lambda: f.read(block), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+def load_manifest() -> Dict[str, Any]:
+    """
+    {
+      "version": 2,
+      "files":  {rel_pdf: {"sha256", "size", "mtime", "txt"}},
+      "hashes": {sha256: {"status", "txt", "chars", "pages", "seconds", "error", "source"}}
+    }
+    """
+    if MANIFEST_FILE.exists():
+        try:
+            m = json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+            if m.get("version") == MANIFEST_VERSION:
+                return m
+        except Exception:
+            print(f"⚠️ Unreadable manifest, starting fresh: {MANIFEST_FILE}")
+    return {"version": MANIFEST_VERSION, "files": {}, "hashes": {}}
+
+def save_manifest(manifest: Dict[str, Any]) -> None:
+    # temp file + rename so an interrupted run never leaves a half-written manifest
+    tmp = MANIFEST_FILE.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, MANIFEST_FILE)
+
+def pdf_hash(pdf: Path, rel: str, manifest: Dict[str, Any]) -> str:
+    """Reuse the recorded hash when size+mtime are unchanged; otherwise re-hash."""
+    st = pdf.stat()
+    prev = manifest["files"].get(rel)
+    if prev and prev.get("size") == st.st_size and prev.get("mtime") == st.st_mtime:
+        return prev["sha256"]
+    return file_sha256(pdf)
+
+# -------- Page-level extraction --------
+
+def iter_pages(pdf_path: str, page_numbers: Optional[Container[int]] = None,
+               backend: str = "pdfminer") -> Iterator[str]:
+    """
+    Lazily yield the text of each page (0-indexed page_numbers; None = all pages).
+    With the default pdfminer backend this is the same output as extract_text,
+    but only one page is held in memory; each page's text ends with a form feed.
+    """
+    return get_backend(backend).iter_pages(pdf_path, page_numbers)
+
+def extract_page_range(pdf_path: str, first: int, last: Optional[int] = None,
+                       backend: str = "pdfminer") -> str:
+    """Text of pages first..last (0-indexed, inclusive; last=None -> to the end)."""
+    if last is None:
+        return "".join(p for i, p in enumerate(iter_pages(pdf_path, backend=backend)) if i >= first)
+    return "".join(iter_pages(pdf_path, range(first, last + 1), backend=backend))
+
+def pages_path(txt_path: Path) -> Path:
+    return txt_path.with_suffix(PAGES_SUFFIX)
+
+SIDECARS = (PAGES_SUFFIX, RAW_SUFFIX, CANON_SUFFIX, SECTIONS_SUFFIX)
+
+def copy_outputs(src_txt: Path, dst_txt: Path) -> None:
+    """Copy a converted .txt and its sidecar files (page map, raw text, offset map, sections) to a new name."""
+    shutil.copyfile(src_txt, dst_txt)
+    for suffix in SIDECARS:
+        if src_txt.with_suffix(suffix).exists():
+            shutil.copyfile(src_txt.with_suffix(suffix), dst_txt.with_suffix(suffix))
+        else:
+            dst_txt.with_suffix(suffix).unlink(missing_ok=True)
+
+def canonicalize_output(out_path: Path, page_offsets: List[int]) -> Tuple[int, List[int]]:
+    """
+    Replace out_path with its canonical text. The raw text moves to <stem>.raw,
+    the canonical -> raw offset map goes to <stem>.canon.json, and the page map
+    is rewritten in canonical offsets. Returns (canonical_chars, page_offsets).
+    """
+    raw = out_path.read_text(encoding="utf-8")
+    canon, omap = canonicalize(raw, page_offsets)
+    os.replace(out_path, out_path.with_suffix(RAW_SUFFIX))
+    out_path.write_text(canon, encoding="utf-8")
+    out_path.with_suffix(CANON_SUFFIX).write_text(json.dumps(omap.to_json(), separators=(",", ":")), encoding="utf-8")
+    return len(canon), [omap.to_canonical(p) for p in page_offsets]
+
+def write_sections(out_path: Path) -> None:
+    """Heading index of the final .txt -> <stem>.sections.json (extractor scans these first)."""
+    sections = find_sections(out_path.read_text(encoding="utf-8"))
+    out_path.with_suffix(SECTIONS_SUFFIX).write_text(json.dumps(sections_json(sections), separators=(",", ":")),
+                                                     encoding="utf-8")
+
+# -------- Conversion --------
+
+class _Timeout(Exception):
+    pass
+
+def _on_alarm(signum, frame):
+    raise _Timeout()
+
+def convert_part(pdf_path: str, out_path: str, backend: str, first: int = 0,
+                 last: Optional[int] = None, timeout: float = 0) -> Dict[str, Any]:
+    """
+    Worker task: pages first..last of one PDF -> out_path, streamed page by page.
+    Returns the per-page character lengths so the parent can build the page map.
+    Top-level so it can be pickled into a process pool.
+
+    timeout > 0 is enforced with SIGALRM where available (interrupts a single
+    pathological page) and otherwise checked between pages.
+    """
+    t0 = time.perf_counter()
+    out = Path(out_path)
+    use_alarm = timeout > 0 and hasattr(signal, "setitimer")
+    if use_alarm:
+        prev_handler = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        lengths: List[int] = []
+        pages = None if last is None else range(first, last + 1)
+        with out.open("w", encoding="utf-8") as f:
+            for page_text in get_backend(backend).iter_pages(pdf_path, pages):
+                f.write(page_text)
+                lengths.append(len(page_text))
+                if timeout > 0 and time.perf_counter() - t0 > timeout:
+                    raise _Timeout()
+        return {"status": "ok", "page_lengths": lengths, "seconds": round(time.perf_counter() - t0, 3)}
+    except _Timeout:
+        out.unlink(missing_ok=True)
+        return {"status": "failed", "error": f"Timeout: exceeded {timeout}s",
+                "seconds": round(time.perf_counter() - t0, 3)}
+    except Exception as e:
+        out.unlink(missing_ok=True)
+        return {"status": "failed", "error": f"{type(e).__name__}: {e}",
+                "seconds": round(time.perf_counter() - t0, 3)}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, prev_handler)
+
+def split_pages(n_pages: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """[(first, last), ...] inclusive page ranges of at most pages_per_task pages."""
+    return [(i, min(n_pages, i + pages_per_task) - 1) for i in range(0, n_pages, pages_per_task)]
+
+def plan_parts(pdf: Path, out_path: Path, backend: PdfBackend, cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    One task per PDF, or several page-range tasks for big PDFs so a long
+    document is spread across workers instead of pinning one. Workers write
+    <stem>.part<k> files; assemble() moves them into place only on success.
+    """
+    per_task = int(cfg.get("pages_per_task", 0))
+    if per_task > 0 and pdf.stat().st_size >= int(cfg.get("split_min_kb", 512)) * 1024:
+        try:
+            n_pages = backend.page_count(str(pdf))
+        except Exception:
+            n_pages = 0
+        if n_pages > per_task:
+            return [{"first": a, "last": b, "path": out_path.with_suffix(f".part{k}")}
+                    for k, (a, b) in enumerate(split_pages(n_pages, per_task))]
+    return [{"first": 0, "last": None, "path": out_path.with_suffix(".part0")}]
+
+def assemble(out_path: Path, parts: List[Dict[str, Any]], results: List[Dict[str, Any]],
+             canonical: bool = False) -> Dict[str, Any]:
+    """Merge part results (in page order) into out_path + its page map (+ canonical text)."""
+    t_total = sum(r.get("seconds") or 0 for r in results)
+    bad = [r for r in results if r["status"] != "ok"]
+    if bad:
+        for p in parts:
+            p["path"].unlink(missing_ok=True)
+        return {"status": "failed", "error": bad[0].get("error"), "seconds": round(t_total, 3)}
+
+    if len(parts) == 1:
+        os.replace(parts[0]["path"], out_path)
+    else:
+        with out_path.open("w", encoding="utf-8") as dst:
+            for p in parts:
+                with p["path"].open("r", encoding="utf-8") as src:
+                    shutil.copyfileobj(src, dst)
+                p["path"].unlink()
+
+    offsets: List[int] = []
+    pos = 0
+    for r in results:
+        for n in r["page_lengths"]:
+            offsets.append(pos)
+            pos += n
+    entry = {"status": "ok", "chars": pos, "pages": len(offsets), "canonical": canonical}
+    if canonical:
+        entry["raw_chars"] = pos
+        entry["chars"], offsets = canonicalize_output(out_path, offsets)
+    else:
+        for suffix in (RAW_SUFFIX, CANON_SUFFIX):
+            out_path.with_suffix(suffix).unlink(missing_ok=True)
+    pages_path(out_path).write_text(json.dumps(offsets, separators=(",", ":")), encoding="utf-8")
+    write_sections(out_path)
+    entry["seconds"] = round(t_total, 3)
+    return entry
+
+# A worker still on one task this long past timeout_seconds is killed from the parent:
+# SIGALRM only fires between bytecodes, so it can't interrupt a native backend.
+KILL_GRACE_S = 30
+
+def _run_part(started, key: Tuple[str, int], pdf_path: str, out_path: str, backend: str,
+              first: int, last: Optional[int], timeout: float) -> Dict[str, Any]:
+    """convert_part(), registering (pid, start time) so the parent's watchdog can find it."""
+    started[key] = (os.getpid(), time.time())
+    try:
+        return convert_part(pdf_path, out_path, backend, first, last, timeout)
+    finally:
+        started.pop(key, None)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def run_parts(tasks: List[Tuple[Tuple[str, int], str, Dict[str, Any]]], backend: str, timeout: float,
+              max_workers: int, per_child: int, on_result) -> None:
+    """
+    Run [(key, pdf, part), ...] on a process pool, calling on_result(key, res) once per
+    task, in the calling thread, as tasks finish.
+    - Workers are recycled after per_child tasks (Pool's maxtasksperchild, so no batch
+      barrier; ProcessPoolExecutor's max_tasks_per_child races with dying workers on 3.11)
+    - Watchdog: a task past timeout + KILL_GRACE_S gets its worker SIGKILLed and is
+      failed as a timeout; a task whose worker died (segfault, OOM kill) is failed too.
+      The pool replaces lost workers, so the other tasks carry on.
+    """
+    results: "queue.Queue[Tuple[Tuple[str, int], Dict[str, Any]]]" = queue.Queue()
+    with multiprocessing.Manager() as mgr, \
+            multiprocessing.Pool(processes=max_workers, maxtasksperchild=per_child or None) as pool:
+        started = mgr.dict()
+        for key, pdf, p in tasks:
+            pool.apply_async(
+                _run_part, (started, key, pdf, str(p["path"]), backend, p["first"], p["last"], timeout),
+                callback=lambda res, key=key: results.put((key, res)),
+                error_callback=lambda e, key=key: results.put(
+                    (key, {"status": "failed", "error": f"{type(e).__name__}: {e}", "seconds": None})),
+            )
+        paths = {key: p["path"] for key, _, p in tasks}
+        pending = set(paths)
+        while pending:
+            try:
+                key, res = results.get(timeout=1.0)
+            except queue.Empty:
+                key = None
+            if key in pending:
+                pending.discard(key)
+                on_result(key, res)
+            now = time.time()
+            for key, (pid, since) in list(started.items()):
+                if key not in pending:
+                    continue
+                if not _pid_alive(pid):
+                    error = "worker died"
+                elif timeout > 0 and now - since > timeout + KILL_GRACE_S:
+                    os.kill(pid, signal.SIGKILL)
+                    error = f"Timeout: killed after {timeout + KILL_GRACE_S:.0f}s"
+                    print(f"  ✗ killed worker {pid} (hung past {timeout + KILL_GRACE_S:.0f}s)")
+                else:
+                    continue
+                started.pop(key, None)
+                Path(paths[key]).unlink(missing_ok=True)
+                pending.discard(key)
+                on_result(key, {"status": "failed", "error": error, "seconds": None})
+
+def collect_pdfs() -> List[Path]:
     all_pdfs = []
     for part in PARTS:
         part_dir = PDF_ROOT / part
@@ -22,29 +351,160 @@ def main():
             print(f"⚠️ Skipping missing folder: {part_dir}")
             continue
         all_pdfs.extend(sorted(part_dir.rglob("*.pdf")))
+    return all_pdfs
+
+def plan_jobs(all_pdfs: List[Path], manifest: Dict[str, Any], cfg: Dict[str, Any],
+              backend: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Group PDFs by content hash. Returns {sha256: [{"pdf", "rel", "out_path"}, ...]} for
+    every hash that needs converting (or whose duplicates need a copy).
+    """
+    jobs: Dict[str, List[Dict[str, Any]]] = {}
+    for pdf in all_pdfs:
+        rel_path = pdf.relative_to(PDF_ROOT)   # e.g. Part_I/Transportation/file.pdf
+        rel = rel_path.as_posix()
+        out_path = TXT_OUT / flat_name(rel_path)
+        try:
+            sha = pdf_hash(pdf, rel, manifest)
+        except Exception as e:
+            print(f"✗ Failed: {pdf} ({e})")
+            continue
+
+        st = pdf.stat()
+        prev = manifest["files"].get(rel)
+        manifest["files"][rel] = {"sha256": sha, "size": st.st_size, "mtime": st.st_mtime, "txt": out_path.name}
+
+        done = manifest["hashes"].get(sha)
+        # same output settings as last time? (backend / canonicalization change -> re-extract)
+        same_settings = bool(done) and done.get("backend") == backend \
+            and bool(done.get("canonical")) == bool(cfg.get("canonicalize", True))
+        unchanged = prev is not None and prev.get("sha256") == sha and same_settings
+        if done and unchanged and out_path.exists() and done.get("status") == "ok":
+            continue
+        if done and unchanged and done.get("status") == "failed" and not cfg.get("retry_failed", False):
+            continue
+        if (same_settings and done.get("status") == "ok"
+                and (TXT_OUT / done["txt"]).exists() and done["txt"] != out_path.name):
+            # new byte-identical copy of a PDF we already converted
+            copy_outputs(TXT_OUT / done["txt"], out_path)
+            print(f"  = duplicate {pdf} -> {out_path.name}")
+            continue
+        jobs.setdefault(sha, []).append({"pdf": pdf, "rel": rel, "out_path": out_path})
+    return jobs
+
+def finish_job(sha: str, targets: List[Dict[str, Any]], res: Dict[str, Any], manifest: Dict[str, Any]) -> None:
+    """Record the result and fan the converted text out to byte-identical duplicates."""
+    first = targets[0]
+    entry = dict(res)
+    entry["txt"] = first["out_path"].name
+    entry["source"] = first["rel"]
+    manifest["hashes"][sha] = entry
+
+    if res["status"] != "ok":
+        for t in targets:
+            print(f"✗ Failed: {t['pdf']} ({res.get('error')})")
+        return
+
+    if res.get("chars", 0) < 50:
+        print(f"⚠️ very short text after conversion: {first['pdf'].name}")
+    print(f"✓ {first['pdf']} -> {first['out_path'].name} ({res['seconds']:.2f}s)")
+    for t in targets[1:]:
+        copy_outputs(first["out_path"], t["out_path"])
+        print(f"  = duplicate {t['pdf']} -> {t['out_path'].name}")
+
+def build_pack(cfg: Dict[str, Any]) -> None:
+    """Pack every .txt in TXT_OUT (with its page map, offset map and sections) into cfg["pack_file"]."""
+    pack_path = Path(cfg["pack_file"])
+    txts = sorted(TXT_OUT.glob("*.txt"))
+
+    def sidecar(p: Path, suffix: str) -> Any:
+        sp = p.with_suffix(suffix)
+        return json.loads(sp.read_text(encoding="utf-8")) if sp.exists() else None
+
+    def items():
+        for p in txts:
+            text = p.read_text(encoding="utf-8", errors="ignore")
+            sections = sidecar(p, SECTIONS_SUFFIX)
+            if sections is None:   # .txt from before the heading index existed
+                sections = sections_json(find_sections(text))
+            meta = {"pages": sidecar(p, PAGES_SUFFIX), "canon": sidecar(p, CANON_SUFFIX), "sections": sections}
+            yield p.name, text, meta
+
+    t0 = time.perf_counter()
+    n = write_pack(pack_path, items(), compress=bool(cfg.get("pack_compress", False)))
+    size_mb = pack_path.stat().st_size / 1e6
+    print(f"✓ Packed {n} docs -> {pack_path} ({size_mb:.1f} MB, {time.perf_counter() - t0:.2f}s)")
+
+def pack_stale(cfg: Dict[str, Any]) -> bool:
+    """True if the pack is missing, unreadable or holds a different doc set than TXT_OUT."""
+    pack_path = Path(cfg["pack_file"])
+    if not pack_path.exists():
+        return True
+    try:
+        with CorpusReader(pack_path) as reader:
+            packed = set(reader.doc_ids())
+    except Exception:
+        return True
+    return packed != {p.name for p in TXT_OUT.glob("*.txt")}
 
+def main():
+    cfg = load_cfg()
+    all_pdfs = collect_pdfs()
     if not all_pdfs:
         raise SystemExit(f"No PDFs found under {PDF_ROOT}")
 
-    print(f"Found {len(all_pdfs)} PDFs under {PDF_ROOT}")
-    for pdf in all_pdfs:
-        try:
-            rel = pdf.relative_to(PDF_ROOT)   # e.g. Part_I/Transportation/file.pdf
-            out_name = flat_name(rel)
-            out_path = TXT_OUT / out_name
+    backend = get_backend(cfg.get("backend", "auto"))
+    timeout = float(cfg.get("timeout_seconds", 0) or 0)
+    print(f"Found {len(all_pdfs)} PDFs under {PDF_ROOT}  |  backend: {backend.name}")
+    manifest = load_manifest()
+    jobs = plan_jobs(all_pdfs, manifest, cfg, backend.name)
+    skipped = len(all_pdfs) - sum(len(v) for v in jobs.values())
+    print(f"↷ skip (unchanged): {skipped}  |  to convert: {len(jobs)} unique PDFs")
 
-            if out_path.exists():
-                print(f"↷ skip (exists): {out_path.name}")
-                continue
+    flush_every = max(1, int(cfg.get("manifest_flush_every", 25)))
+    t0 = time.perf_counter()
+    done = 0
 
-            text = extract_text(str(pdf)) or ""
-            if len(text.strip()) < 50:
-                print(f"⚠️ very short text after conversion: {pdf.name}")
+    def finish(sha: str, parts: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> None:
+        nonlocal done
+        res = assemble(jobs[sha][0]["out_path"], parts, results, canonical=bool(cfg.get("canonicalize", True)))
+        res["backend"] = backend.name
+        finish_job(sha, jobs[sha], res, manifest)
+        done += 1
+        if done % flush_every == 0:
+            save_manifest(manifest)
 
-            out_path.write_text(text, encoding="utf-8")
-            print(f"✓ {pdf} -> {out_path.name}")
-        except Exception as e:
-            print(f"✗ Failed: {pdf} ({e})")
+    parts_by_sha = {sha: plan_parts(t[0]["pdf"], t[0]["out_path"], backend, cfg) for sha, t in jobs.items()}
+    n_tasks = sum(len(parts) for parts in parts_by_sha.values())
+    if cfg.get("parallel", True) and n_tasks > 1:   # a single big PDF still splits across workers
+        max_workers = int(cfg.get("max_workers", 0)) or os.cpu_count() or 1
+        results_by_sha: Dict[str, List[Optional[Dict[str, Any]]]] = {
+            sha: [None] * len(parts) for sha, parts in parts_by_sha.items()
+        }
+        tasks = [((sha, k), str(jobs[sha][0]["pdf"]), p)
+                 for sha, parts in parts_by_sha.items() for k, p in enumerate(parts)]
+
+        def on_result(key: Tuple[str, int], res: Dict[str, Any]) -> None:
+            sha, k = key
+            results_by_sha[sha][k] = res
+            if all(r is not None for r in results_by_sha[sha]):
+                finish(sha, parts_by_sha[sha], results_by_sha[sha])
+
+        run_parts(tasks, backend.name, timeout, max_workers, int(cfg.get("max_tasks_per_child", 0)), on_result)
+    else:
+        for sha, parts in parts_by_sha.items():
+            pdf = str(jobs[sha][0]["pdf"])
+            results = [convert_part(pdf, str(p["path"]), backend.name, p["first"], p["last"], timeout)
+                       for p in parts]
+            finish(sha, parts, results)
+
+    save_manifest(manifest)
+    failed = sum(1 for sha in jobs if manifest["hashes"][sha]["status"] != "ok")
+    print(f"Converted {done - failed}, failed {failed}, skipped {skipped} in {time.perf_counter() - t0:.2f}s")
+
+    # also after .txt files were added or removed outside a conversion (copied, deleted, failed re-runs)
+    if cfg.get("pack_corpus", False) and (done > 0 or pack_stale(cfg)):
+        build_pack(cfg)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+"""
+PDF text backends for ingest.py
+- One interface: page_count() + iter_pages() (lazy, one page at a time)
+- pdfminer          : pdfminer.six with default LAParams (reference output)
+- pdfminer_fast     : pdfminer.six with tuned LAParams (no box-ordering pass)
+- pymupdf / pdfium  : optional native engines, used only when installed
+- "auto" picks the fastest native backend that is importable, else pdfminer
+
+Every backend ends each page with a form feed, like pdfminer's TextConverter,
+so page maps and downstream offsets look the same whichever engine ran.
+"""
+
+import io
+from typing import Dict, Iterator, Optional, Container, List, Type
+
+PAGE_BREAK = "\f"
+
+class PdfBackend:
+    name = "base"
+
+    @staticmethod
+    def available() -> bool:
+        return True
+
+    def page_count(self, pdf_path: str) -> int:
+        raise NotImplementedError
+
+    def iter_pages(self, pdf_path: str, page_numbers: Optional[Container[int]] = None) -> Iterator[str]:
+        raise NotImplementedError
+
+# ----- pdfminer -----
+
+class PdfminerBackend(PdfBackend):
+    name = "pdfminer"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pdfminer  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def laparams(self):
+        from pdfminer.layout import LAParams
+        return LAParams()
+
+    def page_count(self, pdf_path: str) -> int:
+        from pdfminer.pdfpage import PDFPage
+        with open(pdf_path, "rb") as fp:
+            return sum(1 for _ in PDFPage.get_pages(fp))
+
+    def iter_pages(self, pdf_path: str, page_numbers: Optional[Container[int]] = None) -> Iterator[str]:
+        from pdfminer.converter import TextConverter
+        from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+        from pdfminer.pdfpage import PDFPage
+
+        rsrcmgr = PDFResourceManager(caching=True)
+        with open(pdf_path, "rb") as fp, io.StringIO() as buf:
+            device = TextConverter(rsrcmgr, buf, laparams=self.laparams())
+            interpreter = PDFPageInterpreter(rsrcmgr, device)
+            try:
+                for page in PDFPage.get_pages(fp, page_numbers, caching=True):
+                    interpreter.process_page(page)
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate(0)
+            finally:
+                device.close()
+
+class PdfminerFastBackend(PdfminerBackend):
+    """
+    boxes_flow=None skips pdfminer's hierarchical text-box grouping, which is
+    quadratic in the number of boxes and dominates on dense/OCR'd pages.
+    Reading order within a page can differ slightly from the reference.
+    """
+    name = "pdfminer_fast"
+
+    def laparams(self):
+        from pdfminer.layout import LAParams
+        return LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+
+# ----- optional native engines -----
+
+def _import_pymupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+    return pymupdf
+
+class PymupdfBackend(PdfBackend):
+    name = "pymupdf"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            _import_pymupdf()
+            return True
+        except ImportError:
+            return False
+
+    def page_count(self, pdf_path: str) -> int:
+        with _import_pymupdf().open(pdf_path) as doc:
+            return doc.page_count
+
+    def iter_pages(self, pdf_path: str, page_numbers: Optional[Container[int]] = None) -> Iterator[str]:
+        with _import_pymupdf().open(pdf_path) as doc:
+            for i in range(doc.page_count):
+                if page_numbers is not None and i not in page_numbers:
+                    continue
+                yield doc[i].get_text("text") + PAGE_BREAK
+
+class PdfiumBackend(PdfBackend):
+    name = "pdfium"
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pypdfium2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def page_count(self, pdf_path: str) -> int:
+        import pypdfium2 as pdfium
+        doc = pdfium.PdfDocument(pdf_path)
+        try:
+            return len(doc)
+        finally:
+            doc.close()
+
+    def iter_pages(self, pdf_path: str, page_numbers: Optional[Container[int]] = None) -> Iterator[str]:
+        import pypdfium2 as pdfium
+        doc = pdfium.PdfDocument(pdf_path)
+        try:
+            for i in range(len(doc)):
+                if page_numbers is not None and i not in page_numbers:
+                    continue
+                page = doc[i]
+                textpage = page.get_textpage()
+                text = textpage.get_text_range()
+                textpage.close()
+                page.close()
+                yield text.replace("\r\n", "\n") + PAGE_BREAK
+        finally:
+            doc.close()
+
+# ----- registry -----
+
+BACKENDS: Dict[str, Type[PdfBackend]] = {
+    "pdfminer": PdfminerBackend,
+    "pdfminer_fast": PdfminerFastBackend,
+    "pymupdf": PymupdfBackend,
+    "pdfium": PdfiumBackend,
+}
+
+# fastest first; "auto" takes the first importable one. The pdfminer fallback keeps the
+# reference layout: pdfminer_fast is no faster in practice and changes the text.
+AUTO_ORDER = ["pymupdf", "pdfium", "pdfminer"]
+
+def available_backends() -> List[str]:
+    return [name for name, cls in BACKENDS.items() if cls.available()]
+
+def get_backend(name: str = "auto") -> PdfBackend:
+    if name == "auto":
+        for cand in AUTO_ORDER:
+            if BACKENDS[cand].available():
+                return BACKENDS[cand]()
+        raise RuntimeError("No PDF text backend installed (pip install pdfminer.six)")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown PDF backend '{name}'. Choose from: auto, {', '.join(BACKENDS)}")
+    cls = BACKENDS[name]
+    if not cls.available():
+        raise RuntimeError(f"PDF backend '{name}' is not installed")
+    return cls()
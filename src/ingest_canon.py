@@ -0,0 +1,183 @@
+"""
+Ingest-time text canonicalization
+- Header/footer removal: lines repeated at the top/bottom of most pages, and
+  bare page numbers ("Page 3 of 10", "- 3 -")
+- Dehyphenation: "termi-\\nnation" -> "termination"
+- Whitespace collapsing: CRLF -> LF, form feeds/NBSP/CR -> plain, runs of spaces -> one,
+  trailing spaces dropped, 3+ newlines -> one blank line
+
+Every edit is recorded in an OffsetMap (canonical pos -> raw pos) so spans
+found in the canonical text can be traced back to the raw pdfminer output.
+"""
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+# ----- offset map -----
+
+class OffsetMap:
+    """
+    Piecewise-linear map from canonical offsets to raw offsets, stored as runs
+    (c_start, r_start, length): canonical [c, c+L) came verbatim from raw [r, r+L).
+    """
+
+    def __init__(self, runs: Optional[List[Tuple[int, int, int]]] = None, raw_len: int = 0):
+        self.runs: List[Tuple[int, int, int]] = runs or []
+        self.raw_len = raw_len
+        self._c = [r[0] for r in self.runs]
+        self._r = [r[1] for r in self.runs]
+
+    def to_raw(self, pos: int) -> int:
+        """Raw offset of canonical pos (positions inside removed text snap to the run end)."""
+        if not self.runs:
+            return pos
+        i = max(0, bisect_right(self._c, pos) - 1)
+        c, r, n = self.runs[i]
+        return r + min(max(0, pos - c), n)
+
+    def to_canonical(self, raw_pos: int) -> int:
+        """Canonical offset of raw_pos (removed raw text maps to where it was cut)."""
+        if not self.runs:
+            return raw_pos
+        i = bisect_right(self._r, raw_pos) - 1
+        if i < 0:
+            return 0
+        c, r, n = self.runs[i]
+        return c + min(raw_pos - r, n)
+
+    def to_json(self) -> Dict[str, Any]:
+        # column-wise ints keep the sidecar compact
+        return {"c": self._c, "r": self._r, "n": [r[2] for r in self.runs], "raw_len": self.raw_len}
+
+    @classmethod
+    def from_json(cls, d: Dict[str, Any]) -> "OffsetMap":
+        return cls(list(zip(d["c"], d["r"], d["n"])), d.get("raw_len", 0))
+
+def _apply_edits(text: str, edits: List[Tuple[int, int, str]]) -> Tuple[str, List[Tuple[int, int, int]]]:
+    """
+    Apply non-overlapping, sorted (start, end, replacement) edits.
+    Returns (new_text, runs) where runs map new offsets -> input offsets.
+    Replacement text is attributed to the start of the text it replaced.
+    """
+    out: List[str] = []
+    runs: List[Tuple[int, int, int]] = []
+    pos = cpos = 0
+    for s, e, rep in edits:
+        if s > pos:
+            out.append(text[pos:s])
+            runs.append((cpos, pos, s - pos))
+            cpos += s - pos
+        if rep:
+            out.append(rep)
+            runs.append((cpos, s, len(rep)))
+            cpos += len(rep)
+        pos = e
+    if pos < len(text):
+        out.append(text[pos:])
+        runs.append((cpos, pos, len(text) - pos))
+    return "".join(out), runs
+
+def _compose(outer: List[Tuple[int, int, int]], inner: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    outer: final -> mid runs, inner: mid -> raw runs. Returns final -> raw runs,
+    merging neighbours that stay contiguous in both spaces.
+    """
+    out: List[Tuple[int, int, int]] = []
+    j = 0
+    for c, m, n in outer:
+        # advance inner to the run containing mid offset m
+        while j + 1 < len(inner) and inner[j + 1][0] <= m:
+            j += 1
+        k, lo, hi = j, m, m + n
+        while lo < hi and k < len(inner):
+            ic, ir, il = inner[k]
+            if ic + il <= lo:
+                k += 1
+                continue
+            a = max(lo, ic)
+            b = min(hi, ic + il)
+            if b > a:
+                run = (c + (a - m), ir + (a - ic), b - a)
+                if out and out[-1][0] + out[-1][2] == run[0] and out[-1][1] + out[-1][2] == run[1]:
+                    out[-1] = (out[-1][0], out[-1][1], out[-1][2] + run[2])
+                else:
+                    out.append(run)
+            lo = b
+            k += 1
+    return out
+
+# ----- headers / footers -----
+
+PAGE_NUM_RX = re.compile(r"^\s*(?:page\s*)?[-–]?\s*\d{1,4}\s*[-–]?\s*(?:of\s+\d{1,4})?\s*$", re.IGNORECASE)
+EDGE_LINES = 2        # lines inspected at the top and bottom of each page
+MAX_HEADER_CHARS = 100  # longer lines are body text, never headers
+
+def _line_key(line: str) -> str:
+    return re.sub(r"\d+", "#", " ".join(line.lower().split()))
+
+def header_footer_spans(text: str, page_starts: List[int], min_pages: int = 3,
+                        min_share: float = 0.5) -> List[Tuple[int, int]]:
+    """
+    Raw (start, end) spans of header/footer lines (including their newline):
+    lines at a page edge whose digit-normalized form repeats on most pages,
+    plus bare page-number lines at a page edge.
+    """
+    bounds = list(zip(page_starts, page_starts[1:] + [len(text)]))
+    edge_lines: List[List[Tuple[int, int, str]]] = []
+    for ps, pe in bounds:
+        lines, pos = [], ps
+        for line in text[ps:pe].split("\n"):
+            end = pos + len(line)
+            if line.strip() and line.strip() != "\f":
+                lines.append((pos, min(pe, end + 1), line))
+            pos = end + 1
+        edge_lines.append(lines[:EDGE_LINES] + lines[-EDGE_LINES:] if len(lines) > 2 * EDGE_LINES else lines)
+
+    counts = Counter()
+    for lines in edge_lines:
+        counts.update({_line_key(l) for _, _, l in lines})
+    threshold = max(min_pages, int(len(bounds) * min_share + 0.999))
+    repeated = {k for k, n in counts.items() if n >= threshold and 1 < len(k) <= MAX_HEADER_CHARS}
+
+    spans = set()
+    for lines in edge_lines:
+        for s, e, l in lines:
+            if _line_key(l) in repeated or PAGE_NUM_RX.match(l.replace("\f", "")):
+                spans.add((s, e))
+    return sorted(spans)
+
+# ----- main entry point -----
+
+CLEANUP_RX = re.compile(
+    r"(?P<hyphen>(?<=[A-Za-z])-[ \t]*\n[ \t]*(?=[a-z]))"   # termi-\nnation
+    r"|(?P<trail>[ \t]+(?=\n))"                            # trailing spaces
+    r"|(?P<blank>\n(?:[ \t]*\n){2,})"                       # 3+ newlines
+    r"|(?P<spaces>[ \t]{2,})"                                # runs of spaces
+)
+CLEANUP_REPL = {"hyphen": "", "trail": "", "blank": "\n\n", "spaces": " "}
+CRLF_RX = re.compile(r"\r(?=\n)")
+TRANSLATE = str.maketrans({"\f": "\n", "\u00a0": " ", "\r": "\n", "\u200b": " "})
+
+def canonicalize(text: str, page_starts: Optional[List[int]] = None) -> Tuple[str, OffsetMap]:
+    """Return (canonical_text, OffsetMap canonical -> raw)."""
+    raw_len = len(text)
+    if page_starts is None:
+        page_starts = [0] + [m.end() for m in re.finditer("\f", text) if m.end() < raw_len]
+
+    # 1) headers/footers (needs the page structure, so runs on the raw text)
+    hf = header_footer_spans(text, page_starts) if len(page_starts) > 1 else []
+    t1, runs1 = _apply_edits(text, [(s, e, "") for s, e in hf])
+
+    # 2) CRLF -> LF (drop the CR), then length-preserving cleanup: form feeds, NBSP, lone CR -> plain characters
+    if "\r\n" in t1:
+        t1, runs_cr = _apply_edits(t1, [(m.start(), m.start() + 1, "") for m in CRLF_RX.finditer(t1)])
+        runs1 = _compose(runs_cr, runs1)
+    t1 = t1.translate(TRANSLATE)
+
+    # 3) dehyphenation + whitespace collapsing in one pass
+    edits = [(m.start(), m.end(), CLEANUP_REPL[m.lastgroup]) for m in CLEANUP_RX.finditer(t1)]
+    t2, runs2 = _apply_edits(t1, edits)
+
+    return t2, OffsetMap(_compose(runs2, runs1), raw_len)
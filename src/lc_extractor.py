@@ -1,5 +1,8 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, Field, create_model
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 
@@ -10,6 +13,15 @@ class FieldExtraction(BaseModel):
     end: int = Field(..., description="GLOBAL char end in full doc")
     confidence: float = Field(..., ge=0.0, le=1.0)
 
+# Built-in field definitions; config/schema.json can override them per field ("llm")
+DEFINITIONS = {
+    "parties": "the legal entities that enter into the agreement.",
+    "effective_date": "date on which the agreement takes effect.",
+    "governing_law": "jurisdiction whose laws govern the agreement.",
+    "payment_terms": "invoicing, due dates, Net days, etc.",
+    "termination_clause": "termination rights, notice, for/without cause.",
+}
+
 PROMPT = ChatPromptTemplate.from_messages([
     ("system", "You are a contract extractor. Return only the JSON object matching the schema."),
     ("user", """Schema:
@@ -21,10 +33,8 @@ PROMPT = ChatPromptTemplate.from_messages([
 
 Field to extract: {field}
 
-Definitions:
-- governing_law: jurisdiction whose laws govern the agreement.
-- payment_terms: invoicing, due dates, Net days, etc.
-- termination_clause: termination rights, notice, for/without cause.
+Definition:
+- {field}: {definition}
 
 Global offset of this excerpt: {chunk_start}
 Excerpt:
@@ -36,21 +46,151 @@ Rules:
 """)
 ])
 
+def _prompt_version(prompt: ChatPromptTemplate, model: Type[BaseModel]) -> str:
+    """Changes whenever the prompt text or the answer schema changes (part of the cache key)."""
+    return hashlib.sha1((str(prompt.messages) + str(model.model_json_schema())).encode("utf-8")).hexdigest()[:12]
+
+PROMPT_VERSION = _prompt_version(PROMPT, FieldExtraction)
+
+# ----- Long-lived clients and chains (one per model/endpoint, not one per call) -----
+
+@lru_cache(maxsize=16)
+def get_llm(model_name: str, base_url: Optional[str] = None, max_retries: int = 2,
+            timeout: Optional[float] = None) -> ChatOpenAI:
+    return ChatOpenAI(model=model_name, temperature=0, base_url=base_url or None,
+                      max_retries=max_retries, timeout=timeout)
+
+@lru_cache(maxsize=16)
+def field_chain(model_name: str, base_url: Optional[str] = None, max_retries: int = 2,
+                timeout: Optional[float] = None):
+    return PROMPT | get_llm(model_name, base_url, max_retries, timeout).with_structured_output(FieldExtraction)
+
+def field_inputs(field: str, chunk_start: int, chunk_text: str, definition: Optional[str] = None) -> dict:
+    return {
+        "field": field,
+        "definition": definition or DEFINITIONS.get(field, field.replace("_", " ")),
+        "chunk_start": chunk_start,
+        "chunk_text": chunk_text
+    }
+
+def field_result(result: FieldExtraction, chunk_start: int) -> dict:
+    data = result.model_dump()
+    # If the model returned local offsets by mistake, adjust to global
+    if data["start"] < chunk_start or data["end"] < chunk_start:
+        data["start"] = chunk_start + max(0, data["start"])
+        data["end"]   = chunk_start + max(0, data["end"])
+    return data
+
+def rebase_field(cached: dict, chunk_start: int, chunk_text: str) -> dict:
+    """A cached answer (offsets relative to its excerpt) placed onto this excerpt."""
+    data = dict(cached)
+    s, e = data["start"], data["end"]
+    if data.get("text") and chunk_text[s:e] != data["text"]:
+        loc = _locate(data["text"], chunk_text)   # whitespace differs from the cached excerpt
+        if loc:
+            s, e = loc
+    data["start"], data["end"] = chunk_start + s, chunk_start + e
+    return data
+
 def lc_llm_extract_field(doc_id: str, field: str, chunk_start: int, chunk_text: str,
-                         model_name: str = "gpt-4o-mini") -> Optional[dict]:
-    llm = ChatOpenAI(model=model_name, temperature=0)
-    chain = PROMPT | llm.with_structured_output(FieldExtraction)
+                         model_name: str = "gpt-4o-mini", definition: Optional[str] = None) -> Optional[dict]:
+    try:
+        result: FieldExtraction = field_chain(model_name).invoke(
+            field_inputs(field, chunk_start, chunk_text, definition))
+        return field_result(result, chunk_start)
+    except Exception:
+        return None
+
+# ----- Batched multi-field extraction: one call for every missing field -----
+
+class FieldAnswer(BaseModel):
+    text: str = Field("", description="Span copied verbatim from one excerpt; empty if not present")
+    excerpt: int = Field(0, description="Number of the excerpt the text was copied from")
+    confidence: float = Field(0.0, ge=0.0, le=1.0)
+
+@lru_cache(maxsize=64)
+def _batch_model(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    return create_model("BatchExtraction", **{f: (FieldAnswer, Field(default_factory=FieldAnswer)) for f in fields})
+
+BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a contract extractor. Return only the JSON object matching the schema."),
+    ("user", """Extract every field below from the numbered excerpts of one contract.
+
+Fields:
+{definitions}
+
+For each field return:
+- text: the span copied verbatim from ONE excerpt
+- excerpt: the number of that excerpt
+- confidence: float in [0,1]
+
+{excerpts}
+
+Rules:
+- Return one JSON object with one entry per field ONLY.
+- If a field is not in any excerpt, set confidence=0 and empty text.
+""")
+])
+
+def _locate(span: str, excerpt: str) -> Optional[Tuple[int, int]]:
+    """Local (start, end) of span in excerpt: exact, then case/whitespace-insensitive over every word."""
+    i = excerpt.find(span)
+    if i != -1:
+        return i, i + len(span)
+    words = span.split()
+    if not words:
+        return None
+    m = re.search(r"\s+".join(map(re.escape, words)), excerpt, re.IGNORECASE)
+    return (m.start(), m.end()) if m else None
+
+BATCH_PROMPT_VERSION = _prompt_version(BATCH_PROMPT, FieldAnswer)
+
+@lru_cache(maxsize=64)
+def batch_chain(model_name: str, fields: Tuple[str, ...], base_url: Optional[str] = None,
+                max_retries: int = 2, timeout: Optional[float] = None):
+    llm = get_llm(model_name, base_url, max_retries, timeout)
+    return BATCH_PROMPT | llm.with_structured_output(_batch_model(fields))
+
+def batch_inputs(definitions: Dict[str, str], excerpts: List[Tuple[int, str]]) -> dict:
+    return {
+        "definitions": "\n".join(f"- {f}: {d}" for f, d in definitions.items()),
+        "excerpts": "\n\n".join(f"Excerpt {i + 1} (global offset {start}):\n{text}"
+                                  for i, (start, text) in enumerate(excerpts)),
+    }
+
+def batch_answers(data: dict, fields: Tuple[str, ...]) -> BaseModel:
+    """Rebuild a batch answer from its cached model_dump()."""
+    return _batch_model(fields).model_validate(data)
+
+def batch_result(result: BaseModel, fields: Tuple[str, ...], excerpts: List[Tuple[int, str]]) -> Dict[str, dict]:
+    """
+    Offsets are computed here by locating the returned text in its excerpt,
+    so the model never has to do offset arithmetic. Answers that can't be
+    located (not copied verbatim) are dropped.
+    """
+    out: Dict[str, dict] = {}
+    for f in fields:
+        ans: FieldAnswer = getattr(result, f)
+        if not ans.text or not (1 <= ans.excerpt <= len(excerpts)):
+            continue
+        start, text = excerpts[ans.excerpt - 1]
+        loc = _locate(ans.text, text)
+        if loc is None:
+            continue
+        s, e = loc
+        out[f] = {"field": f, "text": text[s:e], "start": start + s, "end": start + e,
+                  "confidence": ans.confidence, "excerpt": ans.excerpt}
+    return out
+
+def lc_llm_extract_fields(doc_id: str, definitions: Dict[str, str], excerpts: List[Tuple[int, str]],
+                          model_name: str = "gpt-4o-mini") -> Optional[Dict[str, dict]]:
+    """
+    One structured call for several fields over several (global_start, text)
+    excerpts. Returns {field: {text, start, end, confidence}} for non-empty answers.
+    """
+    fields = tuple(definitions)
     try:
-        result: FieldExtraction = chain.invoke({
-            "field": field,
-            "chunk_start": chunk_start,
-            "chunk_text": chunk_text
-        })
-        data = result.model_dump()
-        # If the model returned local offsets by mistake, adjust to global
-        if data["start"] < chunk_start or data["end"] < chunk_start:
-            data["start"] = chunk_start + max(0, data["start"])
-            data["end"]   = chunk_start + max(0, data["end"])
-        return data
+        result = batch_chain(model_name, fields).invoke(batch_inputs(definitions, excerpts))
     except Exception:
         return None
+    return batch_result(result, fields, excerpts)
@@ -0,0 +1,177 @@
+"""
+LLM backends for llm_engine.py
+- One interface: invoke(make_chain, inputs, answer_model, key) -> answer
+  (a pydantic model instance), awaited on the engine's loop
+- live      : the real chat model (make_chain() builds the cached chain)
+- record    : live, plus every answer and its latency appended to a JSONL file
+- replay    : answers from a recorded file, matched on the request key,
+              optionally after sleeping the recorded latency; unknown
+              requests raise ReplayMiss (the field stays empty)
+- synthetic : no network: fake answers taken from the excerpt (deterministic
+              per request) after a latency drawn from fixed / uniform /
+              lognormal, so threading, ranking and caching can be profiled
+              offline
+Selected with "llm_backend" in config/extractor.llm.json.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Tuple, Type
+
+from pydantic import BaseModel
+
+class ReplayMiss(LookupError):
+    pass
+
+def request_key(model_key: str, prompt_version: str, inputs: Dict[str, Any]) -> str:
+    """Exact request identity (offsets included) for record/replay."""
+    blob = json.dumps([model_key, prompt_version, inputs], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+class LLMBackend:
+    name = "base"
+
+    async def invoke(self, make_chain: Callable[[], Any], inputs: Dict[str, Any],
+                     answer_model: Type[BaseModel], key: str) -> BaseModel:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+class LiveBackend(LLMBackend):
+    name = "live"
+
+    async def invoke(self, make_chain, inputs, answer_model, key):
+        return await make_chain().ainvoke(inputs)
+
+class RecordBackend(LiveBackend):
+    name = "record"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.recorded = 0
+
+    async def invoke(self, make_chain, inputs, answer_model, key):
+        t0 = time.monotonic()
+        result = await make_chain().ainvoke(inputs)
+        row = {"key": key, "latency_ms": round((time.monotonic() - t0) * 1000, 1), "answer": result.model_dump()}
+        with self.path.open("a", encoding="utf-8") as fh:   # only the engine's loop thread writes
+            fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.recorded += 1
+        return result
+
+    def stats(self):
+        return {"backend": self.name, "recorded": self.recorded, "file": str(self.path)}
+
+class ReplayBackend(LLMBackend):
+    name = "replay"
+
+    def __init__(self, path: Path, use_latency: bool = True):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        with Path(path).open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    row = json.loads(line)
+                    self.rows[row["key"]] = row   # a later recording of the same request wins
+        self.use_latency = use_latency
+        self.hits = self.misses = 0
+
+    async def invoke(self, make_chain, inputs, answer_model, key):
+        row = self.rows.get(key)
+        if row is None:
+            self.misses += 1
+            raise ReplayMiss(key)
+        self.hits += 1
+        if self.use_latency:
+            await asyncio.sleep(row.get("latency_ms", 0) / 1000.0)
+        return answer_model.model_validate(row["answer"])
+
+    def stats(self):
+        return {"backend": self.name, "rows": len(self.rows), "hits": self.hits, "misses": self.misses}
+
+# ----- synthetic -----
+
+EXCERPT_RX = re.compile(r"Excerpt (\d+) \(global offset \d+\):\n")
+SENTENCE_RX = re.compile(r"[^.;\n]{20,200}[.;]?")
+
+def _sentence(text: str, rng: random.Random) -> Tuple[int, str]:
+    """(local offset, text) of a random sentence-ish span of text."""
+    spans = [m for m in SENTENCE_RX.finditer(text) if m.group().strip()]
+    if not spans:
+        return 0, text[:120]
+    m = rng.choice(spans)
+    return m.start(), m.group()
+
+class SyntheticBackend(LLMBackend):
+    name = "synthetic"
+
+    def __init__(self, latency: str = "lognormal", median_ms: float = 800.0, sigma: float = 0.5,
+                 min_ms: float = 200.0, max_ms: float = 2000.0, empty_rate: float = 0.2, seed: int = 0):
+        if latency not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown synthetic latency '{latency}'. Choose from: fixed, uniform, lognormal")
+        self.latency, self.median_ms, self.sigma = latency, median_ms, sigma
+        self.min_ms, self.max_ms = min_ms, max_ms
+        self.empty_rate, self.seed = empty_rate, seed
+        self.answered = 0
+
+    def delay_ms(self, rng: random.Random) -> float:
+        if self.latency == "fixed":
+            return self.median_ms
+        if self.latency == "uniform":
+            return rng.uniform(self.min_ms, self.max_ms)
+        return self.median_ms * math.exp(rng.gauss(0.0, self.sigma))
+
+    def answer(self, inputs: Dict[str, Any], answer_model: Type[BaseModel], rng: random.Random) -> BaseModel:
+        if "chunk_text" in inputs:   # single field (lc_extractor.FieldExtraction)
+            if rng.random() < self.empty_rate:
+                return answer_model(field=inputs["field"], text="", start=0, end=0, confidence=0.0)
+            off, text = _sentence(inputs["chunk_text"], rng)
+            start = int(inputs["chunk_start"]) + off
+            return answer_model(field=inputs["field"], text=text, start=start, end=start + len(text),
+                                confidence=round(rng.uniform(0.5, 0.95), 2))
+        # batch: numbered excerpts, one answer per field (lc_extractor.FieldAnswer)
+        parts = EXCERPT_RX.split(inputs["excerpts"])[1:]
+        excerpts: List[str] = [parts[i + 1].rstrip("\n") for i in range(0, len(parts), 2)]
+        answers: Dict[str, Any] = {}
+        for f in answer_model.model_fields:
+            if not excerpts or rng.random() < self.empty_rate:
+                continue
+            n = rng.randrange(len(excerpts))
+            answers[f] = {"text": _sentence(excerpts[n], rng)[1], "excerpt": n + 1,
+                          "confidence": round(rng.uniform(0.5, 0.95), 2)}
+        return answer_model.model_validate(answers)
+
+    async def invoke(self, make_chain, inputs, answer_model, key):
+        rng = random.Random(f"{self.seed}:{key}")   # same request -> same answer and latency
+        await asyncio.sleep(self.delay_ms(rng) / 1000.0)
+        self.answered += 1
+        return self.answer(inputs, answer_model, rng)
+
+    def stats(self):
+        return {"backend": self.name, "answered": self.answered, "latency": self.latency}
+
+# ----- registry -----
+
+BACKENDS = ["live", "record", "replay", "synthetic"]
+
+def get_backend(cfg: Dict[str, Any], root: Path) -> LLMBackend:
+    name = cfg.get("llm_backend", "live") or "live"
+    if name == "live":
+        return LiveBackend()
+    if name == "record":
+        return RecordBackend(root / cfg.get("llm_record_file", "outputs/llm_record.jsonl"))
+    if name == "replay":
+        path = root / cfg.get("llm_record_file", "outputs/llm_record.jsonl")
+        if not path.exists():
+            raise FileNotFoundError(f"No LLM recording to replay: {path} (run once with llm_backend=record)")
+        return ReplayBackend(path, bool(cfg.get("llm_replay_latency", True)))
+    if name == "synthetic":
+        return SyntheticBackend(**cfg.get("llm_synthetic", {}))
+    raise ValueError(f"Unknown LLM backend '{name}'. Choose from: {', '.join(BACKENDS)}")
@@ -0,0 +1,108 @@
+"""
+Content-addressed cache for LLM field extractions
+- Keyed on (model, field + definition, prompt version, normalized excerpt
+  hash): chunk offsets are NOT part of the key, so the same clause text at
+  another offset (re-ingested PDF, boilerplate shared across contracts) hits
+- Values hold offsets relative to the excerpt; callers rebase them onto the
+  excerpt's current global start on a hit
+- SQLite in WAL mode with one connection per thread (and per process), so
+  extractor threads and worker processes can share one cache file
+- Eviction: rows older than ttl_days are dropped, and beyond max_rows the
+  least recently used rows go (checked on open and every EVICT_EVERY writes)
+- hits / misses / writes / evicted counters for this process (stats())
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional
+
+EVICT_EVERY = 500   # writes between eviction passes
+
+def normalize(text: str) -> str:
+    """Whitespace-insensitive form of an excerpt (NBSP, line breaks, runs of spaces)."""
+    return " ".join(text.split())
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()
+
+def make_key(model: str, kind: str, prompt_version: str, definitions: Any, excerpts: Iterable[str]) -> str:
+    parts = [model, kind, prompt_version, json.dumps(definitions, sort_keys=True), *map(text_hash, excerpts)]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+class LLMCache:
+    def __init__(self, path: Path, ttl_days: float = 30.0, max_rows: int = 200_000):
+        self.path = Path(path)
+        self.ttl_s = float(ttl_days) * 86400
+        self.max_rows = int(max_rows)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = self._con()
+        con.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+                           key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                           created REAL NOT NULL, used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)""")
+        con.execute("CREATE INDEX IF NOT EXISTS llm_cache_used ON llm_cache(used)")
+        self.evict()
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA busy_timeout=30000")
+            self._local.con = con
+        return con
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def get(self, key: str) -> Optional[Any]:
+        con = self._con()
+        row = con.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl_s and now - row[1] > self.ttl_s):
+            self._count("misses")
+            return None
+        con.execute("UPDATE llm_cache SET used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._count("hits")
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        self._con().execute("INSERT OR REPLACE INTO llm_cache(key, value, created, used) VALUES (?, ?, ?, ?)",
+                            (key, json.dumps(value, ensure_ascii=False), now, now))
+        self._count("writes")
+        with self._lock:
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        con = self._con()
+        n = 0
+        if self.ttl_s:
+            n += con.execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl_s,)).rowcount
+        if self.max_rows:
+            over = con.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_rows
+            if over > 0:
+                n += con.execute("DELETE FROM llm_cache WHERE key IN "
+                                 "(SELECT key FROM llm_cache ORDER BY used LIMIT ?)", (over,)).rowcount
+        self._count("evicted", n)
+        return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self.counters)
+        looked = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / looked, 3) if looked else None
+        out["rows"] = self._con().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return out
@@ -0,0 +1,377 @@
+"""
+Asyncio LLM engine (replaces one-blocked-thread-per-request LLM calls)
+- One event loop in a daemon thread; many requests in flight on it, bounded
+  by an in-flight limit instead of parked worker threads
+- Adaptive limit (AIMD): starts at "llm_concurrency", slow start (+1 per
+  success) until the first cut, then +1 per limit-full of successes while
+  p95 latency stays under "llm_p95_target_ms", halved on
+  429 / timeout (at most once per cool-down), kept within
+  "llm_concurrency_min".."llm_concurrency_max"; "llm_adaptive": false pins it
+- Global token budget ("llm_tokens_per_min", 0 = off): each call reserves its
+  estimated prompt + answer tokens from a per-minute bucket before it is sent
+- metrics(): current limit, in flight, queue depth, p95, token headroom and
+  counters; "llm_metrics_file" appends a JSONL snapshot every
+  "llm_metrics_interval_s"
+- Long-lived clients and chains: lc_extractor.get_llm / field_chain /
+  batch_chain are cached per model + endpoint, so the HTTP connection pool is
+  reused across every call
+- Token-bucket rate limiter ("llm_rate_per_s" requests/s, 0 = off)
+- Retries with exponential backoff + jitter on 429 / timeouts / connection
+  errors / 5xx ("llm_max_retries"), honouring Retry-After; the OpenAI
+  client's own retries are switched off so there is one retry policy
+- Sync callers (worker threads) use run(); the extractor pipeline submits
+  coroutines with submit() and keeps regex/spaCy work in its own thread pool
+- "llm_base_url" points the client at another endpoint, e.g. the offline
+  stub in llm_stub.py
+- Where answers come from is pluggable (llm_backends.py, "llm_backend"):
+  live / record / replay / synthetic; limits, retries and the cache behave
+  the same for all of them
+- Answers are looked up in / stored to the content-addressed cache
+  (llm_cache.py, "llm_cache") before a request is queued; the endpoint is
+  part of the model key, so stub answers never leak into real runs. SQLite
+  runs on a small "llm-cache" thread pool, never on the event loop
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Deque, List, Optional, Tuple, Coroutine
+
+import openai
+
+from lc_extractor import (FieldExtraction, field_chain, field_inputs, field_result, rebase_field, batch_chain,
+                          batch_inputs, batch_result, batch_answers, _batch_model, PROMPT_VERSION,
+                          BATCH_PROMPT_VERSION)
+from llm_cache import LLMCache, make_key
+from llm_backends import LLMBackend, LiveBackend, get_backend, request_key
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+RETRYABLE = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+OVERLOAD = (openai.RateLimitError, openai.APITimeoutError)   # signals to cut the in-flight limit
+
+CACHE_THREADS = 2   # SQLite reads/writes for the cache, off the event loop
+
+# Token estimate per call (chars / 4 of the inputs + template + answer allowance)
+PROMPT_OVERHEAD_TOKENS = 150
+ANSWER_TOKENS = 200
+
+class TokenBucket:
+    """rate tokens/s, up to burst; only used from the engine's loop (no locking)."""
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self.tokens = self.burst
+        self.t = time.monotonic()
+
+    def available(self) -> float:
+        return min(self.burst, self.tokens + (time.monotonic() - self.t) * self.rate)
+
+    async def acquire(self, n: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        n = min(n, self.burst)   # an oversized call waits for a full bucket rather than forever
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.t) * self.rate)
+            self.t = now
+            if self.tokens >= n:
+                self.tokens -= n
+                return
+            await asyncio.sleep((n - self.tokens) / self.rate)
+
+class AdaptiveLimiter:
+    """
+    AIMD in-flight limit (used only from the engine's loop). Waiters queue in
+    FIFO order; a slot freed or a raised limit wakes the next ones.
+    """
+    def __init__(self, initial: int = 3, min_limit: int = 1, max_limit: int = 64, p95_target_ms: float = 0.0,
+                 adaptive: bool = True, decrease: float = 0.5, window: int = 100):
+        self.min_limit, self.max_limit = max(1, min_limit), max(1, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.p95_target_s = p95_target_ms / 1000.0
+        self.adaptive, self.decrease = adaptive, decrease
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.last_cut = 0.0
+        self.ssthresh = float(self.max_limit)   # slow start (+1 per success) until the first cut
+
+    @property
+    def cap(self) -> int:
+        return max(1, int(self.limit))
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.cap and not self.waiters:
+            self.in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters.append(fut)
+        try:
+            await fut   # the slot is counted by _wake
+        except asyncio.CancelledError:
+            # cancelled while queued (first_confident / a deadline dropping the call): give back a slot
+            # _wake already granted, else leave the queue. _wake pops cancelled waiters without granting
+            # them, so the future may be gone; remove() would raise ValueError, which extract_field turns
+            # into a plain None answer and the cancellation is lost.
+            if fut.done() and not fut.cancelled():
+                self.release()
+            elif fut in self.waiters:
+                self.waiters.remove(fut)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self.waiters and self.in_flight < self.cap:
+            fut = self.waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(None)
+
+    def p95(self) -> float:
+        if not self.latencies:
+            return 0.0
+        lat = sorted(self.latencies)
+        return lat[min(len(lat) - 1, int(0.95 * len(lat)))]
+
+    def on_success(self, latency_s: float) -> None:
+        self.latencies.append(latency_s)
+        if not self.adaptive:
+            return
+        if self.p95_target_s and len(self.latencies) >= 10 and self.p95() > self.p95_target_s:
+            self._cut(0.9)   # slow answers: ease off gently
+            return
+        # additive increase, only while the limit is what holds requests back
+        if self.in_flight >= self.cap or self.waiters:
+            step = 1.0 if self.limit < self.ssthresh else 1.0 / self.limit
+            self.limit = min(float(self.max_limit), self.limit + step)
+            self._wake()
+
+    def on_overload(self) -> None:
+        if self.adaptive:
+            self._cut(self.decrease)
+
+    def _cut(self, factor: float) -> None:
+        # one cut per round trip: the requests already in flight report the same overload
+        now = time.monotonic()
+        if now - self.last_cut < max(0.5, self.p95()):
+            return
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self.ssthresh = self.limit
+        self.last_cut = now
+
+def _retry_after(err: Exception) -> Optional[float]:
+    resp = getattr(err, "response", None)
+    try:
+        return float(resp.headers.get("retry-after")) if resp is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class LLMEngine:
+    def __init__(self, concurrency: int = 3, rate_per_s: float = 0.0, max_retries: int = 4,
+                 base_url: Optional[str] = None, timeout_s: Optional[float] = 60.0,
+                 backoff_s: float = 0.5, backoff_max_s: float = 20.0,
+                 adaptive: bool = True, min_concurrency: int = 1, max_concurrency: int = 64,
+                 p95_target_ms: float = 0.0, tokens_per_min: float = 0.0, cache: Optional[LLMCache] = None,
+                 backend: Optional[LLMBackend] = None):
+        self.base_url = base_url or None
+        self.cache = cache
+        self._cache_pool = ThreadPoolExecutor(CACHE_THREADS, thread_name_prefix="llm-cache") if cache else None
+        self.backend = backend or LiveBackend()
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.backoff_s, self.backoff_max_s = backoff_s, backoff_max_s
+        self.bucket = TokenBucket(rate_per_s)
+        self.tokens_per_min = float(tokens_per_min)
+        self.token_budget = TokenBucket(self.tokens_per_min / 60.0, self.tokens_per_min or None)
+        self.limiter = AdaptiveLimiter(concurrency, min_concurrency, max_concurrency, p95_target_ms, adaptive)
+        self.waiting_tokens = 0
+        self.stats = {"calls": 0, "ok": 0, "retries": 0, "failed": 0, "rate_limited": 0, "timeouts": 0,
+                      "cancelled": 0, "tokens": 0, "max_in_flight": 0}
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-engine", daemon=True)
+        self._thread.start()
+
+    # ----- Bridge from worker threads -----
+    def submit(self, coro: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine) -> Any:
+        return self.submit(coro).result()
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        if self._cache_pool:
+            self._cache_pool.shutdown(wait=True)
+
+    async def _cached(self, fn, *args) -> Any:
+        """Run a blocking cache call (get / put) on the cache threads."""
+        return await self.loop.run_in_executor(self._cache_pool, fn, *args)
+
+    # ----- Metrics -----
+    def metrics(self) -> Dict[str, Any]:
+        lim = self.limiter
+        return {
+            "limit": lim.cap,
+            "in_flight": lim.in_flight,
+            "queue_depth": len(lim.waiters) + self.waiting_tokens,
+            "p95_ms": round(lim.p95() * 1000, 1),
+            "tokens_per_min": self.tokens_per_min,
+            "tokens_available": round(self.token_budget.available()) if self.tokens_per_min else None,
+            **self.stats,
+            "cache": self.cache.stats() if self.cache else None,
+            "backend": self.backend.stats(),
+        }
+
+    async def _log_metrics(self, path: Path, interval_s: float) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            await asyncio.sleep(interval_s)
+            # snapshot on the loop, file append off it
+            line = json.dumps({"ts": round(time.time(), 3), **self.metrics()}) + "\n"
+            await asyncio.to_thread(_append, path, line)
+
+    def log_metrics(self, path: Path, interval_s: float = 5.0) -> None:
+        """Append a metrics snapshot to path (JSONL) every interval_s, for the engine's lifetime."""
+        self.submit(self._log_metrics(Path(path), interval_s))
+
+    # ----- Core call: rate limit -> token budget -> adaptive slot -> retry/backoff -----
+    async def call(self, make_chain, inputs: Dict[str, Any], answer_model, key: str) -> Any:
+        st, lim = self.stats, self.limiter
+        st["calls"] += 1
+        tokens = sum(len(str(v)) for v in inputs.values()) // 4 + PROMPT_OVERHEAD_TOKENS + ANSWER_TOKENS
+        try:
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire()
+                self.waiting_tokens += 1
+                try:
+                    await self.token_budget.acquire(tokens)
+                finally:
+                    self.waiting_tokens -= 1
+                st["tokens"] += tokens
+                await lim.acquire()
+                st["max_in_flight"] = max(st["max_in_flight"], lim.in_flight)
+                t0 = time.monotonic()
+                try:
+                    result = await self.backend.invoke(make_chain, inputs, answer_model, key)
+                    lim.on_success(time.monotonic() - t0)
+                    st["ok"] += 1
+                    return result
+                except RETRYABLE as e:
+                    if isinstance(e, OVERLOAD):
+                        st["rate_limited" if isinstance(e, openai.RateLimitError) else "timeouts"] += 1
+                        lim.on_overload()
+                    if attempt == self.max_retries:
+                        st["failed"] += 1
+                        raise
+                    delay = _retry_after(e)
+                finally:
+                    lim.release()
+                st["retries"] += 1
+                backoff = min(self.backoff_max_s, self.backoff_s * 2 ** attempt) * random.uniform(0.5, 1.0)
+                await asyncio.sleep(max(delay or 0.0, backoff))
+        except asyncio.CancelledError:   # e.g. another chunk already answered this field
+            st["cancelled"] += 1
+            raise
+
+    def _model_key(self, model_name: str) -> str:
+        key = f"{model_name}@{self.base_url}" if self.base_url else model_name
+        # synthetic answers must never be served to a live run from the cache
+        return f"{key}#synthetic" if self.backend.name == "synthetic" else key
+
+    async def extract_field(self, doc_id: str, field: str, chunk_start: int, chunk_text: str,
+                            model_name: str, definition: Optional[str] = None) -> Optional[dict]:
+        inputs = field_inputs(field, chunk_start, chunk_text, definition)
+        key = None
+        if self.cache:
+            key = make_key(self._model_key(model_name), field, PROMPT_VERSION, inputs["definition"], [chunk_text])
+            hit = await self._cached(self.cache.get, key)
+            if hit is not None:
+                return rebase_field(hit, chunk_start, chunk_text)
+        make_chain = lambda: field_chain(model_name, self.base_url, 0, self.timeout_s)
+        try:
+            result = await self.call(make_chain, inputs, FieldExtraction,
+                                     request_key(self._model_key(model_name), PROMPT_VERSION, inputs))
+        except Exception:
+            return None
+        data = field_result(result, chunk_start)
+        if key:
+            # stored relative to the excerpt, rebased on every hit
+            await self._cached(self.cache.put, key,
+                               {**data, "start": data["start"] - chunk_start, "end": data["end"] - chunk_start})
+        return data
+
+    async def extract_fields(self, doc_id: str, definitions: Dict[str, str], excerpts: List[Tuple[int, str]],
+                             model_name: str) -> Optional[Dict[str, dict]]:
+        fields = tuple(definitions)
+        key = None
+        if self.cache:
+            # the raw answers carry excerpt numbers, not offsets: batch_result locates them again
+            key = make_key(self._model_key(model_name), "batch", BATCH_PROMPT_VERSION, definitions,
+                           [t for _, t in excerpts])
+            hit = await self._cached(self.cache.get, key)
+            if hit is not None:
+                return batch_result(batch_answers(hit, fields), fields, excerpts)
+        make_chain = lambda: batch_chain(model_name, fields, self.base_url, 0, self.timeout_s)
+        inputs = batch_inputs(definitions, excerpts)
+        try:
+            result = await self.call(make_chain, inputs, _batch_model(fields),
+                                     request_key(self._model_key(model_name), BATCH_PROMPT_VERSION, inputs))
+        except Exception:
+            return None
+        if key:
+            await self._cached(self.cache.put, key, result.model_dump())
+        return batch_result(result, fields, excerpts)
+
+def _append(path: Path, line: str) -> None:
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(line)
+
+_ENGINE: Optional[LLMEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+def get_engine(cfg: Dict[str, Any]) -> LLMEngine:
+    """Process-wide engine, created on first use from extractor.llm.json settings."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            cache_file = cfg.get("llm_cache") or ""
+            if cache_file and cfg.get("llm_backend") == "record":
+                # a cache hit never reaches the backend, so it would be missing from the recording
+                print("⚠️ llm_backend=record: LLM cache bypassed so every answer is recorded")
+                cache_file = ""
+            _ENGINE = LLMEngine(
+                concurrency=int(cfg.get("llm_concurrency", 3)),
+                rate_per_s=float(cfg.get("llm_rate_per_s", 0)),
+                max_retries=int(cfg.get("llm_max_retries", 4)),
+                base_url=cfg.get("llm_base_url") or None,
+                timeout_s=float(cfg.get("llm_timeout_s", 60)) or None,
+                adaptive=bool(cfg.get("llm_adaptive", True)),
+                min_concurrency=int(cfg.get("llm_concurrency_min", 1)),
+                max_concurrency=int(cfg.get("llm_concurrency_max", 64)),
+                p95_target_ms=float(cfg.get("llm_p95_target_ms", 0)),
+                tokens_per_min=float(cfg.get("llm_tokens_per_min", 0)),
+                cache=LLMCache(ROOT_DIR / cache_file, float(cfg.get("llm_cache_ttl_days", 30)),
+                               int(cfg.get("llm_cache_max_rows", 200_000))) if cache_file else None,
+                backend=get_backend(cfg, ROOT_DIR),
+            )
+            if cfg.get("llm_metrics_file"):
+                _ENGINE.log_metrics(ROOT_DIR / cfg["llm_metrics_file"], float(cfg.get("llm_metrics_interval_s", 5)))
+        return _ENGINE
+
+def reset_engine() -> None:
+    """Close the process-wide engine; the next get_engine() builds one from the new config."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            _ENGINE.close()
+            _ENGINE = None
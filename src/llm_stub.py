@@ -0,0 +1,240 @@
+"""
+Local stub of the OpenAI chat-completions API (offline testing of the LLM path)
+- POST /v1/chat/completions: answers structured-output requests
+  (response_format json_schema, or tools/function calling) with a JSON object
+  that satisfies the requested schema; "text" fields get a snippet of the
+  excerpt so downstream code sees non-empty answers
+- Injected latency (mean + jitter), 429 rate limits and 500 errors at
+  configurable rates, optional fixed in-flight capacity (429 above it)
+- Overload faults: latency grows with in-flight requests above
+  --overload-above, a share of requests stall past the client timeout
+  (--rate-stall), and a tokens-per-minute quota (--tpm, replenished
+  continuously like the real API's) answers 429 once it runs dry
+- GET /stats: requests, errors, in-flight and max in-flight counters
+
+Point the extractor at it with "llm_base_url": "http://127.0.0.1:8765/v1"
+and any OPENAI_API_KEY.
+
+Usage:
+  python src/llm_stub.py [--port 8765] [--latency-ms 300] [--jitter-ms 100]
+                         [--rate-429 0.0] [--rate-500 0.0] [--capacity 0]
+                         [--overload-above 0] [--rate-stall 0.0] [--stall-s 120] [--tpm 0]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+def _resolve(schema: Dict[str, Any], root: Dict[str, Any]) -> Dict[str, Any]:
+    ref = schema.get("$ref")
+    if ref:
+        node: Any = root
+        for part in ref.lstrip("#/").split("/"):
+            node = node[part]
+        return node
+    return schema
+
+# answer-shaped keys of lc_extractor's models; "text" gets the excerpt snippet
+ANSWERS = {"text": "", "excerpt": 1, "confidence": 0.7}
+
+def fake_value(schema: Dict[str, Any], root: Dict[str, Any], name: str, snippet: str) -> Any:
+    """A value satisfying schema (objects recurse; 'text' strings get the snippet)."""
+    schema = _resolve(schema, root)
+    if "anyOf" in schema:
+        return fake_value(next((s for s in schema["anyOf"] if s.get("type") != "null"), {}), root, name, snippet)
+    t = schema.get("type")
+    if t == "object" or "properties" in schema:
+        return {k: fake_value(v, root, k, snippet) for k, v in schema.get("properties", {}).items()}
+    if name in ANSWERS and t in (None, "string", "integer", "number"):
+        return snippet if name == "text" else ANSWERS[name]
+    if "default" in schema:
+        return schema["default"]
+    if t == "array":
+        return []
+    if t in ("integer", "number"):
+        return 0
+    if t == "boolean":
+        return False
+    return ""
+
+def _snippet(messages: Any) -> str:
+    text = messages[-1].get("content", "") if messages else ""
+    if isinstance(text, list):
+        text = " ".join(p.get("text", "") for p in text if isinstance(p, dict))
+    m = re.search(r"Excerpt[^\n]*:\n(.{1,80})", text)
+    return m.group(1).strip() if m else ""
+
+class StubState:
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 100, rate_429: float = 0.0,
+                 rate_500: float = 0.0, capacity: int = 0, overload_above: int = 0, rate_stall: float = 0.0,
+                 stall_s: float = 120.0, tpm: int = 0, seed: int = 0):
+        self.latency_ms, self.jitter_ms = latency_ms, jitter_ms
+        self.rate_429, self.rate_500, self.capacity = rate_429, rate_500, capacity
+        self.overload_above, self.rate_stall, self.stall_s, self.tpm = overload_above, rate_stall, stall_s, tpm
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.quota, self.quota_t = float(tpm), time.monotonic()   # prompt tokens left of the --tpm quota
+        self.stats = {"requests": 0, "ok": 0, "429": 0, "500": 0, "stalled": 0, "in_flight": 0,
+                      "max_in_flight": 0, "prompt_tokens": 0}
+
+    def enter(self, prompt_tokens: int = 0) -> Optional[int]:
+        """Count the request in; returns an error status to send instead, if any."""
+        with self.lock:
+            st = self.stats
+            st["requests"] += 1
+            if self.capacity and st["in_flight"] >= self.capacity:
+                st["429"] += 1
+                return 429
+            if self.tpm:
+                now = time.monotonic()
+                self.quota = min(float(self.tpm), self.quota + (now - self.quota_t) * self.tpm / 60.0)
+                self.quota_t = now
+                if prompt_tokens > self.quota:
+                    st["429"] += 1
+                    return 429
+                self.quota -= prompt_tokens
+            r = self.rng.random()
+            if r < self.rate_429:
+                st["429"] += 1
+                return 429
+            if r < self.rate_429 + self.rate_500:
+                st["500"] += 1
+                return 500
+            st["in_flight"] += 1
+            st["max_in_flight"] = max(st["max_in_flight"], st["in_flight"])
+            return None
+
+    def leave(self, prompt_tokens: int) -> None:
+        with self.lock:
+            self.stats["in_flight"] -= 1
+            self.stats["ok"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+
+    def delay(self) -> float:
+        with self.lock:
+            if self.rate_stall and self.rng.random() < self.rate_stall:
+                self.stats["stalled"] += 1
+                return self.stall_s
+            ms = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms))
+            if self.overload_above and self.stats["in_flight"] > self.overload_above:
+                ms *= self.stats["in_flight"] / self.overload_above
+            return ms / 1000.0
+
+def prompt_tokens_of(body: Dict[str, Any]) -> int:
+    return sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+
+def completion(body: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    messages = body.get("messages", [])
+    snippet = _snippet(messages)
+    prompt_tokens = prompt_tokens_of(body)
+    message: Dict[str, Any] = {"role": "assistant", "content": None}
+    finish = "stop"
+    rf = body.get("response_format") or {}
+    if rf.get("type") == "json_schema":
+        schema = rf["json_schema"]["schema"]
+        message["content"] = json.dumps(fake_value(schema, schema, "", snippet))
+    elif body.get("tools"):
+        fn = body["tools"][0]["function"]
+        args = fake_value(fn.get("parameters", {}), fn.get("parameters", {}), "", snippet)
+        message["tool_calls"] = [{"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                                  "function": {"name": fn["name"], "arguments": json.dumps(args)}}]
+        finish = "tool_calls"
+    else:
+        message["content"] = snippet or "ok"
+    completion_tokens = len(json.dumps(message)) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish, "logprobs": None}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }, prompt_tokens
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):   # quiet
+            pass
+
+        def _send(self, code: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            try:
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):   # client gave up (timeout)
+                self.close_connection = True
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                with state.lock:
+                    self._send(200, dict(state.stats))
+            else:
+                self._send(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+            err = state.enter(prompt_tokens_of(body))
+            if err == 429:
+                self._send(429, {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded",
+                                           "code": "rate_limit_exceeded"}}, {"Retry-After": "0.2"})
+                return
+            if err == 500:
+                self._send(500, {"error": {"message": "Internal error (stub)", "type": "server_error"}})
+                return
+            payload, prompt_tokens = completion(body)
+            time.sleep(state.delay())
+            state.leave(prompt_tokens)
+            self._send(200, payload)
+
+    return Handler
+
+def start_stub(port: int = 0, **kwargs) -> Tuple[ThreadingHTTPServer, str, StubState]:
+    """Run the stub in a background thread; returns (server, base_url, state). port=0 picks a free port."""
+    state = StubState(**kwargs)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", state
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=300)
+    ap.add_argument("--jitter-ms", type=float, default=100)
+    ap.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered with 429")
+    ap.add_argument("--rate-500", type=float, default=0.0, help="share of requests answered with 500")
+    ap.add_argument("--capacity", type=int, default=0, help="max in-flight before 429 (0 = unlimited)")
+    ap.add_argument("--overload-above", type=int, default=0, help="latency scales with in-flight above this")
+    ap.add_argument("--rate-stall", type=float, default=0.0, help="share of requests that stall for --stall-s")
+    ap.add_argument("--stall-s", type=float, default=120.0)
+    ap.add_argument("--tpm", type=int, default=0, help="prompt tokens per minute before 429")
+    args = ap.parse_args()
+    server, url, _ = start_stub(args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                rate_429=args.rate_429, rate_500=args.rate_500, capacity=args.capacity,
+                                overload_above=args.overload_above, rate_stall=args.rate_stall,
+                                stall_s=args.stall_s, tpm=args.tpm)
+    print(f"✓ LLM stub listening on {url} (stats: {url}/stats)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Inputs:
   - Validated docs: outputs/validate/*.json        (from Validator)
   - Per-doc metrics: outputs/analyze/per_doc.json  (from Analyst)
   - KPIs: outputs/analyze/corpus_kpis.json         (from Analyst)
+  - Run stats: outputs/extract_stats.json          (from Extractor, optional)
 
 Outputs:
   - findings.csv  : issue-level structured data for easy import
@@ -17,6 +18,7 @@ What it includes:
   - Flagged inconsistencies and anomalies (issue-level) with direct quotes
   - Missing fields & ambiguous clauses lists
   - Outlier net terms / amount warnings with evidence
+  - Per-category extraction throughput (when the extractor ran with routing)
 """
 
 from __future__ import annotations
@@ -39,7 +41,8 @@ def load_cfg() -> Dict[str, Any]:
         "inputs": {
             "validated_dir": "outputs/validate",
             "per_doc_json": "outputs/analyze/per_doc.json",
-            "kpis_json": "outputs/analyze/corpus_kpis.json"
+            "kpis_json": "outputs/analyze/corpus_kpis.json",
+            "extract_stats_json": "outputs/extract_stats.json"
         },
         "outputs": {
             "report_dir": "outputs/report",
@@ -69,6 +72,13 @@ def get_field_text(doc: Dict[str, Any], field: Optional[str]) -> Optional[str]:
         return v
     return None
 
+def get_field_page(doc: Dict[str, Any], field: Optional[str]) -> Optional[int]:
+    """PDF page of a field's span (set by the extractor when a page map exists)."""
+    v = doc.get(field) if field else None
+    if isinstance(v, dict) and isinstance(v.get("page"), int):
+        return v["page"]
+    return None
+
 def load_validated_docs(validated_dir: Path) -> List[Dict[str, Any]]:
     docs = []
     for p in sorted(validated_dir.glob("*.json")):
@@ -98,7 +108,8 @@ ISSUE_COLUMNS = [
     "payment_net_days",
     "payment_amount",
     "details",
-    "quote"
+    "quote",
+    "page"
 ]
 
 def build_issue_rows(validated_docs: List[Dict[str, Any]], max_quote_chars: int) -> List[Dict[str, Any]]:
@@ -127,7 +138,8 @@ def build_issue_rows(validated_docs: List[Dict[str, Any]], max_quote_chars: int)
                 "payment_net_days": nd if isinstance(nd, (int, float)) else "",
                 "payment_amount": amt if isinstance(amt, (int, float)) else "",
                 "details": json.dumps(details, ensure_ascii=False),
-                "quote": quote
+                "quote": quote,
+                "page": get_field_page(d, field) or ""
             })
     return rows
 
@@ -150,7 +162,8 @@ def build_markdown_report(
     kpis: Dict[str, Any],
     per_doc_df: pd.DataFrame,
     findings_df: pd.DataFrame,
-    top_risky_docs: int
+    top_risky_docs: int,
+    extract_stats: Optional[Dict[str, Any]] = None
 ) -> List[str]:
     lines: List[str] = []
     lines.append("# Contract Analysis Report (Reporter)\n")
@@ -208,6 +221,14 @@ def build_markdown_report(
     section("Governing Law Inconsistencies", lambda r: r["issue_type"] == "GOVERNING_LAW_INCONSISTENT")
     section("High Payment Amount Warnings", lambda r: r["issue_type"] == "PAYMENT_AMOUNT_HIGH")
 
+    # Extractor run stats by contract category (routing)
+    cats = (extract_stats or {}).get("categories") or {}
+    if cats and set(cats) != {"-"}:
+        lines.append("## Per-Category Extraction Throughput\n")
+        cat_df = pd.DataFrame([{"category": c, **s} for c, s in cats.items()])
+        lines.extend(md_table_from_df(cat_df, max_rows=len(cat_df)))
+        lines.append("")
+
     return lines
 
 # ---------------- Main ----------------
@@ -232,6 +253,7 @@ def run_reporter():
     docs = load_validated_docs(validated_dir)
     per_doc = load_json(per_doc_json)
     kpis    = load_json(kpis_json)
+    extract_stats = load_json(ROOT / cfg["inputs"].get("extract_stats_json", "outputs/extract_stats.json"))
 
     if per_doc is None or kpis is None:
         raise SystemExit("Analyst artifacts missing. Run analyst.py first.")
@@ -249,7 +271,8 @@ def run_reporter():
         kpis=kpis,
         per_doc_df=per_doc_df,
         findings_df=findings_df,
-        top_risky_docs=int(cfg["report"]["top_risky_docs"])
+        top_risky_docs=int(cfg["report"]["top_risky_docs"]),
+        extract_stats=extract_stats
     )
     write_md(report_md, lines)
 
@@ -19,6 +19,7 @@ What it does (no LLM, no summarization):
    - Missing required fields
    - Net-days over standards / outliers
    - Amount unusually high (warn threshold)
+   - Duplicate contracts (exact / near copies grouped by the extractor's MinHash index)
 """
 
 import json
@@ -128,6 +129,12 @@ def validate_doc_first_pass(doc: Dict[str, Any], rules: Dict[str, Any]) -> Dict[
     out = dict(doc)
     issues = out.get("_issues", []) or []
 
+    # Governing law found by the LLM comes back as a span: keep its text (span kept aside)
+    gl = out.get("governing_law")
+    if isinstance(gl, dict):
+        out["governing_law"] = gl.get("text") or None
+        out["governing_law_span"] = gl
+
     # Effective date normalization
     eff = out.get("effective_date")
     if eff:
@@ -165,8 +172,15 @@ def validate_doc_first_pass(doc: Dict[str, Any], rules: Dict[str, Any]) -> Dict[
                 "span": {"start": tc.get("start"), "end": tc.get("end")}
             })
 
+    # Exact / near copy of another contract (extractor dedup)
+    dup = out.get("_duplicate_of")
+    if isinstance(dup, dict) and dup.get("doc"):
+        issues.append({"type": "DUPLICATE", "of": dup["doc"], "similarity": dup.get("similarity")})
+
     # Required fields present?
     for f in rules.get("required_fields", []):
+        if out.get("_category") and f not in out:
+            continue   # not extracted for this contract category (extractor routing)
         if not out.get(f):
             issues.append({"type": "MISSING", "field": f})
 
@@ -298,7 +312,12 @@ def apply_cross_reference(validated_docs: List[Dict[str, Any]], rows: List[Dict[
         "inconsistent_governing_law": inconsistent_governing_law,
         "net_days_outliers": net_days_outliers,
         "net_days_party_drifts": net_days_party_drifts,
-        "amount_high_warnings": amount_high
+        "amount_high_warnings": amount_high,
+        "duplicate_contracts": [
+            {"doc_id": d.get("_doc_id"), "of": d["_duplicate_of"]["doc"],
+             "similarity": d["_duplicate_of"].get("similarity")}
+            for d in validated_docs if isinstance(d.get("_duplicate_of"), dict)
+        ]
     }
     return updated, report
 
@@ -383,6 +402,15 @@ def write_md_report(path: Path, report: Dict[str, Any]):
         lines.append("_none_")
     lines.append("")
 
+    lines.append("## Duplicate Contracts\n")
+    dups = report.get("duplicate_contracts", [])
+    if dups:
+        for item in dups[:200]:
+            lines.append(f"- {item['doc_id']}: copy of {item['of']} (similarity {item['similarity']})")
+    else:
+        lines.append("_none_")
+    lines.append("")
+
     path.write_text("\n".join(lines), encoding="utf-8")
 
 # -------------------- Runner --------------------
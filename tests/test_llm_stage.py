@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from extractor import DocJob, llm_stage, llm_stage_until
+from extractor_evidence import GAP, Evidence
+
+PARTIES = "Acme Corp and Beta LLC"
+
+class StubEngine:
+    """Batched call answers inside the GAP; the per-field call finds the parties."""
+
+    async def extract_fields(self, doc_id, definitions, excerpts, model_name):
+        text = excerpts[0][1]
+        at = text.index("[...]")
+        return {"parties": {"text": "[...]", "start": at, "end": at + 5, "confidence": 0.9, "excerpt": 1}}
+
+    async def extract_field(self, doc_id, field, chunk_start, chunk_text, model_name, definition=None):
+        at = chunk_text.index(PARTIES)
+        return {"text": PARTIES, "start": chunk_start + at, "end": chunk_start + at + len(PARTIES),
+                "confidence": 0.9}
+
+class SlowEngine:
+    """parties answers at once, payment_terms never comes back."""
+
+    async def extract_field(self, doc_id, field, chunk_start, chunk_text, model_name, definition=None):
+        if field != "parties":
+            await asyncio.sleep(60)
+        return {"text": chunk_text, "start": chunk_start, "end": chunk_start + len(chunk_text), "confidence": 0.9}
+
+def _job(**kw) -> DocJob:
+    return DocJob(txt_path=Path("doc.txt"), schema={}, text="", out_path=Path("doc.json"), text_sha1="",
+                  fps={}, todo=["parties", "payment_terms"], record={}, provenance={}, **kw)
+
+def test_batched_gap_answer_falls_back_to_per_field_calls():
+    first, second = f"between {PARTIES}.", "Net 30 days."
+    ev = Evidence(first + GAP + second, [(0, 100, len(first)), (len(first) + len(GAP), 500, len(second))])
+    job = _job()
+    job.definitions = {"parties": "the parties", "payment_terms": "payment terms"}
+    job.batch_excerpts = [(0, ev.text, ev)]
+    job.excerpts = {"parties": [(100, first, None)], "payment_terms": []}
+
+    asyncio.run(llm_stage(job, {"regex_confidence": 0.6, "min_span_len": 5}, StubEngine()))
+
+    assert job.new["parties"]["text"] == PARTIES
+    assert job.new["parties"]["start"] == 100 + first.index(PARTIES)
+    assert "batched" not in job.provenance["parties"]
+
+def test_deadline_keeps_fields_already_back():
+    job = _job(definitions={"parties": "the parties", "payment_terms": "payment terms"},
+               excerpts={"parties": [(0, PARTIES, None)], "payment_terms": [(40, "Net 30 days.", None)]})
+
+    asyncio.run(llm_stage_until(job, {"doc_deadline_s": 0.2, "min_span_len": 5}, SlowEngine()))
+
+    assert job.new["parties"]["text"] == PARTIES
+    assert job.timed_out == ["payment_terms"]
+    assert job.provenance["payment_terms"]["timed_out"] and "timed_out" not in job.provenance["parties"]